@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入耗时基准测试
+
+在全新的子进程中分别导入无界面使用的模块，测量导入耗时，
+并检查导入过程中没有加载tkinter，用于防止无界面启动成本回退
+
+用法:
+    python benchmarks/bench_import.py [--repeat 5] [--max-ms 0]
+
+--max-ms大于0时，任一模块导入耗时(中位数)超过该值即以非0退出码结束
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 无界面场景会用到的导入语句
+IMPORTS = [
+    "import src.utils",
+    "from src.utils import format_time, parse_time",
+    "import src.core",
+    "from src.core import probe_audio",
+    "from src.core import AudioProcessor",
+    "import src.cli"
+]
+
+# 子进程中执行的测量代码，输出导入耗时和是否加载了tkinter
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "tkinter": "tkinter" in sys.modules}}))
+"""
+
+
+def measure_import(statement):
+    """
+    在新的Python进程中执行导入语句
+
+    参数:
+        statement: 导入语句
+
+    返回:
+        (耗时毫秒数, 是否加载了tkinter)元组
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE.format(statement=statement)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return data["ms"], data["tkinter"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每条导入语句的重复次数")
+    parser.add_argument("--max-ms", type=float, default=0, help="导入耗时上限(毫秒)，0表示不检查")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'导入语句':<45} {'中位数(ms)':>12} {'最小(ms)':>10} {'tkinter':>8}")
+    for statement in IMPORTS:
+        try:
+            samples = [measure_import(statement) for _ in range(max(1, args.repeat))]
+        except subprocess.CalledProcessError as e:
+            print(f"{statement:<45} 导入失败: {e.stderr.strip().splitlines()[-1]}")
+            failed = True
+            continue
+
+        times = [ms for ms, _ in samples]
+        loaded_tk = any(tk for _, tk in samples)
+        median = statistics.median(times)
+        print(f"{statement:<45} {median:>12.1f} {min(times):>10.1f} {'是' if loaded_tk else '否':>8}")
+
+        if loaded_tk or (args.max_ms > 0 and median > args.max_ms):
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
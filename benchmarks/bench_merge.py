@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合并性能基准测试
+
+比较逐个相加(merged += next)与预分配缓冲区合并(merge_segments)
+在不同片段数量下的耗时，用于验证合并耗时随片段数量线性增长
+
+用法:
+    python benchmarks/bench_merge.py [--clip-ms 2000] [--counts 25,50,100,200]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydub import AudioSegment
+from src.core.merge_engine import merge_segments
+
+
+def make_clips(count, clip_ms):
+    """生成指定数量的测试片段"""
+    clip = AudioSegment.silent(duration=clip_ms, frame_rate=44100).set_channels(2)
+    return [clip] * count
+
+
+def merge_by_addition(clips, gaps_ms):
+    """原有的逐个相加合并方式"""
+    merged = clips[0]
+    for i, clip in enumerate(clips[1:], 1):
+        if gaps_ms[i - 1] > 0:
+            merged += AudioSegment.silent(duration=gaps_ms[i - 1], frame_rate=44100)
+        merged += clip
+    return merged
+
+
+def measure(func, *args):
+    """测量函数耗时(秒)"""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合并性能基准测试")
+    parser.add_argument("--clip-ms", type=int, default=2000, help="每个片段的时长(毫秒)")
+    parser.add_argument("--counts", default="25,50,100,200", help="片段数量列表，逗号分隔")
+    args = parser.parse_args()
+
+    counts = [int(c) for c in args.counts.split(",")]
+
+    print(f"{'片段数':>8} {'逐个相加(s)':>14} {'预分配合并(s)':>14} {'每片段(ms)':>12}")
+    for count in counts:
+        clips = make_clips(count, args.clip_ms)
+        gaps_ms = [500] * (count - 1)
+
+        old_time = measure(merge_by_addition, clips, gaps_ms)
+        new_time = measure(merge_segments, clips, gaps_ms)
+
+        print(f"{count:>8} {old_time:>14.3f} {new_time:>14.3f} {new_time / count * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采样格式转换性能基准测试
+
+比较pydub的set_frame_rate/set_channels/set_sample_width与resampler模块
+(快速模式和高质量模式)的吞吐量，单位为每秒输出的采样数(帧数 × 声道数)。
+pydub在没有audioop扩展的Python版本(3.13及以上)中使用纯Python实现，差距会更大
+
+用法:
+    python benchmarks/bench_resampler.py [--seconds 30] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from pydub import AudioSegment
+from src.core.resampler import convert_segment, FAST_MODE, QUALITY_MODE
+from src.core.stream_engine import PcmFormat
+
+
+def make_audio(seconds, frame_rate, channels=2):
+    """生成指定时长的16位测试音频(正弦波加噪声)"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * frame_rate)) / frame_rate
+    mono = 0.4 * np.sin(2 * np.pi * 440 * t) + 0.1 * rng.standard_normal(len(t))
+    samples = np.repeat(mono[:, np.newaxis], channels, axis=1)
+    data = (np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes()
+    return AudioSegment(data=data, sample_width=2, frame_rate=frame_rate, channels=channels)
+
+
+def pydub_convert(audio, fmt):
+    """pydub中依次转换采样位宽、采样率和声道数(与原来的合并流程一致)"""
+    if audio.sample_width != fmt.sample_width:
+        audio = audio.set_sample_width(fmt.sample_width)
+    if audio.frame_rate != fmt.frame_rate:
+        audio = audio.set_frame_rate(fmt.frame_rate)
+    if audio.channels != fmt.channels:
+        audio = audio.set_channels(fmt.channels)
+    return audio
+
+
+# 测试项: (名称, 输入采样率, 输入声道数, 目标格式)
+CASES = [
+    ("22050->44100Hz", 22050, 2, PcmFormat(2, 44100, 2)),
+    ("44100->48000Hz", 44100, 2, PcmFormat(2, 48000, 2)),
+    ("48000->44100Hz", 48000, 2, PcmFormat(2, 44100, 2)),
+    ("单声道->立体声", 44100, 1, PcmFormat(2, 44100, 2)),
+    ("16位->32位", 44100, 2, PcmFormat(4, 44100, 2)),
+    ("单声道22050->立体声48000", 22050, 1, PcmFormat(2, 48000, 2))
+]
+
+
+def measure(func, repeat):
+    """测量函数耗时(秒)并返回结果，耗时取多次运行中的最小值"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="采样格式转换性能基准测试")
+    parser.add_argument("--seconds", type=float, default=30, help="测试音频时长(秒)")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数")
+    args = parser.parse_args()
+
+    print(f"测试音频: {args.seconds:g}秒, 16位; 吞吐量单位: 百万采样/秒")
+    print(f"{'转换':<24} {'pydub':>10} {'快速':>10} {'高质量':>10}")
+    for name, frame_rate, channels, fmt in CASES:
+        audio = make_audio(args.seconds, frame_rate, channels)
+        rates = []
+        for func in (lambda: pydub_convert(audio, fmt),
+                     lambda: convert_segment(audio, fmt, FAST_MODE),
+                     lambda: convert_segment(audio, fmt, QUALITY_MODE)):
+            elapsed, result = measure(func, args.repeat)
+            samples = len(result.raw_data) // result.sample_width
+            rates.append(samples / elapsed / 1e6)
+        print(f"{name:<24} {rates[0]:>10.1f} {rates[1]:>10.1f} {rates[2]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
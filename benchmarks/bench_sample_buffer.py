@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+效果处理性能基准测试
+
+比较pydub的AudioSegment字节串处理与SampleBuffer向量运算
+在增益、淡入淡出、倒放、变速以及连续多个效果时的耗时。
+SampleBuffer的耗时包含与AudioSegment之间的转换
+
+用法:
+    python benchmarks/bench_sample_buffer.py [--seconds 60] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from pydub import AudioSegment
+from src.core.sample_buffer import SampleBuffer
+
+
+def make_audio(seconds, frame_rate=44100):
+    """生成指定时长的立体声16位测试音频(正弦波加噪声)"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * frame_rate)) / frame_rate
+    mono = 0.4 * np.sin(2 * np.pi * 440 * t) + 0.1 * rng.standard_normal(len(t))
+    stereo = np.stack([mono, np.roll(mono, 100)], axis=1)
+    data = (np.clip(stereo, -1, 1) * 32767).astype('<i2').tobytes()
+    return AudioSegment(data=data, sample_width=2, frame_rate=frame_rate, channels=2)
+
+
+def pydub_speed(audio, speed_factor):
+    """原有的变速方式: 修改采样率后重新采样(音调随之改变)"""
+    return audio._spawn(audio.raw_data, overrides={
+        "frame_rate": int(audio.frame_rate * speed_factor)
+    }).set_frame_rate(audio.frame_rate)
+
+
+def pydub_chain(audio):
+    """pydub中连续执行多个效果，每一步都复制一次数据"""
+    return (audio + 3).fade_in(2000).fade_out(2000).reverse()
+
+
+def buffer_chain(audio):
+    """SampleBuffer中连续执行多个效果，只在两端转换"""
+    return SampleBuffer.from_segment(audio).apply_gain(3).fade_in(2000).fade_out(2000).reverse().to_segment()
+
+
+# 测试项: (名称, pydub实现, SampleBuffer实现)
+CASES = [
+    ("增益", lambda a: a + 3, lambda a: SampleBuffer.from_segment(a).apply_gain(3).to_segment()),
+    ("淡入", lambda a: a.fade_in(2000), lambda a: SampleBuffer.from_segment(a).fade_in(2000).to_segment()),
+    ("淡出", lambda a: a.fade_out(2000), lambda a: SampleBuffer.from_segment(a).fade_out(2000).to_segment()),
+    ("倒放", lambda a: a.reverse(), lambda a: SampleBuffer.from_segment(a).reverse().to_segment()),
+    ("变速1.25x", lambda a: pydub_speed(a, 1.25),
+     lambda a: SampleBuffer.from_segment(a).change_speed(1.25).to_segment()),
+    ("效果链(4步)", pydub_chain, buffer_chain)
+]
+
+
+def measure(func, audio, repeat):
+    """测量函数耗时(秒)，取多次运行中的最小值"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(audio)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="效果处理性能基准测试")
+    parser.add_argument("--seconds", type=float, default=60, help="测试音频时长(秒)")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数")
+    args = parser.parse_args()
+
+    audio = make_audio(args.seconds)
+    print(f"测试音频: {args.seconds:g}秒, {audio.frame_rate}Hz, {audio.channels}声道, 16位")
+    print(f"{'操作':<12} {'pydub(s)':>10} {'SampleBuffer(s)':>16} {'加速比':>8}")
+    for name, pydub_func, buffer_func in CASES:
+        old_time = measure(pydub_func, audio, args.repeat)
+        new_time = measure(buffer_func, audio, args.repeat)
+        print(f"{name:<12} {old_time:>10.3f} {new_time:>16.3f} {old_time / new_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
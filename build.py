@@ -36,7 +36,7 @@ def load_app_info():
             "description": "一个简单的音频编辑桌面应用",
             "main_script": "main.py",
             "icon_file": "icon.ico",
-            "dependencies": ["pydub>=0.25.1", "ffmpeg-python>=0.2.0"],
+            "dependencies": ["pydub>=0.25.1", "ffmpeg-python>=0.2.0", "numpy>=1.17"],
             "build_dependencies": ["pyinstaller>=5.6.2", "Pillow>=9.0.0"]
         }
 
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令行批处理入口 - 无需图形界面，对大量音频文件批量执行AudioProcessor操作
+
+用法示例:
+    python -m src.cli "recordings/*.mp3" -o out --op normalize --op fade_in:500 --op fade_out:1000
+    python -m src.cli --manifest files.txt -o out --format wav --op cut:0:60000 --workers 8
+    python -m src.cli "podcast/*.wav" -o out --op normalize --format mp3:192k,flac,m4a:256k
+
+支持的操作(时间单位均为毫秒):
+    cut:开始:结束              剪切指定部分
+    remove_segment:开始:结束   删除指定部分
+    add_silence:位置:时长       在指定位置插入静音
+    adjust_volume:分贝          调整音量
+    normalize[:余量分贝]        音量标准化
+    fade_in:时长                淡入
+    fade_out:时长               淡出
+    change_speed:倍数           改变速度
+    reverse                     倒放
+
+--format可以指定多个以逗号分隔的输出格式(格式[:比特率])，
+每个文件只处理一次，所有格式由同一个ffmpeg进程同时编码
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.core.audio_processor import AudioProcessor
+from src.core.edit_chain import EditChain, OPERATIONS
+
+# 单独执行时可以尝试流复制的操作 -> AudioProcessor方法名
+STREAM_COPY_OPERATIONS = {
+    "cut": "cut_audio",
+    "remove_segment": "remove_segment"
+}
+
+
+def parse_operation(spec):
+    """
+    解析操作描述，例如 "cut:1000:5000"
+
+    参数:
+        spec: 操作描述字符串
+
+    返回:
+        (操作名称, 参数列表)元组
+    """
+    parts = spec.split(":")
+    name, args = parts[0], parts[1:]
+    if name not in OPERATIONS:
+        raise argparse.ArgumentTypeError(f"未知操作: {name}")
+
+    spec = OPERATIONS[name]
+    required = len(spec.params) - spec.optional
+    if not required <= len(args) <= len(spec.params):
+        raise argparse.ArgumentTypeError(f"操作{name}需要{required}个参数: {spec}")
+
+    try:
+        values = [float(arg) for arg in args]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"操作参数必须是数字: {spec}")
+    # 整数值保持为int，避免毫秒位置出现浮点数
+    values = [int(value) if value.is_integer() else value for value in values]
+    return name, values
+
+
+def parse_formats(spec):
+    """
+    解析输出格式列表，例如 "mp3:320k,flac,m4a"
+
+    参数:
+        spec: 以逗号分隔的输出格式，每项可带比特率(格式:比特率)
+
+    返回:
+        (格式, 比特率)元组列表，未指定比特率时为None
+    """
+    formats = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        output_format, _, bitrate = item.partition(":")
+        output_format = output_format.lower().strip(".")
+        if not output_format:
+            raise argparse.ArgumentTypeError(f"无效的输出格式: {spec}")
+        if any(existing == output_format for existing, _ in formats):
+            raise argparse.ArgumentTypeError(f"输出格式重复: {output_format}")
+        formats.append((output_format, bitrate or None))
+    if not formats:
+        raise argparse.ArgumentTypeError(f"无效的输出格式: {spec}")
+    return formats
+
+
+def collect_inputs(patterns, manifest=None):
+    """
+    根据通配符和清单文件收集输入文件，去除重复项并保持顺序
+
+    参数:
+        patterns: 通配符或文件路径列表
+        manifest: 清单文件路径，每行一个文件路径，#开头为注释
+
+    返回:
+        输入文件路径列表
+    """
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        paths.extend(matches if matches else [pattern])
+
+    if manifest:
+        with open(manifest, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    paths.append(line)
+
+    seen = set()
+    unique_paths = []
+    for path in paths:
+        if path not in seen and os.path.isfile(path):
+            seen.add(path)
+            unique_paths.append(path)
+    return unique_paths
+
+
+def get_output_path(input_path, output_dir, output_format=None, suffix=""):
+    """
+    根据输入文件生成输出文件路径
+
+    参数:
+        input_path: 输入文件路径
+        output_dir: 输出目录
+        output_format: 输出格式，None表示与输入相同
+        suffix: 添加在文件名后的后缀
+
+    返回:
+        输出文件路径
+    """
+    stem, ext = os.path.splitext(os.path.basename(input_path))
+    if output_format:
+        ext = "." + output_format.lower().strip(".")
+    return os.path.join(output_dir, f"{stem}{suffix}{ext}")
+
+
+def apply_operations(input_path, outputs, operations):
+    """
+    对单个文件执行操作链
+
+    整条操作链只解码一次、编码一次，不再为每一步写出中间文件；
+    有多个输出时处理结果只生成一次，由同一个ffmpeg进程编码为全部格式
+
+    参数:
+        input_path: 输入文件路径
+        outputs: (输出文件路径, 比特率)元组列表
+        operations: (操作名称, 参数列表)元组列表
+    """
+    if len(operations) == 1 and len(outputs) == 1 and not outputs[0][1]:
+        name, args = operations[0]
+        if name in STREAM_COPY_OPERATIONS:
+            # 单独的剪切/删除在格式一致时可以流复制，不重新编码
+            method = getattr(AudioProcessor, STREAM_COPY_OPERATIONS[name])
+            method(input_path, outputs[0][0], *args)
+            return
+
+    EditChain(operations).render(input_path, outputs)
+
+
+def process_file(job):
+    """
+    处理单个文件(在工作进程中执行)
+
+    参数:
+        job: (输入路径, 输出列表, 操作列表)元组，输出列表为(输出路径, 比特率)元组列表
+
+    返回:
+        (输入路径, 输出路径列表, 耗时秒数, 错误信息)元组，成功时错误信息为None
+    """
+    input_path, outputs, operations = job
+    output_paths = [path for path, _ in outputs]
+    start = time.perf_counter()
+    try:
+        apply_operations(input_path, outputs, operations)
+        return input_path, output_paths, time.perf_counter() - start, None
+    except Exception as e:
+        return input_path, output_paths, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
+def run_batch(jobs, workers):
+    """
+    使用进程池批量处理文件，并输出每个文件的耗时和错误
+
+    参数:
+        jobs: process_file的参数列表
+        workers: 工作进程数
+
+    返回:
+        失败的文件数
+    """
+    failures = 0
+    total_start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_file, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            input_path, output_paths, elapsed, error = future.result()
+            if error:
+                failures += 1
+                print(f"[{done}/{len(jobs)}] 失败 {input_path} ({elapsed:.2f}s): {error}", file=sys.stderr)
+            else:
+                print(f"[{done}/{len(jobs)}] 完成 {input_path} -> {', '.join(output_paths)} ({elapsed:.2f}s)")
+
+    total_elapsed = time.perf_counter() - total_start
+    print(f"共处理 {len(jobs)} 个文件，成功 {len(jobs) - failures} 个，失败 {failures} 个，总耗时 {total_elapsed:.2f}s")
+    return failures
+
+
+def build_parser():
+    """
+    创建命令行参数解析器
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="简易音频编辑器 - 命令行批处理",
+        epilog="支持的操作: " + ", ".join(OPERATIONS.keys())
+    )
+    parser.add_argument("inputs", nargs="*", help="输入文件或通配符(如 'audio/**/*.mp3')")
+    parser.add_argument("--manifest", help="清单文件，每行一个输入文件路径")
+    parser.add_argument("-o", "--output-dir", required=True, help="输出目录")
+    parser.add_argument("--op", dest="operations", action="append", type=parse_operation, default=[],
+                        help="要执行的操作，可多次指定，按顺序执行(例如 --op fade_in:500)")
+    parser.add_argument("--format", dest="output_formats", type=parse_formats, default=[(None, None)],
+                        help="输出格式(默认与输入相同)，可用逗号分隔多个格式并指定比特率(例如 mp3:320k,flac)")
+    parser.add_argument("--suffix", default="", help="输出文件名后缀")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并行工作进程数")
+    parser.add_argument("--overwrite", action="store_true", help="覆盖已存在的输出文件")
+    return parser
+
+
+def main(argv=None):
+    """
+    命令行入口函数
+
+    返回:
+        退出码，全部成功时为0
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.inputs, args.manifest)
+    if not inputs:
+        parser.error("没有找到输入文件")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = []
+    planned_outputs = set()
+    skipped = 0
+    for input_path in inputs:
+        outputs = [
+            (get_output_path(input_path, args.output_dir, output_format, args.suffix), bitrate)
+            for output_format, bitrate in args.output_formats
+        ]
+        output_paths = [path for path, _ in outputs]
+        if any(path in planned_outputs for path in output_paths):
+            print(f"跳过 {input_path}: 与其他输入文件的输出文件名相同", file=sys.stderr)
+            skipped += 1
+            continue
+        if any(os.path.abspath(path) == os.path.abspath(input_path) for path in output_paths):
+            print(f"跳过 {input_path}: 输出文件与输入文件相同", file=sys.stderr)
+            skipped += 1
+            continue
+        if any(os.path.exists(path) for path in output_paths) and not args.overwrite:
+            print(f"跳过 {input_path}: 输出文件已存在(使用--overwrite覆盖)", file=sys.stderr)
+            skipped += 1
+            continue
+        planned_outputs.update(output_paths)
+        jobs.append((input_path, outputs, args.operations))
+
+    if not jobs:
+        return 1 if skipped else 0
+
+    failures = run_batch(jobs, max(1, args.workers))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,21 @@
-from .audio_processor import AudioProcessor 
\ No newline at end of file
+# 按需导入子模块，只使用部分核心功能时不必加载全部依赖
+_EXPORTS = {
+    "AudioProcessor": ".audio_processor",
+    "probe_audio": ".audio_probe",
+    "AudioSession": ".audio_session",
+    "AudioHandle": ".audio_session"
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """
+    首次访问导出名称时再导入对应的子模块
+    """
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,273 @@
+import os
+import struct
+import subprocess
+import json
+
+from pydub import AudioSegment
+
+
+# WAV fmt块中的格式码与编解码器名称的对应关系
+WAV_FORMAT_TAGS = {
+    0x0001: 'pcm',
+    0x0003: 'pcm_f',
+    0x0006: 'pcm_alaw',
+    0x0007: 'pcm_mulaw',
+    0xFFFE: 'extensible'
+}
+
+
+def probe_audio(file_path):
+    """
+    获取音频文件的元数据，不解码音频样本
+
+    依次尝试: WAV/FLAC文件头解析 -> ffprobe容器探测 -> 完整解码(备用)
+
+    参数:
+        file_path: 音频文件路径
+
+    返回:
+        字典，包含duration_ms(毫秒)、sample_rate、channels(ffprobe未给出时为None)、codec_name、
+        sample_width(采样位宽，字节，有损编码等未知时为None)以及source(信息来源: header/ffprobe/decode)
+    """
+    ext = os.path.splitext(file_path)[1].lower().strip('.')
+
+    info = None
+    try:
+        if ext == 'wav':
+            info = _probe_wav_header(file_path)
+        elif ext == 'flac':
+            info = _probe_flac_header(file_path)
+    except Exception as e:
+        print(f"解析音频文件头时出错: {str(e)}")
+        info = None
+
+    if info is None:
+        info = _probe_with_ffprobe(file_path)
+
+    if info is None:
+        info = _probe_with_decode(file_path)
+
+    return info
+
+
+def estimate_decoded_bytes(info):
+    """
+    根据元数据估算解码后PCM数据的大小，按16位采样计算
+
+    参数:
+        info: probe_audio返回的元数据字典
+
+    返回:
+        字节数，采样率或声道数未知时返回None(调用方应按大文件处理)
+    """
+    if not info.get('sample_rate') or not info.get('channels'):
+        return None
+    return int(info['duration_ms'] / 1000.0 * info['sample_rate'] * info['channels'] * 2)
+
+
+def _probe_wav_header(file_path):
+    """
+    解析WAV文件头(RIFF/RF64)
+
+    参数:
+        file_path: WAV文件路径
+
+    返回:
+        元数据字典，无法解析时返回None
+    """
+    file_size = os.path.getsize(file_path)
+
+    with open(file_path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[8:12] != b'WAVE' or riff[0:4] not in (b'RIFF', b'RF64'):
+            return None
+
+        fmt = None
+        data_size = None
+        data_offset = None
+        rf64_data_size = None
+
+        # 遍历所有块，直到找到fmt和data块
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+
+            if chunk_id == b'ds64':
+                # RF64格式的64位长度信息
+                ds64 = f.read(chunk_size)
+                if len(ds64) >= 16:
+                    rf64_data_size = struct.unpack('<Q', ds64[8:16])[0]
+            elif chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+            elif chunk_id == b'data':
+                data_offset = f.tell()
+                data_size = chunk_size
+                break
+            else:
+                f.seek(chunk_size, os.SEEK_CUR)
+
+            # 块长度为奇数时有一个填充字节
+            if chunk_size % 2 == 1 and chunk_id != b'data':
+                f.seek(1, os.SEEK_CUR)
+
+    if fmt is None or len(fmt) < 16 or data_offset is None:
+        return None
+
+    format_tag, channels, sample_rate, byte_rate, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if format_tag == 0xFFFE and len(fmt) >= 26:
+        # WAVE_FORMAT_EXTENSIBLE，真实格式码位于子格式GUID的前两个字节
+        format_tag = struct.unpack('<H', fmt[24:26])[0]
+
+    if byte_rate == 0 or block_align == 0:
+        return None
+
+    # 长度未知(流式写入)或RF64时，根据文件实际大小推算
+    if rf64_data_size is not None and data_size == 0xFFFFFFFF:
+        data_size = rf64_data_size
+    if data_size in (0, 0xFFFFFFFF) or data_offset + data_size > file_size:
+        data_size = file_size - data_offset
+
+    frames = data_size // block_align
+    codec = WAV_FORMAT_TAGS.get(format_tag, 'unknown')
+    if codec == 'pcm':
+        codec = f"pcm_{'u8' if bits == 8 else f's{bits}le'}"
+    elif codec == 'pcm_f':
+        codec = f"pcm_f{bits}le"
+
+    return {
+        'duration_ms': frames * 1000.0 / sample_rate,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'codec_name': codec,
+        'sample_width': (bits + 7) // 8 or None,
+        'source': 'header'
+    }
+
+
+def _probe_flac_header(file_path):
+    """
+    解析FLAC文件的STREAMINFO元数据块
+
+    参数:
+        file_path: FLAC文件路径
+
+    返回:
+        元数据字典，无法解析或总样本数未知时返回None
+    """
+    with open(file_path, 'rb') as f:
+        magic = f.read(4)
+
+        # 跳过可能存在的ID3v2标签
+        if magic[:3] == b'ID3':
+            rest = f.read(6)
+            size_bytes = rest[2:6]
+            tag_size = 0
+            for b in size_bytes:
+                tag_size = (tag_size << 7) | (b & 0x7F)
+            f.seek(10 + tag_size)
+            magic = f.read(4)
+
+        if magic != b'fLaC':
+            return None
+
+        # 第一个元数据块必须是STREAMINFO
+        block_header = f.read(4)
+        if len(block_header) < 4 or (block_header[0] & 0x7F) != 0:
+            return None
+
+        streaminfo = f.read(34)
+        if len(streaminfo) < 34:
+            return None
+
+    # 采样率(20位)、声道数(3位)、位深(5位)、总样本数(36位)打包在第10-17字节
+    packed = int.from_bytes(streaminfo[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & 0xFFFFFFFFF
+
+    if sample_rate == 0 or total_samples == 0:
+        return None
+
+    return {
+        'duration_ms': total_samples * 1000.0 / sample_rate,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'codec_name': 'flac',
+        'sample_width': (bits + 7) // 8,
+        'source': 'header'
+    }
+
+
+def _probe_with_ffprobe(file_path):
+    """
+    使用ffprobe读取容器和音频流信息
+
+    参数:
+        file_path: 音频文件路径
+
+    返回:
+        元数据字典，失败时返回None
+    """
+    try:
+        cmd = [
+            "ffprobe",
+            "-v", "quiet",
+            "-print_format", "json",
+            "-show_format",
+            "-show_streams",
+            "-select_streams", "a:0",
+            file_path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        data = json.loads(result.stdout)
+
+        streams = data.get('streams') or []
+        if not streams:
+            return None
+        stream = streams[0]
+
+        # 优先使用流时长，缺失时使用容器时长
+        duration = stream.get('duration') or data.get('format', {}).get('duration')
+        if duration is None:
+            return None
+
+        # 无损编码给出bits_per_raw_sample，PCM给出bits_per_sample，有损编码两者都为0或缺失
+        bits = int(stream.get('bits_per_raw_sample') or stream.get('bits_per_sample') or 0)
+
+        return {
+            'duration_ms': float(duration) * 1000.0,
+            # 缺失的采样率和声道数记为None而不是0，避免被估算为很小的文件
+            'sample_rate': int(stream.get('sample_rate') or 0) or None,
+            'channels': int(stream.get('channels') or 0) or None,
+            'codec_name': stream.get('codec_name', 'unknown'),
+            'sample_width': (bits + 7) // 8 or None,
+            'source': 'ffprobe'
+        }
+    except Exception as e:
+        print(f"使用ffprobe获取音频信息时出错: {str(e)}")
+        return None
+
+
+def _probe_with_decode(file_path):
+    """
+    完整解码音频文件以获取信息(最慢的备用方法)
+
+    参数:
+        file_path: 音频文件路径
+
+    返回:
+        元数据字典
+    """
+    ext = os.path.splitext(file_path)[1].lower().strip('.')
+    audio = AudioSegment.from_file(file_path, format=ext)
+    return {
+        'duration_ms': float(len(audio)),
+        'sample_rate': audio.frame_rate,
+        'channels': audio.channels,
+        'codec_name': 'unknown',
+        'sample_width': audio.sample_width,
+        'source': 'decode'
+    }
@@ -1,8 +1,96 @@
-from pydub import AudioSegment
+from pydub import AudioSegment, effects
 import os
 import subprocess
-import tempfile
 import json
+import shutil
+import logging
+import functools
+import math
+import threading
+
+from .decode_cache import (
+    UNCACHED_FORMATS,
+    file_identity_key,
+    is_cache_enabled,
+    get_cached_audio,
+    put_cached_audio
+)
+from .audio_session import AudioHandle
+from .audio_probe import probe_audio, estimate_decoded_bytes
+from .stream_engine import (
+    open_pcm_stream,
+    read_pcm_range,
+    write_pcm_stream,
+    write_pcm_stream_multi,
+    skip_range,
+    insert_silence,
+    apply_gain,
+    apply_fade,
+    apply_time_stretch,
+    segment_to_stream,
+    track_progress,
+    snapshot_mtimes,
+    remove_changed_files,
+    PcmStream
+)
+from .merge_engine import merge_segments
+from .playback import get_playback_engine
+from .scratch import get_scratch_area, ScratchQuotaExceeded
+from .preview_cache import get_preview_cache, source_duration_ms
+from .sample_buffer import SampleBuffer
+from .parallel import parallel_map
+from .progress import (
+    OperationCancelled,
+    check_cancelled,
+    report_progress,
+    scale_progress,
+    run_ffmpeg
+)
+from src.utils.config import get_config_value
+
+# 可以通过流复制(不重新编码)进行剪切和合并的有损格式
+# WAV/FLAC重新编码无损且能按采样精确剪切，不使用流复制
+STREAM_COPY_FORMATS = ['mp3', 'aac', 'm4a', 'ogg']
+
+# 在内存中处理时，解码阶段在总进度中所占的比例(其余为编码阶段)
+DECODE_PROGRESS_SHARE = 0.5
+
+# 最近一次流式预览解码到临时文件的PCM数据: (来源标识, ScratchEntry, PcmFormat)
+# 再次预览同一范围时直接复用，换成其他预览时释放
+_preview_spool = None
+_preview_spool_lock = threading.Lock()
+
+
+def _remove_output_on_failure(func, returns_success=False):
+    """
+    装饰器: 操作失败或被取消时删除本次写入了一部分的输出文件
+
+    被装饰函数的第二个参数(或output_path关键字参数)为输出文件路径；
+    returns_success为True时，被装饰函数返回False(表示操作失败)也删除输出文件
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        output_path = kwargs.get('output_path', args[1] if len(args) > 1 else None)
+        before = snapshot_mtimes([output_path])
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            # 只删除本次操作写入过的文件，不影响原本就存在且未被改动的文件
+            remove_changed_files([output_path], before)
+            raise
+        if returns_success and result is False:
+            remove_changed_files([output_path], before)
+        return result
+    return wrapper
+
+
+def _remove_output_unless_successful(func):
+    """
+    装饰器: 与_remove_output_on_failure相同，被装饰函数返回False时也删除本次写入的输出文件
+    (用于以返回值表示是否成功的函数，失败时不会留下写了一半的文件)
+    """
+    return _remove_output_on_failure(func, returns_success=True)
+
 
 class AudioProcessor:
     """
@@ -12,17 +100,107 @@ class AudioProcessor:
     @staticmethod
     def load_audio(file_path):
         """
-        加载音频文件
+        加载音频文件，优先从解码缓存中读取
         
         参数:
-            file_path: 音频文件路径
+            file_path: 音频文件路径、AudioHandle或AudioSegment对象
             
         返回:
             AudioSegment对象
         """
+        # 已解码的音频或会话中共享的句柄直接使用
+        if isinstance(file_path, AudioSegment):
+            return file_path
+        if isinstance(file_path, AudioHandle):
+            return file_path.audio
+        
         # 根据文件扩展名判断格式
         ext = os.path.splitext(file_path)[1].lower().strip('.')
-        return AudioSegment.from_file(file_path, format=ext)
+        use_cache = ext not in UNCACHED_FORMATS and is_cache_enabled()
+        
+        if use_cache:
+            audio = get_cached_audio(file_path)
+            if audio is not None:
+                return audio
+        
+        audio = AudioSegment.from_file(file_path, format=ext)
+        
+        if use_cache:
+            put_cached_audio(file_path, audio)
+        return audio
+    
+    @staticmethod
+    def load_audio_range(source, start_ms=0, end_ms=None):
+        """
+        加载音频的指定时间范围
+        
+        已在内存中的音频直接截取，否则只解码所需范围，
+        耗时与范围长度成正比，与文件长度无关
+        
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            start_ms: 开始时间(毫秒)
+            end_ms: 结束时间(毫秒)，None表示到结尾
+            
+        返回:
+            AudioSegment对象
+        """
+        audio = AudioProcessor._get_resident_audio(source)
+        if audio is not None:
+            return audio[start_ms:end_ms]
+        
+        path = source.path if isinstance(source, AudioHandle) else source
+        duration_ms = end_ms - start_ms if end_ms is not None else None
+        return read_pcm_range(path, start_ms, duration_ms)
+    
+    @staticmethod
+    def _get_resident_audio(source):
+        """
+        获取已在内存中的音频，不触发解码
+        
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            
+        返回:
+            AudioSegment对象，不在内存中时返回None
+        """
+        if isinstance(source, AudioSegment):
+            return source
+        if isinstance(source, AudioHandle) and source.is_loaded:
+            return source.audio
+        return None
+    
+    @staticmethod
+    def _get_streaming_path(source):
+        """
+        判断是否需要对输入使用流式处理
+        
+        解码后的大小超过streaming_threshold_mb(或无法估算)且尚未常驻内存的文件，
+        按数据块流式处理，避免将整个文件载入内存
+        
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            
+        返回:
+            需要流式处理时返回文件路径，否则返回None
+        """
+        if isinstance(source, AudioSegment):
+            return None
+        
+        if isinstance(source, AudioHandle):
+            if source.is_loaded:
+                return None
+            path = source.path
+            estimated = source.estimated_bytes
+        else:
+            path = source
+            try:
+                estimated = estimate_decoded_bytes(probe_audio(path))
+            except Exception:
+                return None
+        
+        threshold = int(get_config_value("streaming_threshold_mb", 512)) * 1024 * 1024
+        return path if estimated is None or estimated > threshold else None
     
     @staticmethod
     def save_audio(audio, output_path):
@@ -36,184 +214,410 @@ class AudioProcessor:
         # 获取文件扩展名作为格式
         ext = os.path.splitext(output_path)[1].lower().strip('.')
         audio.export(output_path, format=ext)
+    
+    @staticmethod
+    def _load_audio_tracked(source, progress=None, cancel_token=None):
+        """
+        加载音频，加载前后检查取消请求，完成后报告解码阶段的进度
         
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            progress: 进度回调函数
+            cancel_token: CancellationToken对象
+            
+        返回:
+            AudioSegment对象
+        """
+        check_cancelled(cancel_token)
+        audio = AudioProcessor.load_audio(source)
+        check_cancelled(cancel_token)
+        report_progress(progress, DECODE_PROGRESS_SHARE)
+        return audio
+    
     @staticmethod
-    def reverse_audio(input_path, output_path):
+    def _save_audio_tracked(audio, output_path, progress=None, cancel_token=None, start=DECODE_PROGRESS_SHARE):
+        """
+        保存音频文件，需要进度或取消时按数据块编码
+        
+        参数:
+            audio: AudioSegment对象
+            output_path: 输出文件路径
+            progress: 进度回调函数
+            cancel_token: CancellationToken对象
+            start: 编码开始时的总进度
+        """
+        # 8位音频在pydub内部为有符号数据，仍交给pydub导出
+        if (progress is None and cancel_token is None) or audio.sample_width == 1:
+            check_cancelled(cancel_token)
+            AudioProcessor.save_audio(audio, output_path)
+            report_progress(progress, 1.0)
+            return
+        
+        stream = track_progress(segment_to_stream(audio), scale_progress(progress, start, 1.0), cancel_token)
+        write_pcm_stream(stream, output_path)
+        
+    @staticmethod
+    def export_multi(source, outputs, progress=None, cancel_token=None):
+        """
+        将同一个处理结果一次性导出为多种格式/比特率
+        
+        只解码一次，PCM数据只生成一次: WAV输出直接写入，
+        其他输出由同一个ffmpeg进程同时编码，避免为每种格式重复加载和处理
+        
+        参数:
+            source: 处理结果(AudioSegment或PcmStream对象)，或音频文件路径、AudioHandle
+            outputs: 输出列表，每项为输出文件路径或(输出文件路径, 比特率)元组，
+                    格式由扩展名决定，比特率为None时使用编码器的默认值
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作(失败或取消时删除已写入了一部分的输出文件)
+        """
+        targets = [(output, None) if isinstance(output, str) else tuple(output) for output in outputs]
+        if not targets:
+            return
+        
+        paths = [path for path, _ in targets]
+        before = snapshot_mtimes(paths)
+        try:
+            streaming_path = None if isinstance(source, PcmStream) else AudioProcessor._get_streaming_path(source)
+            if isinstance(source, PcmStream):
+                stream = track_progress(source, progress, cancel_token)
+            elif streaming_path:
+                # 大文件逐块解码，同时写入全部输出
+                stream = track_progress(open_pcm_stream(streaming_path), progress, cancel_token)
+            else:
+                audio = AudioProcessor._load_audio_tracked(source, progress, cancel_token)
+                stream = track_progress(
+                    segment_to_stream(audio),
+                    scale_progress(progress, DECODE_PROGRESS_SHARE, 1.0),
+                    cancel_token
+                )
+            write_pcm_stream_multi(stream, targets)
+            report_progress(progress, 1.0)
+        except BaseException:
+            # 解码或编码失败、被取消时都删除写了一半的输出
+            remove_changed_files(paths, before)
+            raise
+        
+    @staticmethod
+    @_remove_output_on_failure
+    def reverse_audio(input_path, output_path, progress=None, cancel_token=None):
         """
         倒放音频
         
         参数:
-            input_path: 输入文件路径
+            input_path: 输入文件路径或AudioHandle
             output_path: 输出文件路径
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
         """
-        audio = AudioProcessor.load_audio(input_path)
-        reversed_audio = audio.reverse()
-        AudioProcessor.save_audio(reversed_audio, output_path)
+        audio = AudioProcessor._load_audio_tracked(input_path, progress, cancel_token)
+        reversed_audio = SampleBuffer.from_segment(audio).reverse().to_segment()
+        AudioProcessor._save_audio_tracked(reversed_audio, output_path, progress, cancel_token)
     
     @staticmethod
-    def cut_audio(input_path, output_path, start_ms, end_ms):
+    @_remove_output_on_failure
+    def cut_audio(input_path, output_path, start_ms, end_ms, stream_copy=True, progress=None, cancel_token=None):
         """
         剪切音频的指定部分
         
         参数:
-            input_path: 输入文件路径
+            input_path: 输入文件路径或AudioHandle
             output_path: 输出文件路径
             start_ms: 开始时间(毫秒)
             end_ms: 结束时间(毫秒)
+            stream_copy: 输入输出格式一致时是否尝试流复制(按编码帧对齐，不重新编码)
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+            
+        返回:
+            bool: 是否使用了流复制，False表示进行了重新编码
         """
-        audio = AudioProcessor.load_audio(input_path)
-        cut_audio = audio[start_ms:end_ms]
-        AudioProcessor.save_audio(cut_audio, output_path)
+        if stream_copy:
+            paths = AudioProcessor._get_stream_copy_paths([input_path], output_path)
+            if paths and AudioProcessor._stream_copy_cut(paths[0], output_path, start_ms, end_ms,
+                                                         progress=progress, cancel_token=cancel_token):
+                return True
+        
+        stream_path = AudioProcessor._get_streaming_path(input_path)
+        if stream_path:
+            # 从开始时间定位解码，并逐块写出
+            stream = open_pcm_stream(stream_path, start_ms=start_ms, duration_ms=end_ms - start_ms)
+            write_pcm_stream(track_progress(stream, progress, cancel_token), output_path)
+            return False
+        
+        check_cancelled(cancel_token)
+        cut_audio = AudioProcessor.load_audio_range(input_path, start_ms, end_ms)
+        report_progress(progress, DECODE_PROGRESS_SHARE)
+        AudioProcessor._save_audio_tracked(cut_audio, output_path, progress, cancel_token)
+        return False
     
     @staticmethod
-    def remove_segment(input_path, output_path, start_ms, end_ms):
+    @_remove_output_on_failure
+    def remove_segment(input_path, output_path, start_ms, end_ms, stream_copy=True, progress=None, cancel_token=None):
         """
         从音频中删除一段
         
         参数:
-            input_path: 输入文件路径
+            input_path: 输入文件路径或AudioHandle
             output_path: 输出文件路径
             start_ms: 要删除部分的开始时间(毫秒)
             end_ms: 要删除部分的结束时间(毫秒)
+            stream_copy: 输入输出格式一致时是否尝试流复制(按编码帧对齐，不重新编码)
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+            
+        返回:
+            bool: 是否使用了流复制，False表示进行了重新编码
         """
-        audio = AudioProcessor.load_audio(input_path)
+        if stream_copy:
+            paths = AudioProcessor._get_stream_copy_paths([input_path], output_path)
+            if paths and AudioProcessor._stream_copy_remove(paths[0], output_path, start_ms, end_ms,
+                                                            progress=progress, cancel_token=cancel_token):
+                return True
+        
+        stream_path = AudioProcessor._get_streaming_path(input_path)
+        if stream_path:
+            stream = track_progress(open_pcm_stream(stream_path), progress, cancel_token)
+            write_pcm_stream(skip_range(stream, start_ms, end_ms), output_path)
+            return False
+        
+        audio = AudioProcessor._load_audio_tracked(input_path, progress, cancel_token)
         # 保留删除部分前后的音频并合并
         first_part = audio[:start_ms]
         second_part = audio[end_ms:]
         result_audio = first_part + second_part
-        AudioProcessor.save_audio(result_audio, output_path)
+        AudioProcessor._save_audio_tracked(result_audio, output_path, progress, cancel_token)
+        return False
     
     @staticmethod
-    def merge_audios(input_paths, output_path):
+    @_remove_output_on_failure
+    def merge_audios(input_paths, output_path, stream_copy=True, progress=None, cancel_token=None):
         """
         合并多个音频文件
         
         参数:
             input_paths: 输入文件路径列表
             output_path: 输出文件路径
-        """
-        if not input_paths:
-            return
+            stream_copy: 所有输入与输出格式一致时是否尝试流复制拼接(不重新编码)
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
             
-        # 加载第一个音频作为基础
-        merged_audio = AudioProcessor.load_audio(input_paths[0])
-        
-        # 依次合并其他音频
-        for path in input_paths[1:]:
-            next_audio = AudioProcessor.load_audio(path)
-            merged_audio += next_audio
-            
-        AudioProcessor.save_audio(merged_audio, output_path)
+        返回:
+            bool: 是否使用了流复制，False表示进行了重新编码
+        """
+        return AudioProcessor.merge_audios_with_gaps(
+            input_paths, output_path, None, stream_copy, progress=progress, cancel_token=cancel_token
+        )
     
     @staticmethod
-    def adjust_volume(input_path, output_path, volume_db):
+    @_remove_output_on_failure
+    def adjust_volume(input_path, output_path, volume_db, progress=None, cancel_token=None):
         """
         调整音频音量
         
         参数:
-            input_path: 输入文件路径
+            input_path: 输入文件路径或AudioHandle
             output_path: 输出文件路径
             volume_db: 音量调整值(分贝)，正值增加音量，负值降低音量
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+        """
+        stream_path = AudioProcessor._get_streaming_path(input_path)
+        if stream_path:
+            stream = track_progress(open_pcm_stream(stream_path), progress, cancel_token)
+            write_pcm_stream(apply_gain(stream, volume_db), output_path)
+            return
+        
+        audio = AudioProcessor._load_audio_tracked(input_path, progress, cancel_token)
+        adjusted_audio = SampleBuffer.from_segment(audio).apply_gain(volume_db).to_segment()
+        AudioProcessor._save_audio_tracked(adjusted_audio, output_path, progress, cancel_token)
+    
+    @staticmethod
+    @_remove_output_on_failure
+    def normalize_audio(input_path, output_path, headroom_db=0.1, progress=None, cancel_token=None):
+        """
+        音量标准化，将峰值调整到接近满幅
+        
+        参数:
+            input_path: 输入文件路径或AudioHandle
+            output_path: 输出文件路径
+            headroom_db: 峰值与满幅之间保留的余量(分贝)
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
         """
-        audio = AudioProcessor.load_audio(input_path)
-        adjusted_audio = audio + volume_db  # pydub中可以直接用+/-来调整分贝
-        AudioProcessor.save_audio(adjusted_audio, output_path)
+        audio = AudioProcessor._load_audio_tracked(input_path, progress, cancel_token)
+        normalized_audio = effects.normalize(audio, headroom=headroom_db)
+        AudioProcessor._save_audio_tracked(normalized_audio, output_path, progress, cancel_token)
     
     @staticmethod
-    def change_speed(input_path, output_path, speed_factor):
+    @_remove_output_on_failure
+    def change_speed(input_path, output_path, speed_factor, progress=None, cancel_token=None):
         """
         改变音频速度（不改变音调）
         
         参数:
-            input_path: 输入文件路径
+            input_path: 输入文件路径或AudioHandle
             output_path: 输出文件路径
             speed_factor: 速度因子，>1加速，<1减速
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+        """
+        stream_path = AudioProcessor._get_streaming_path(input_path)
+        if stream_path:
+            stream = track_progress(open_pcm_stream(stream_path), progress, cancel_token)
+            write_pcm_stream(apply_time_stretch(stream, speed_factor), output_path)
+            return
+        
+        audio = AudioProcessor._load_audio_tracked(input_path, progress, cancel_token)
+        adjusted_audio = AudioProcessor._change_speed_segment(audio, speed_factor)
+        AudioProcessor._save_audio_tracked(adjusted_audio, output_path, progress, cancel_token)
+    
+    @staticmethod
+    def _change_speed_segment(audio, speed_factor):
+        """
+        改变内存中音频的速度
+        
+        参数:
+            audio: AudioSegment对象
+            speed_factor: 速度因子，>1加速，<1减速
+            
+        返回:
+            处理后的AudioSegment对象
         """
-        audio = AudioProcessor.load_audio(input_path)
-        # 通过修改采样率来改变速度
-        adjusted_audio = audio._spawn(audio.raw_data, overrides={
-            "frame_rate": int(audio.frame_rate * speed_factor)
-        }).set_frame_rate(audio.frame_rate)
-        AudioProcessor.save_audio(adjusted_audio, output_path)
+        # WSOLA变速，音调和采样率保持不变
+        return SampleBuffer.from_segment(audio).change_speed(speed_factor).to_segment()
     
     @staticmethod
-    def fade_in(input_path, output_path, fade_ms):
+    @_remove_output_on_failure
+    def fade_in(input_path, output_path, fade_ms, progress=None, cancel_token=None):
         """
         添加淡入效果
         
         参数:
-            input_path: 输入文件路径
+            input_path: 输入文件路径或AudioHandle
             output_path: 输出文件路径
             fade_ms: 淡入时长(毫秒)
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
         """
-        audio = AudioProcessor.load_audio(input_path)
-        faded_audio = audio.fade_in(fade_ms)
-        AudioProcessor.save_audio(faded_audio, output_path)
+        stream_path = AudioProcessor._get_streaming_path(input_path)
+        if stream_path:
+            stream = track_progress(open_pcm_stream(stream_path), progress, cancel_token)
+            write_pcm_stream(apply_fade(stream, fade_ms, fade_in=True), output_path)
+            return
+        
+        audio = AudioProcessor._load_audio_tracked(input_path, progress, cancel_token)
+        faded_audio = SampleBuffer.from_segment(audio).fade_in(fade_ms).to_segment()
+        AudioProcessor._save_audio_tracked(faded_audio, output_path, progress, cancel_token)
     
     @staticmethod
-    def fade_out(input_path, output_path, fade_ms):
+    @_remove_output_on_failure
+    def fade_out(input_path, output_path, fade_ms, progress=None, cancel_token=None):
         """
         添加淡出效果
         
         参数:
-            input_path: 输入文件路径
+            input_path: 输入文件路径或AudioHandle
             output_path: 输出文件路径
             fade_ms: 淡出时长(毫秒)
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
         """
-        audio = AudioProcessor.load_audio(input_path)
-        faded_audio = audio.fade_out(fade_ms)
-        AudioProcessor.save_audio(faded_audio, output_path)
+        stream_path = AudioProcessor._get_streaming_path(input_path)
+        if stream_path:
+            stream = track_progress(open_pcm_stream(stream_path), progress, cancel_token)
+            write_pcm_stream(apply_fade(stream, fade_ms, fade_in=False), output_path)
+            return
+        
+        audio = AudioProcessor._load_audio_tracked(input_path, progress, cancel_token)
+        faded_audio = SampleBuffer.from_segment(audio).fade_out(fade_ms).to_segment()
+        AudioProcessor._save_audio_tracked(faded_audio, output_path, progress, cancel_token)
         
     @staticmethod
-    def preview_audio(audio_data_or_path, start_ms=0, duration_ms=None):
+    def preview_audio(audio_data_or_path, start_ms=0, duration_ms=None, loop=False):
         """
-        预览音频片段
+        预览音频片段，直接从内存播放，正在播放的预览会先停止
         
         参数:
-            audio_data_or_path: AudioSegment对象或音频文件路径
+            audio_data_or_path: AudioSegment对象、AudioHandle或音频文件路径
             start_ms: 开始时间(毫秒)
             duration_ms: 持续时间(毫秒)，None表示播放到结束
+            loop: 是否循环播放，直到停止或开始新的预览
             
         返回:
             None
         """
-        import tempfile
-        import os
-        import platform
-        import subprocess
-        
-        # 如果传入的是路径而不是AudioSegment对象
-        if isinstance(audio_data_or_path, str):
-            audio = AudioProcessor.load_audio(audio_data_or_path)
-        else:
-            audio = audio_data_or_path
+        # 超过流式处理阈值的文件解码到临时文件后从内存映射播放，不整个载入内存
+        path = AudioProcessor._get_streaming_path(audio_data_or_path)
+        if path is not None:
+            AudioProcessor._preview_spooled(path, start_ms, duration_ms, loop)
+            return
             
-        # 如果指定了开始时间和持续时间，则截取相应片段
+        # 如果指定了开始时间和持续时间，则只加载相应片段
         if duration_ms:
-            audio = audio[start_ms:start_ms + duration_ms]
+            audio = AudioProcessor.load_audio_range(audio_data_or_path, start_ms, start_ms + duration_ms)
         elif start_ms > 0:
-            audio = audio[start_ms:]
+            audio = AudioProcessor.load_audio_range(audio_data_or_path, start_ms)
+        else:
+            audio = AudioProcessor.load_audio(audio_data_or_path)
             
-        # 创建临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            temp_path = temp_file.name
+        try:
+            get_playback_engine().play(audio, loop=loop)
+        except Exception as e:
+            logging.error(f"预览音频时出错: {e}")
             
-        # 导出到临时文件
-        audio.export(temp_path, format="wav")
+    @staticmethod
+    def _preview_spooled(path, start_ms=0, duration_ms=None, loop=False):
+        """
+        将大文件的预览范围按数据块解码到临时文件，再通过内存映射播放
+        
+        临时文件由播放引擎和预览缓存共同引用，播放结束且被新的预览替换后删除；
+        重复预览同一范围时不再解码
+        
+        参数:
+            path: 音频文件路径
+            start_ms: 开始时间(毫秒)
+            duration_ms: 持续时间(毫秒)，None表示播放到结束
+            loop: 是否循环播放
+        """
+        global _preview_spool
+        engine = get_playback_engine()
+        # 先停止正在播放的预览，使其临时文件可以释放
+        engine.stop()
+        key = (file_identity_key(path), start_ms, duration_ms)
+        
+        with _preview_spool_lock:
+            if _preview_spool is not None and _preview_spool[0] == key and _preview_spool[1].is_alive:
+                _, entry, fmt = _preview_spool
+            else:
+                if _preview_spool is not None:
+                    _preview_spool[1].release()
+                    _preview_spool = None
+                stream = open_pcm_stream(path, start_ms=start_ms, duration_ms=duration_ms)
+                fmt = stream.fmt
+                entry = get_scratch_area().create_file(".pcm", (stream.total_frames or 0) * fmt.frame_width)
+                try:
+                    with open(entry.path, 'wb') as f:
+                        for block in stream:
+                            f.write(block.raw_data)
+                except BaseException:
+                    entry.release()
+                    raise
+                _preview_spool = (key, entry, fmt)
+            entry.acquire()
         
-        # 根据操作系统使用不同的命令播放音频
-        system = platform.system()
         try:
-            if system == 'Darwin':  # macOS
-                subprocess.Popen(['afplay', temp_path])
-            elif system == 'Windows':
-                os.startfile(temp_path)
-            elif system == 'Linux':
-                subprocess.Popen(['aplay', temp_path])
-        except Exception as e:
-            print(f"预览音频时出错: {e}")
+            engine.play_pcm(entry.map(), fmt, resource=entry, loop=loop)
+        except BaseException:
+            entry.release()
+            raise
             
-        # 注意：临时文件会在系统重启后自动清理，或者可以实现一个定时清理机制
+    @staticmethod
+    def stop_preview():
+        """
+        停止正在播放的预览
+        """
+        get_playback_engine().stop()
             
     @staticmethod
     def preview_operation(input_paths, operation_func, *args, **kwargs):
@@ -221,7 +625,7 @@ class AudioProcessor:
         预览任何音频操作的结果
         
         参数:
-            input_paths: 输入音频文件路径或路径列表
+            input_paths: 输入音频文件路径(或AudioHandle)，合并操作为路径列表
             operation_func: 要预览的音频处理函数
             *args, **kwargs: 传递给操作函数的参数
         """
@@ -230,105 +634,112 @@ class AudioProcessor:
         
         # 根据不同操作类型进行处理
         if operation_func == AudioProcessor.cut_audio:
-            # 剪切音频预览
-            audio = AudioProcessor.load_audio(input_paths)
+            # 剪切音频预览，只解码选定范围，范围内已解码过的块直接复用
             start_ms = args[0]
             end_ms = args[1]
-            audio_result = audio[start_ms:end_ms]
+            audio_result = get_preview_cache().load_range(input_paths, start_ms, end_ms)
             
         elif operation_func == AudioProcessor.remove_segment:
-            # 删除片段预览
-            audio = AudioProcessor.load_audio(input_paths)
+            # 删除片段预览，只解码删除点前后各半个预览时长，不解码被删除的部分
             start_ms = args[0]
             end_ms = args[1]
-            first_part = audio[:start_ms]
-            second_part = audio[end_ms:]
-            audio_result = first_part + second_part
+            half_ms = int(get_config_value("preview_window_ms", 15000)) // 2
+            before = get_preview_cache().load_range(input_paths, max(0, start_ms - half_ms), start_ms)
+            after = get_preview_cache().load_range(input_paths, end_ms, end_ms + half_ms)
+            audio_result = before + after if len(before) else after
             
         elif operation_func == AudioProcessor.merge_audios or operation_func == AudioProcessor.merge_audios_with_gaps:
             # 合并音频预览
+            if not input_paths:
+                return
+                
             if operation_func == AudioProcessor.merge_audios:
                 # 简单合并
-                merged_audio = AudioProcessor.load_audio(input_paths[0])
-                for path in input_paths[1:]:
-                    next_audio = AudioProcessor.load_audio(path)
-                    merged_audio += next_audio
-                audio_result = merged_audio
-                
+                audio_result = AudioProcessor._merge_inputs(input_paths)
             else:
                 # 带间隙合并
                 gaps_ms = args[0] if args else None
-                
-                if not input_paths:
-                    return
-                    
-                # 加载第一个音频
-                audio_result = AudioProcessor.load_audio(input_paths[0])
-                
-                # 依次合并其他音频，添加间隙
-                for i, path in enumerate(input_paths[1:], 1):
-                    # 添加间隙
-                    if gaps_ms and i-1 < len(gaps_ms) and gaps_ms[i-1] > 0:
-                        silence = AudioSegment.silent(duration=gaps_ms[i-1])
-                        audio_result += silence
-                        
-                    # 添加下一个音频
-                    next_audio = AudioProcessor.load_audio(path)
-                    audio_result += next_audio
+                audio_result = AudioProcessor._merge_inputs(input_paths, gaps_ms)
                     
         elif operation_func == AudioProcessor.add_silence:
-            # 添加静音预览
-            audio = AudioProcessor.load_audio(input_paths)
-            position_ms = args[0]
+            # 添加静音预览，只解码插入点前后各半个预览时长
+            position_ms = max(0, args[0])
             duration_ms = args[1]
-            
-            # 分割音频
-            first_part = audio[:position_ms]
-            second_part = audio[position_ms:]
-            
-            # 创建静音段
-            silence = AudioSegment.silent(duration=duration_ms)
-            
-            # 合并三段
-            audio_result = first_part + silence + second_part
+            half_ms = int(get_config_value("preview_window_ms", 15000)) // 2
+            start_ms = max(0, position_ms - half_ms)
+            audio = get_preview_cache().load_range(input_paths, start_ms, position_ms + half_ms)
+            audio_result = SampleBuffer.from_segment(audio).insert_silence(position_ms - start_ms, duration_ms).to_segment()
             
         elif operation_func == AudioProcessor.reverse_audio:
-            # 倒放预览
-            audio = AudioProcessor.load_audio(input_paths)
-            audio_result = audio.reverse()
+            # 倒放预览，倒放后最先播放的是源音频的结尾，只处理结尾的预览时长
+            start_ms, end_ms = AudioProcessor._preview_window(input_paths, from_end=True)
+            audio_result = get_preview_cache().render(
+                input_paths, "reverse", (), start_ms, end_ms,
+                lambda audio: SampleBuffer.from_segment(audio).reverse().to_segment()
+            )
             
         elif operation_func == AudioProcessor.adjust_volume:
-            # 调整音量预览
-            audio = AudioProcessor.load_audio(input_paths)
+            # 调整音量预览，只处理开头的预览时长
             volume_db = args[0]
-            audio_result = audio + volume_db
+            start_ms, end_ms = AudioProcessor._preview_window(input_paths)
+            audio_result = get_preview_cache().render(
+                input_paths, "adjust_volume", (volume_db,), start_ms, end_ms,
+                lambda audio: SampleBuffer.from_segment(audio).apply_gain(volume_db).to_segment()
+            )
             
         elif operation_func == AudioProcessor.change_speed:
-            # 改变速度预览
-            audio = AudioProcessor.load_audio(input_paths)
+            # 改变速度预览，只解码并处理预览时长对应的源音频
+            # 同一速度再次预览时复用上次的处理结果
             speed_factor = args[0]
-            audio_result = audio._spawn(audio.raw_data, overrides={
-                "frame_rate": int(audio.frame_rate * speed_factor)
-            }).set_frame_rate(audio.frame_rate)
+            window_ms = int(get_config_value("preview_window_ms", 15000))
+            audio_result = get_preview_cache().render(
+                input_paths, "change_speed", (speed_factor,), 0, int(window_ms * speed_factor),
+                lambda audio: AudioProcessor._change_speed_segment(audio, speed_factor)
+            )
             
         elif operation_func == AudioProcessor.fade_in:
-            # 淡入预览
-            audio = AudioProcessor.load_audio(input_paths)
+            # 淡入预览，只处理开头的预览时长
             fade_ms = args[0]
-            audio_result = audio.fade_in(fade_ms)
+            start_ms, end_ms = AudioProcessor._preview_window(input_paths)
+            audio_result = get_preview_cache().render(
+                input_paths, "fade_in", (fade_ms,), start_ms, end_ms,
+                lambda audio: SampleBuffer.from_segment(audio).fade_in(fade_ms).to_segment()
+            )
             
         elif operation_func == AudioProcessor.fade_out:
-            # 淡出预览
-            audio = AudioProcessor.load_audio(input_paths)
+            # 淡出预览，只处理结尾的预览时长
             fade_ms = args[0]
-            audio_result = audio.fade_out(fade_ms)
+            start_ms, end_ms = AudioProcessor._preview_window(input_paths, from_end=True)
+            audio_result = get_preview_cache().render(
+                input_paths, "fade_out", (fade_ms,), start_ms, end_ms,
+                lambda audio: SampleBuffer.from_segment(audio).fade_out(fade_ms).to_segment()
+            )
         
         # 预览结果
         if audio_result:
             AudioProcessor.preview_audio(audio_result)
 
     @staticmethod
-    def merge_audios_with_gaps(input_paths, output_path, gaps_ms=None):
+    def _preview_window(source, from_end=False):
+        """
+        获取预览所需的源音频范围，长度为preview_window_ms配置值
+        
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            from_end: 是否取结尾的范围(淡出、倒放等从结尾开始起作用的操作)
+            
+        返回:
+            (开始时间, 结束时间)元组(毫秒)
+        """
+        window_ms = int(get_config_value("preview_window_ms", 15000))
+        if not from_end:
+            return 0, window_ms
+        end_ms = int(math.ceil(source_duration_ms(source)))
+        return max(0, end_ms - window_ms), end_ms
+
+    @staticmethod
+    @_remove_output_on_failure
+    def merge_audios_with_gaps(input_paths, output_path, gaps_ms=None, stream_copy=True, progress=None, cancel_token=None):
         """
         合并多个音频文件，可在文件之间添加指定长度的间隙
         
@@ -338,54 +749,120 @@ class AudioProcessor:
             gaps_ms: 间隙长度列表(毫秒)，None表示无间隙
                     例如：[1000, 2000] 表示在第一个和第二个音频之间添加1秒，
                     在第二个和第三个音频之间添加2秒的间隙
+            stream_copy: 没有间隙且所有输入与输出格式一致时是否尝试流复制拼接
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+            
+        返回:
+            bool: 是否使用了流复制，False表示进行了重新编码
         """
         if not input_paths:
-            return
+            return False
+        
+        # 间隙需要生成静音，只有无间隙时才能流复制
+        if stream_copy and not any(gap > 0 for gap in (gaps_ms or [])[:len(input_paths) - 1]):
+            paths = AudioProcessor._get_stream_copy_paths(input_paths, output_path)
+            if paths and AudioProcessor._stream_copy_concat(paths, output_path, progress=progress,
+                                                            cancel_token=cancel_token):
+                return True
             
-        # 加载第一个音频作为基础
-        merged_audio = AudioProcessor.load_audio(input_paths[0])
+        merged_audio = AudioProcessor._merge_inputs(
+            input_paths, gaps_ms,
+            progress=scale_progress(progress, 0.0, DECODE_PROGRESS_SHARE),
+            cancel_token=cancel_token
+        )
+        AudioProcessor._save_audio_tracked(merged_audio, output_path, progress, cancel_token)
+        return False
+
+    @staticmethod
+    def _merge_inputs(input_paths, gaps_ms=None, progress=None, cancel_token=None):
+        """
+        加载并合并多个音频，每个音频只写入一次结果缓冲区
         
-        # 依次合并其他音频，添加间隙
-        for i, path in enumerate(input_paths[1:], 1):
-            # 如果指定了间隙并且索引有效
-            if gaps_ms and i-1 < len(gaps_ms) and gaps_ms[i-1] > 0:
-                # 创建指定长度的静音
-                silence = AudioSegment.silent(duration=gaps_ms[i-1])
-                merged_audio += silence
-                
-            # 添加下一个音频
-            next_audio = AudioProcessor.load_audio(path)
-            merged_audio += next_audio
+        参数:
+            input_paths: 输入文件路径列表
+            gaps_ms: 间隙长度列表(毫秒)，None表示无间隙
+            progress: 加载进度回调函数
+            cancel_token: CancellationToken对象
+            
+        返回:
+            合并后的AudioSegment对象
+        """
+        segments = AudioProcessor.load_audios(input_paths, progress=progress, cancel_token=cancel_token)
+        return merge_segments(segments, gaps_ms)
+    
+    @staticmethod
+    def load_audios(input_paths, max_workers=None, progress=None, cancel_token=None):
+        """
+        并行加载多个音频文件，结果按输入顺序返回
+        
+        参数:
+            input_paths: 输入文件路径(或AudioHandle)列表
+            max_workers: 并行解码数，None表示使用配置值
+            progress: 进度回调函数，按已加载的文件数报告
+            cancel_token: CancellationToken对象，取消时不再开始新的解码
             
-        AudioProcessor.save_audio(merged_audio, output_path)
+        返回:
+            AudioSegment列表
+        """
+        check_cancelled(cancel_token)
+        segments = []
+        for _, audio, error in parallel_map(
+            AudioProcessor.load_audio,
+            input_paths,
+            max_workers=max_workers,
+            weigh=AudioProcessor._estimate_decoded_bytes
+        ):
+            if error is not None:
+                raise error
+            segments.append(audio)
+            check_cancelled(cancel_token)
+            report_progress(progress, len(segments) / float(len(input_paths)))
+        return segments
+    
+    @staticmethod
+    def _estimate_decoded_bytes(source):
+        """
+        估算加载音频后新增的内存占用(字节)，已在内存中的音频为0
+        
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            
+        返回:
+            字节数，无法估算时为None(parallel_map按占满额度处理)
+        """
+        if AudioProcessor._get_resident_audio(source) is not None:
+            return 0
+        if isinstance(source, AudioHandle):
+            return source.estimated_bytes
+        return estimate_decoded_bytes(probe_audio(source))
 
     @staticmethod
-    def add_silence(input_path, output_path, position_ms, duration_ms):
+    @_remove_output_on_failure
+    def add_silence(input_path, output_path, position_ms, duration_ms, progress=None, cancel_token=None):
         """
         在音频的指定位置添加静音
         
         参数:
-            input_path: 输入文件路径
+            input_path: 输入文件路径或AudioHandle
             output_path: 输出文件路径
             position_ms: 插入位置(毫秒)，0表示在开头
             duration_ms: 静音持续时间(毫秒)
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
         """
-        audio = AudioProcessor.load_audio(input_path)
-        
-        # 限制位置在音频范围内
-        position_ms = max(0, min(len(audio), position_ms))
-        
-        # 分割音频
-        first_part = audio[:position_ms]
-        second_part = audio[position_ms:]
+        stream_path = AudioProcessor._get_streaming_path(input_path)
+        if stream_path:
+            stream = track_progress(open_pcm_stream(stream_path), progress, cancel_token)
+            write_pcm_stream(insert_silence(stream, position_ms, duration_ms), output_path)
+            return
         
-        # 创建静音段
-        silence = AudioSegment.silent(duration=duration_ms)
+        audio = AudioProcessor._load_audio_tracked(input_path, progress, cancel_token)
         
-        # 合并三段
-        result_audio = first_part + silence + second_part
+        # 静音按原音频的格式生成，位置超出音频范围时追加在结尾
+        result_audio = SampleBuffer.from_segment(audio).insert_silence(max(0, position_ms), duration_ms).to_segment()
         
-        AudioProcessor.save_audio(result_audio, output_path)
+        AudioProcessor._save_audio_tracked(result_audio, output_path, progress, cancel_token)
     
     @staticmethod
     def get_video_audio_info(video_path):
@@ -396,7 +873,7 @@ class AudioProcessor:
             video_path: 视频文件路径
             
         返回:
-            字典，包含音频比特率、编码器、采样率等信息
+            字典，包含音频比特率、编码器、采样率、声道数和时长(duration_ms，未知时为None)等信息
         """
         try:
             # 构建FFmpeg命令
@@ -404,6 +881,7 @@ class AudioProcessor:
                 "ffprobe",
                 "-v", "quiet",
                 "-print_format", "json",
+                "-show_format",
                 "-show_streams",
                 "-select_streams", "a:0",  # 选择第一个音频流
                 video_path
@@ -419,24 +897,30 @@ class AudioProcessor:
             if 'streams' in data and len(data['streams']) > 0:
                 stream = data['streams'][0]
                 
+                # 优先使用音频流时长，缺失时(如MKV)使用容器时长
+                duration = stream.get('duration') or data.get('format', {}).get('duration')
+                
                 # 提取信息
                 info = {
                     'codec_name': stream.get('codec_name', 'unknown'),
                     'bit_rate': stream.get('bit_rate', 'unknown'),
                     'sample_rate': stream.get('sample_rate', 'unknown'),
-                    'channels': stream.get('channels', 'unknown')
+                    'channels': stream.get('channels', 'unknown'),
+                    'duration_ms': float(duration) * 1000.0 if duration else None
                 }
                 
                 return info
             
-            return {'codec_name': 'unknown', 'bit_rate': 'unknown', 'sample_rate': '44100', 'channels': '2'}
+            return {'codec_name': 'unknown', 'bit_rate': 'unknown', 'sample_rate': '44100', 'channels': '2', 'duration_ms': None}
             
         except Exception as e:
             print(f"获取视频音频信息时出错: {str(e)}")
-            return {'codec_name': 'unknown', 'bit_rate': 'unknown', 'sample_rate': '44100', 'channels': '2'}
+            return {'codec_name': 'unknown', 'bit_rate': 'unknown', 'sample_rate': '44100', 'channels': '2', 'duration_ms': None}
         
     @staticmethod
-    def extract_audio_from_video(video_path, output_path, audio_format="mp3", audio_bitrate="192k"):
+    @_remove_output_unless_successful
+    def extract_audio_from_video(video_path, output_path, audio_format="mp3", audio_bitrate="192k",
+                                 progress=None, cancel_token=None, audio_info=None):
         """
         从视频文件中提取音频
         
@@ -446,6 +930,9 @@ class AudioProcessor:
             audio_format: 输出音频格式 (默认: mp3)
             audio_bitrate: 音频比特率 (默认: 192k，如果为"original"则保留原始比特率，
                           如果为"original_quality"则尝试保留原始音频质量)
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+            audio_info: 已获取的视频音频信息(get_video_audio_info的返回值)，None表示重新获取
             
         返回:
             bool: 操作是否成功
@@ -457,7 +944,8 @@ class AudioProcessor:
                 os.makedirs(output_dir)
             
             # 获取原始视频的音频信息
-            audio_info = AudioProcessor.get_video_audio_info(video_path)
+            if audio_info is None:
+                audio_info = AudioProcessor.get_video_audio_info(video_path)
             original_codec = audio_info.get('codec_name', 'unknown')
             original_bitrate = audio_info.get('bit_rate', 'unknown')
             original_sample_rate = audio_info.get('sample_rate', '44100')
@@ -512,9 +1000,11 @@ class AudioProcessor:
                 output_path
             ])
             
-            # 执行命令
-            subprocess.run(cmd, check=True, capture_output=True)
+            # 执行命令，根据已输出的时长报告进度
+            run_ffmpeg(cmd, audio_info.get('duration_ms'), progress, cancel_token)
             return True
+        except OperationCancelled:
+            raise
         except subprocess.CalledProcessError as e:
             print(f"FFmpeg错误: {e.stderr.decode('utf-8', errors='ignore')}")
             return False
@@ -522,6 +1012,193 @@ class AudioProcessor:
             print(f"提取音频时出错: {str(e)}")
             return False
     
+    @staticmethod
+    def _get_stream_copy_paths(sources, output_path):
+        """
+        检查输入能否通过流复制写入输出文件
+        
+        要求所有输入都是文件、扩展名与输出相同、编码器与输出格式兼容，
+        且(多个输入时)编码器、采样率和声道数完全一致
+        
+        参数:
+            sources: 输入文件路径或AudioHandle列表
+            output_path: 输出文件路径
+            
+        返回:
+            可以流复制时返回输入文件路径列表，否则返回None
+        """
+        out_ext = os.path.splitext(output_path)[1].lower().strip('.')
+        if out_ext not in STREAM_COPY_FORMATS:
+            return None
+        
+        paths = []
+        stream_params = set()
+        for source in sources:
+            if isinstance(source, AudioHandle):
+                path, info = source.path, source.info
+            elif isinstance(source, str):
+                path = source
+                try:
+                    info = probe_audio(path)
+                except Exception:
+                    return None
+            else:
+                return None
+            
+            if os.path.splitext(path)[1].lower().strip('.') != out_ext:
+                return None
+            if not AudioProcessor._is_format_compatible(info['codec_name'], out_ext):
+                return None
+            
+            if not info['sample_rate'] or not info['channels']:
+                return None
+            
+            paths.append(path)
+            stream_params.add((info['codec_name'], info['sample_rate'], info['channels']))
+        
+        if len(stream_params) != 1:
+            logging.info("输入音频的编码参数不一致，使用重新编码")
+            return None
+        return paths
+    
+    @staticmethod
+    def _stream_copy_cut(input_path, output_path, start_ms, end_ms=None, progress=None, cancel_token=None):
+        """
+        使用流复制剪切音频，剪切点对齐到编码帧
+        
+        参数:
+            input_path: 输入文件路径
+            output_path: 输出文件路径
+            start_ms: 开始时间(毫秒)
+            end_ms: 结束时间(毫秒)，None表示到结尾
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+            
+        返回:
+            bool: 操作是否成功
+        """
+        cmd = ["ffmpeg", "-v", "error"]
+        if start_ms > 0:
+            cmd.extend(["-ss", f"{start_ms / 1000.0:.3f}"])
+        cmd.extend(["-i", input_path])
+        if end_ms is not None:
+            cmd.extend(["-t", f"{(end_ms - start_ms) / 1000.0:.3f}"])
+        cmd.extend(["-map", "0:a", "-c", "copy", "-y", output_path])
+        
+        duration_ms = end_ms - start_ms if end_ms is not None else None
+        try:
+            run_ffmpeg(cmd, duration_ms, progress, cancel_token)
+            return True
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            logging.info(f"流复制剪切失败，使用重新编码: {e}")
+            return False
+    
+    @staticmethod
+    def _stream_copy_concat(input_paths, output_path, progress=None, cancel_token=None):
+        """
+        使用ffmpeg的concat分离器拼接多个音频文件，不重新编码
+        
+        参数:
+            input_paths: 输入文件路径列表(编码参数必须一致)
+            output_path: 输出文件路径
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+            
+        返回:
+            bool: 操作是否成功
+        """
+        scratch = get_scratch_area().create_dir()
+        try:
+            list_path = os.path.join(scratch.path, "concat.txt")
+            with open(list_path, 'w', encoding='utf-8') as f:
+                for path in input_paths:
+                    escaped = os.path.abspath(path).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            
+            cmd = [
+                "ffmpeg", "-v", "error",
+                "-f", "concat", "-safe", "0",
+                "-i", list_path,
+                "-map", "0:a", "-c", "copy",
+                "-y", output_path
+            ]
+            run_ffmpeg(cmd, AudioProcessor._get_total_duration_ms(input_paths), progress, cancel_token)
+            return True
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            logging.info(f"流复制拼接失败，使用重新编码: {e}")
+            return False
+        finally:
+            scratch.release()
+    
+    @staticmethod
+    def _stream_copy_remove(input_path, output_path, start_ms, end_ms, progress=None, cancel_token=None):
+        """
+        使用流复制删除一段音频: 分别复制前后两部分，再拼接
+        
+        参数:
+            input_path: 输入文件路径
+            output_path: 输出文件路径
+            start_ms: 要删除部分的开始时间(毫秒)
+            end_ms: 要删除部分的结束时间(毫秒)
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+            
+        返回:
+            bool: 操作是否成功
+        """
+        ext = os.path.splitext(output_path)[1]
+        try:
+            # 两部分的总大小不超过输入文件
+            scratch = get_scratch_area().create_dir(os.path.getsize(input_path))
+        except ScratchQuotaExceeded as e:
+            logging.info(f"临时空间不足，使用重新编码: {e}")
+            return False
+        try:
+            # 复制两部分和拼接各占三分之一的进度
+            parts = []
+            if start_ms > 0:
+                first_path = os.path.join(scratch.path, f"part1{ext}")
+                if not AudioProcessor._stream_copy_cut(input_path, first_path, 0, start_ms,
+                                                       scale_progress(progress, 0.0, 1 / 3.0), cancel_token):
+                    return False
+                parts.append(first_path)
+            
+            second_path = os.path.join(scratch.path, f"part2{ext}")
+            if not AudioProcessor._stream_copy_cut(input_path, second_path, end_ms,
+                                                   progress=None, cancel_token=cancel_token):
+                return False
+            parts.append(second_path)
+            report_progress(progress, 2 / 3.0)
+            
+            if len(parts) == 1:
+                shutil.copyfile(parts[0], output_path)
+                report_progress(progress, 1.0)
+                return True
+            return AudioProcessor._stream_copy_concat(parts, output_path,
+                                                      scale_progress(progress, 2 / 3.0, 1.0), cancel_token)
+        finally:
+            scratch.release()
+    
+    @staticmethod
+    def _get_total_duration_ms(input_paths):
+        """
+        获取多个音频文件的总时长，用于计算进度
+        
+        参数:
+            input_paths: 输入文件路径列表
+            
+        返回:
+            总时长(毫秒)，无法获取时返回None
+        """
+        try:
+            return sum(probe_audio(path)['duration_ms'] for path in input_paths)
+        except Exception:
+            return None
+    
     @staticmethod
     def _get_codec_for_format(audio_format):
         """
@@ -544,31 +1221,37 @@ class AudioProcessor:
         return codecs.get(audio_format.lower(), "copy")
         
     @staticmethod
-    def extract_audio_with_pydub(video_path, output_path):
+    @_remove_output_unless_successful
+    def extract_audio_with_pydub(video_path, output_path, progress=None, cancel_token=None):
         """
         使用pydub从视频中提取音频(备用方法)
         
         参数:
             video_path: 视频文件路径
             output_path: 输出音频文件路径
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
             
         返回:
             bool: 操作是否成功
         """
         try:
             # 使用pydub从视频中提取音频
+            check_cancelled(cancel_token)
             audio = AudioSegment.from_file(video_path)
-            
-            # 获取输出格式
-            ext = os.path.splitext(output_path)[1].lower().strip('.')
+            check_cancelled(cancel_token)
+            report_progress(progress, DECODE_PROGRESS_SHARE)
             
             # 导出音频
-            audio.export(output_path, format=ext)
+            AudioProcessor._save_audio_tracked(audio, output_path, progress, cancel_token)
             return True
+        except OperationCancelled:
+            raise
         except Exception as e:
             print(f"使用pydub提取音频时出错: {str(e)}")
             # 如果pydub失败，尝试使用ffmpeg
-            return AudioProcessor.extract_audio_from_video(video_path, output_path)
+            return AudioProcessor.extract_audio_from_video(video_path, output_path,
+                                                           progress=progress, cancel_token=cancel_token)
 
     @staticmethod
     def _is_format_compatible(original_codec, target_format):
@@ -0,0 +1,175 @@
+import threading
+from collections import OrderedDict
+
+from src.utils.config import get_config_value
+from .audio_probe import probe_audio, estimate_decoded_bytes
+from .decode_cache import file_identity_key
+
+
+class AudioHandle:
+    """
+    已加载音频文件的句柄，在各选项卡之间共享同一份解码数据
+
+    解码数据在第一次访问audio属性时才加载，由所属的AudioSession
+    统一进行内存统计和淘汰
+    """
+
+    def __init__(self, file_path, session):
+        """
+        初始化音频句柄
+
+        参数:
+            file_path: 音频文件路径
+            session: 所属的AudioSession
+        """
+        self.path = file_path
+        self.session = session
+        self.key = file_identity_key(file_path)
+        self.info = probe_audio(file_path)
+        self._audio = None
+        self._lock = threading.Lock()
+
+    @property
+    def audio(self):
+        """
+        获取解码后的AudioSegment对象，必要时加载
+        """
+        with self._lock:
+            audio = self._audio
+            if audio is None:
+                from .audio_processor import AudioProcessor
+                audio = AudioProcessor.load_audio(self.path)
+                self._audio = audio
+        self.session._touch(self)
+        return audio
+
+    @property
+    def is_loaded(self):
+        """
+        解码数据是否常驻内存
+        """
+        return self._audio is not None
+
+    @property
+    def nbytes(self):
+        """
+        常驻内存的解码数据大小(字节)，未加载时为0
+        """
+        audio = self._audio
+        return len(audio.raw_data) if audio is not None else 0
+
+    @property
+    def estimated_bytes(self):
+        """
+        根据元数据估算的解码后数据大小(字节)，按16位采样计算，无法估算时为None
+        """
+        return estimate_decoded_bytes(self.info)
+
+    @property
+    def duration_ms(self):
+        """
+        音频时长(毫秒)
+        """
+        return self.info['duration_ms']
+
+    def unload(self):
+        """
+        释放常驻内存的解码数据，下次访问时重新加载
+        """
+        with self._lock:
+            self._audio = None
+
+
+class AudioSession:
+    """
+    当前会话中已加载音频的内存缓存
+
+    按最近使用顺序保存AudioHandle，常驻解码数据总量超过上限时
+    释放最久未使用的句柄的数据；单个文件超过上限时不常驻内存
+    """
+
+    def __init__(self, max_bytes=None):
+        """
+        初始化会话缓存
+
+        参数:
+            max_bytes: 常驻内存上限(字节)，None表示使用配置值
+        """
+        if max_bytes is None:
+            max_bytes = int(get_config_value("session_cache_size_mb", 1024)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._handles = OrderedDict()
+        self._lock = threading.RLock()
+
+    def open(self, file_path):
+        """
+        打开音频文件，同一文件(路径、大小和修改时间均相同)重复打开时返回已有句柄
+
+        参数:
+            file_path: 音频文件路径
+
+        返回:
+            AudioHandle对象
+        """
+        key = file_identity_key(file_path)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                self._handles.move_to_end(key)
+                return handle
+
+            handle = AudioHandle(file_path, self)
+            self._handles[key] = handle
+            return handle
+
+    def close(self, handle):
+        """
+        关闭句柄并释放其解码数据
+
+        参数:
+            handle: AudioHandle对象
+        """
+        with self._lock:
+            if self._handles.get(handle.key) is handle:
+                del self._handles[handle.key]
+        handle.unload()
+
+    def clear(self):
+        """
+        关闭全部句柄
+        """
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+        for handle in handles:
+            handle.unload()
+
+    @property
+    def resident_bytes(self):
+        """
+        当前常驻内存的解码数据总大小(字节)
+        """
+        with self._lock:
+            return sum(handle.nbytes for handle in self._handles.values())
+
+    def _touch(self, handle):
+        """
+        标记句柄刚被使用，并按内存上限淘汰其他句柄的数据
+        """
+        with self._lock:
+            if self._handles.get(handle.key) is handle:
+                self._handles.move_to_end(handle.key)
+
+            # 单个文件超过上限时不常驻内存
+            if handle.nbytes > self.max_bytes:
+                handle.unload()
+                return
+
+            total = self.resident_bytes
+            for other in list(self._handles.values()):
+                if total <= self.max_bytes:
+                    break
+                if other is handle or not other.is_loaded:
+                    continue
+                total -= other.nbytes
+                other.unload()
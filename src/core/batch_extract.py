@@ -0,0 +1,227 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from src.utils.config import get_config_value
+from .audio_processor import AudioProcessor
+from .decode_cache import file_identity_key
+from .parallel import parallel_map
+from .progress import OperationCancelled, check_cancelled, report_progress
+
+# 批量提取中每个文件的状态
+STATUS_PENDING = "pending"
+STATUS_PROBING = "probing"
+STATUS_EXTRACTING = "extracting"
+STATUS_DONE = "done"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+# 视频音频信息缓存: 文件标识 -> Future，同一文件只执行一次ffprobe
+_video_info_cache = OrderedDict()
+_video_info_lock = threading.Lock()
+
+# 缓存的视频音频信息数量上限，超出时淘汰最久未使用的项
+VIDEO_INFO_CACHE_SIZE = 256
+
+
+def get_extract_worker_count():
+    """
+    获取批量提取时同时运行的ffmpeg进程数，配置为0时使用CPU核心数
+
+    返回:
+        进程数
+    """
+    workers = int(get_config_value("extract_workers", 0))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def get_video_audio_info_cached(video_path):
+    """
+    获取视频文件中音频流的信息，结果按文件标识缓存
+
+    多个线程同时请求同一文件时只执行一次ffprobe，其余线程等待该结果
+
+    参数:
+        video_path: 视频文件路径
+
+    返回:
+        与AudioProcessor.get_video_audio_info相同的信息字典
+    """
+    key = file_identity_key(video_path)
+    with _video_info_lock:
+        future = _video_info_cache.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _video_info_cache[key] = future
+            while len(_video_info_cache) > VIDEO_INFO_CACHE_SIZE:
+                _video_info_cache.popitem(last=False)
+        else:
+            _video_info_cache.move_to_end(key)
+
+    if is_owner:
+        try:
+            info = AudioProcessor.get_video_audio_info(video_path)
+        except Exception as e:
+            _forget_video_info(key, future)
+            future.set_exception(e)
+        else:
+            if _is_probe_fallback(info):
+                # ffprobe失败时返回的默认信息不缓存，下次重新获取
+                _forget_video_info(key, future)
+            future.set_result(info)
+    return future.result()
+
+
+def _is_probe_fallback(info):
+    """
+    判断是否为ffprobe失败或找不到音频流时返回的默认信息
+    """
+    return info.get('codec_name') == 'unknown' and info.get('duration_ms') is None
+
+
+def _forget_video_info(key, future):
+    """
+    从缓存中移除指定的结果(已被新的请求替换时不移除)
+    """
+    with _video_info_lock:
+        if _video_info_cache.get(key) is future:
+            del _video_info_cache[key]
+
+
+def unique_paths(paths):
+    """
+    去除重复的文件路径(指向同一文件的不同写法视为重复)，保持原有顺序
+
+    参数:
+        paths: 文件路径列表
+
+    返回:
+        去重后的路径列表
+    """
+    seen = set()
+    result = []
+    for path in paths:
+        normalized = os.path.normcase(os.path.abspath(path))
+        if normalized not in seen:
+            seen.add(normalized)
+            result.append(path)
+    return result
+
+
+def plan_output_paths(video_paths, output_dir, audio_format):
+    """
+    为每个视频生成输出文件路径，同名视频依次添加_1、_2等后缀
+
+    参数:
+        video_paths: 视频文件路径列表(已去重)
+        output_dir: 输出目录
+        audio_format: 输出音频格式
+
+    返回:
+        字典，视频路径 -> 输出文件路径
+    """
+    planned = {}
+    used = set()
+    for path in video_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        candidate = os.path.join(output_dir, f"{stem}.{audio_format}")
+        index = 1
+        while os.path.normcase(candidate) in used:
+            candidate = os.path.join(output_dir, f"{stem}_{index}.{audio_format}")
+            index += 1
+        used.add(os.path.normcase(candidate))
+        planned[path] = candidate
+    return planned
+
+
+def extract_batch(video_paths, output_dir, audio_format="mp3", audio_bitrate="192k", overwrite=False,
+                  max_workers=None, on_update=None, progress=None, cancel_token=None):
+    """
+    从多个视频中并行提取音频，同时运行多个ffmpeg进程
+
+    参数:
+        video_paths: 视频文件路径列表，重复项只处理一次
+        output_dir: 输出目录
+        audio_format: 输出音频格式
+        audio_bitrate: 音频比特率，含义与extract_audio_from_video相同
+        overwrite: 是否覆盖已存在的输出文件，False时跳过这些视频
+        max_workers: 同时运行的ffmpeg进程数，None表示使用配置值
+        on_update: 状态回调函数on_update(视频路径, 状态, 详情)，在工作线程中调用；
+                   提取中的详情为完成比例，完成/跳过时为输出路径，失败时为错误信息
+        progress: 总进度回调函数，参数为0到1之间的完成比例
+        cancel_token: CancellationToken对象，取消时终止正在运行的ffmpeg并跳过剩余视频
+
+    返回:
+        字典，视频路径 -> (输出文件路径, 异常)，成功时异常为None
+    """
+    video_paths = unique_paths(video_paths)
+    if not video_paths:
+        return {}
+    output_paths = plan_output_paths(video_paths, output_dir, audio_format)
+    os.makedirs(output_dir, exist_ok=True)
+    if max_workers is None:
+        max_workers = get_extract_worker_count()
+
+    # 各视频的完成比例，用于计算总进度(键在开始前已确定，工作线程只修改值)
+    fractions = dict.fromkeys(video_paths, 0.0)
+
+    def notify(path, status, detail=None):
+        if on_update is not None:
+            on_update(path, status, detail)
+
+    def set_fraction(path, fraction):
+        fractions[path] = fraction
+        report_progress(progress, sum(fractions.values()) / len(fractions))
+
+    def extract_one(path):
+        output_path = output_paths[path]
+        check_cancelled(cancel_token)
+        if not overwrite and os.path.exists(output_path):
+            set_fraction(path, 1.0)
+            notify(path, STATUS_SKIPPED, output_path)
+            return output_path
+
+        notify(path, STATUS_PROBING)
+        audio_info = get_video_audio_info_cached(path)
+        check_cancelled(cancel_token)
+
+        def item_progress(fraction):
+            set_fraction(path, fraction)
+            notify(path, STATUS_EXTRACTING, fraction)
+
+        notify(path, STATUS_EXTRACTING, 0.0)
+        success = AudioProcessor.extract_audio_from_video(
+            path, output_path, audio_format, audio_bitrate,
+            progress=item_progress, cancel_token=cancel_token, audio_info=audio_info
+        )
+        if not success:
+            raise RuntimeError("FFmpeg提取失败")
+
+        set_fraction(path, 1.0)
+        notify(path, STATUS_DONE, output_path)
+        return output_path
+
+    def run_item(path):
+        # 失败时立即报告状态，不必等待排在前面的视频完成
+        try:
+            return extract_one(path)
+        except Exception as e:
+            set_fraction(path, 1.0)
+            if isinstance(e, OperationCancelled):
+                notify(path, STATUS_CANCELLED)
+            else:
+                notify(path, STATUS_FAILED, str(e))
+            raise
+
+    for path in video_paths:
+        notify(path, STATUS_PENDING)
+
+    results = {}
+    for path, output_path, error in parallel_map(run_item, video_paths, max_workers=max_workers):
+        results[path] = (output_path, error)
+    return results
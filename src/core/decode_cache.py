@@ -0,0 +1,193 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+
+from pydub import AudioSegment
+
+from src.utils.config import CACHE_DIR, get_config_value
+
+# 解码后PCM数据的缓存目录
+DECODE_CACHE_DIR = os.path.join(CACHE_DIR, "decoded")
+
+# 这些格式pydub可以直接读取，不需要经过ffmpeg解码，无需缓存
+UNCACHED_FORMATS = ['wav']
+
+
+def file_identity_key(file_path):
+    """
+    根据文件路径、大小和修改时间生成文件标识
+
+    文件内容发生变化(大小或修改时间改变)时标识随之改变
+
+    参数:
+        file_path: 文件路径
+
+    返回:
+        十六进制字符串
+    """
+    stat = os.stat(file_path)
+    identity = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def _cache_paths(key):
+    """
+    获取缓存项的数据文件和元数据文件路径
+    """
+    return (
+        os.path.join(DECODE_CACHE_DIR, f"{key}.pcm"),
+        os.path.join(DECODE_CACHE_DIR, f"{key}.json")
+    )
+
+
+def _max_cache_bytes():
+    """
+    获取缓存容量上限(字节)
+    """
+    return int(get_config_value("decode_cache_size_mb", 2048)) * 1024 * 1024
+
+
+def is_cache_enabled():
+    """
+    检查是否启用解码缓存
+    """
+    return bool(get_config_value("decode_cache_enabled", True))
+
+
+def get_cached_audio(file_path):
+    """
+    从缓存中读取已解码的音频
+
+    参数:
+        file_path: 原始音频文件路径
+
+    返回:
+        AudioSegment对象，未命中时返回None
+    """
+    try:
+        key = file_identity_key(file_path)
+        data_path, meta_path = _cache_paths(key)
+        if not os.path.exists(data_path) or not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(data_path, 'rb') as f:
+            data = f.read()
+
+        if len(data) != meta['data_size']:
+            # 数据不完整，删除损坏的缓存项
+            _remove_entry(data_path, meta_path)
+            return None
+
+        # 更新访问时间，用于LRU淘汰
+        os.utime(data_path, None)
+
+        return AudioSegment(
+            data=data,
+            sample_width=meta['sample_width'],
+            frame_rate=meta['frame_rate'],
+            channels=meta['channels']
+        )
+    except Exception as e:
+        logging.error(f"读取解码缓存失败: {e}")
+        return None
+
+
+def put_cached_audio(file_path, audio):
+    """
+    将解码后的音频写入缓存，写入后按容量上限淘汰最久未使用的缓存项
+
+    参数:
+        file_path: 原始音频文件路径
+        audio: 解码后的AudioSegment对象
+    """
+    data = audio.raw_data
+    max_bytes = _max_cache_bytes()
+    if len(data) > max_bytes:
+        # 单个文件超过缓存容量，不缓存
+        return
+
+    try:
+        os.makedirs(DECODE_CACHE_DIR, exist_ok=True)
+        key = file_identity_key(file_path)
+        data_path, meta_path = _cache_paths(key)
+
+        meta = {
+            'source': os.path.abspath(file_path),
+            'sample_width': audio.sample_width,
+            'frame_rate': audio.frame_rate,
+            'channels': audio.channels,
+            'data_size': len(data)
+        }
+
+        # 先写临时文件再替换，避免其他进程或线程读到写了一半的缓存
+        tmp_suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_data_path = f"{data_path}.{tmp_suffix}"
+        with open(tmp_data_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_data_path, data_path)
+
+        tmp_meta_path = f"{meta_path}.{tmp_suffix}"
+        with open(tmp_meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_meta_path, meta_path)
+
+        evict_cache(max_bytes)
+    except Exception as e:
+        logging.error(f"写入解码缓存失败: {e}")
+
+
+def evict_cache(max_bytes=None):
+    """
+    淘汰最久未使用的缓存项，直到缓存总大小不超过上限
+
+    参数:
+        max_bytes: 容量上限(字节)，None表示使用配置值
+    """
+    if max_bytes is None:
+        max_bytes = _max_cache_bytes()
+    if not os.path.isdir(DECODE_CACHE_DIR):
+        return
+
+    entries = []
+    total = 0
+    for name in os.listdir(DECODE_CACHE_DIR):
+        if not name.endswith('.pcm'):
+            continue
+        data_path = os.path.join(DECODE_CACHE_DIR, name)
+        try:
+            stat = os.stat(data_path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, data_path))
+        total += stat.st_size
+
+    # 按访问时间从旧到新淘汰
+    entries.sort()
+    for _, size, data_path in entries:
+        if total <= max_bytes:
+            break
+        meta_path = data_path[:-len('.pcm')] + '.json'
+        _remove_entry(data_path, meta_path)
+        total -= size
+
+
+def clear_cache():
+    """
+    清空全部解码缓存
+    """
+    evict_cache(0)
+
+
+def _remove_entry(data_path, meta_path):
+    """
+    删除一个缓存项
+    """
+    for path in (data_path, meta_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
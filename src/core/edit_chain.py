@@ -0,0 +1,346 @@
+import math
+from collections import namedtuple
+
+from src.utils.config import get_config_value
+from .audio_processor import AudioProcessor, DECODE_PROGRESS_SHARE
+from .preview_cache import get_preview_cache
+from .sample_buffer import SampleBuffer
+from .progress import check_cancelled, report_progress, scale_progress
+from .stream_engine import (
+    open_pcm_stream,
+    take_range,
+    skip_range,
+    insert_silence,
+    apply_gain,
+    apply_fade,
+    apply_time_stretch
+)
+
+
+class EditOperation(namedtuple('EditOperation', ['name', 'args'])):
+    """
+    编辑链中的一个操作: 操作名称和参数元组
+    """
+
+    def describe(self):
+        """
+        获取操作的说明文本，用于界面显示
+        """
+        spec = OPERATIONS[self.name]
+        params = ", ".join(f"{param}={value}" for param, value in zip(spec.params, self.args))
+        return f"{spec.label}({params})" if params else spec.label
+
+
+# 操作定义: 说明文本、参数名称、可选参数数、作用于SampleBuffer的函数、流式执行的函数(None表示不支持流式处理)
+OperationSpec = namedtuple('OperationSpec', ['label', 'params', 'optional', 'apply', 'apply_stream'])
+
+
+OPERATIONS = {
+    "cut": OperationSpec("剪切", ("start_ms", "end_ms"), 0, SampleBuffer.slice, take_range),
+    "remove_segment": OperationSpec("删除片段", ("start_ms", "end_ms"), 0, SampleBuffer.remove, skip_range),
+    "add_silence": OperationSpec(
+        "插入静音", ("position_ms", "duration_ms"), 0,
+        SampleBuffer.insert_silence,
+        insert_silence
+    ),
+    "adjust_volume": OperationSpec("调整音量", ("volume_db",), 0, SampleBuffer.apply_gain, apply_gain),
+    "normalize": OperationSpec("音量标准化", ("headroom_db",), 1, SampleBuffer.normalize, None),
+    "fade_in": OperationSpec(
+        "淡入", ("fade_ms",), 0,
+        SampleBuffer.fade_in,
+        lambda stream, fade_ms: apply_fade(stream, fade_ms, fade_in=True)
+    ),
+    "fade_out": OperationSpec(
+        "淡出", ("fade_ms",), 0,
+        SampleBuffer.fade_out,
+        lambda stream, fade_ms: apply_fade(stream, fade_ms, fade_in=False)
+    ),
+    "change_speed": OperationSpec(
+        "改变速度", ("speed_factor",), 0,
+        SampleBuffer.change_speed,
+        apply_time_stretch
+    ),
+    "reverse": OperationSpec("倒放", (), 0, SampleBuffer.reverse, None)
+}
+
+
+class EditChain:
+    """
+    编辑链: 按顺序执行的一组编辑操作
+
+    整条编辑链只解码一次、编码一次: 所有操作作用于同一份解码后的音频
+    (大文件且全部操作支持流式处理时按数据块处理)，不再为每个操作写出中间文件
+    """
+
+    def __init__(self, operations=None):
+        """
+        参数:
+            operations: 初始操作列表，每项为(操作名称, 参数列表)
+        """
+        self._operations = []
+        for name, args in operations or []:
+            self.add(name, *args)
+
+    def add(self, name, *args):
+        """
+        在编辑链末尾添加一个操作
+
+        参数:
+            name: 操作名称(OPERATIONS中的键)
+            *args: 操作参数
+
+        返回:
+            编辑链本身，便于连续调用
+        """
+        if name not in OPERATIONS:
+            raise ValueError(f"未知操作: {name}")
+        spec = OPERATIONS[name]
+        required = len(spec.params) - spec.optional
+        if not required <= len(args) <= len(spec.params):
+            raise ValueError(f"操作{name}需要{required}个参数")
+        self._operations.append(EditOperation(name, tuple(args)))
+        return self
+
+    def remove(self, index):
+        """
+        删除指定位置的操作
+
+        参数:
+            index: 操作在编辑链中的位置
+        """
+        del self._operations[index]
+
+    def clear(self):
+        """
+        清空编辑链
+        """
+        self._operations = []
+
+    @property
+    def operations(self):
+        """
+        编辑链中的操作列表(副本)
+        """
+        return list(self._operations)
+
+    def __len__(self):
+        return len(self._operations)
+
+    def __iter__(self):
+        return iter(self.operations)
+
+    def copy(self):
+        """
+        复制编辑链，用于在后台线程中渲染而不受界面后续修改的影响
+        """
+        chain = EditChain()
+        chain._operations = list(self._operations)
+        return chain
+
+    def compile(self):
+        """
+        优化操作列表: 合并相邻的音量调整，去掉不起作用的操作
+
+        返回:
+            EditOperation列表
+        """
+        compiled = []
+        for operation in self._operations:
+            if operation.name == "adjust_volume":
+                if compiled and compiled[-1].name == "adjust_volume":
+                    # 相邻的音量调整可以合并为一次
+                    volume_db = compiled.pop().args[0] + operation.args[0]
+                    operation = EditOperation("adjust_volume", (volume_db,))
+                if operation.args[0] == 0:
+                    continue
+            elif operation.name in ("fade_in", "fade_out", "add_silence") and operation.args[-1] <= 0:
+                continue
+            elif operation.name == "change_speed" and operation.args[0] == 1:
+                continue
+            compiled.append(operation)
+        return compiled
+
+    @property
+    def is_streamable(self):
+        """
+        是否全部操作都支持流式处理
+        """
+        return all(OPERATIONS[operation.name].apply_stream is not None for operation in self._operations)
+
+    @staticmethod
+    def _split_leading_cut(operations):
+        """
+        开头的剪切只需解码剪切范围，将其从操作列表中分离出来
+
+        返回:
+            ((开始时间, 结束时间)或None, 其余操作列表)
+        """
+        if operations and operations[0].name == "cut":
+            return operations[0].args, operations[1:]
+        return None, operations
+
+    def apply(self, audio, cancel_token=None):
+        """
+        对内存中的音频执行整条编辑链
+
+        全部操作在SampleBuffer上以向量运算执行，只在开始和结束时与AudioSegment相互转换
+
+        参数:
+            audio: AudioSegment对象
+            cancel_token: CancellationToken对象，每个操作之前检查
+
+        返回:
+            处理后的AudioSegment对象
+        """
+        operations = self.compile()
+        if not operations:
+            return audio
+        buffer = SampleBuffer.from_segment(audio)
+        for operation in operations:
+            check_cancelled(cancel_token)
+            buffer = OPERATIONS[operation.name].apply(buffer, *operation.args)
+        return buffer.to_segment()
+
+    def apply_stream(self, stream):
+        """
+        对数据流执行整条编辑链，要求全部操作支持流式处理
+
+        参数:
+            stream: PcmStream对象
+
+        返回:
+            新的PcmStream对象
+        """
+        for operation in self.compile():
+            apply_stream = OPERATIONS[operation.name].apply_stream
+            if apply_stream is None:
+                raise ValueError(f"操作{operation.name}不支持流式处理")
+            stream = apply_stream(stream, *operation.args)
+        return stream
+
+    def render_audio(self, source, progress=None, cancel_token=None):
+        """
+        解码音频并在内存中执行编辑链
+
+        开头的剪切操作只解码剪切范围
+
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            progress: 解码进度回调函数
+            cancel_token: CancellationToken对象
+
+        返回:
+            处理后的AudioSegment对象
+        """
+        cut_range, operations = self._split_leading_cut(self.compile())
+        check_cancelled(cancel_token)
+        if cut_range is not None:
+            audio = AudioProcessor.load_audio_range(source, *cut_range)
+        else:
+            audio = AudioProcessor.load_audio(source)
+        report_progress(progress, 1.0)
+        return EditChain(operations).apply(audio, cancel_token)
+
+    @staticmethod
+    def _source_window_ms(operations, window_ms):
+        """
+        计算得到结果开头window_ms毫秒所需的源音频长度(从开头起)
+
+        从最后一个操作向前逐个推算; 音量标准化、淡出和倒放依赖整段音频，此时返回None
+
+        返回:
+            源音频长度(毫秒)，需要整段音频时返回None
+        """
+        length = window_ms
+        for operation in reversed(operations):
+            name, args = operation.name, operation.args
+            if name in ("adjust_volume", "fade_in"):
+                continue
+            elif name == "cut":
+                start_ms, end_ms = args
+                length = start_ms + min(length, end_ms - start_ms)
+            elif name == "remove_segment":
+                start_ms, end_ms = args
+                if length > start_ms:
+                    length += end_ms - start_ms
+            elif name == "add_silence":
+                position_ms, duration_ms = args
+                if length > position_ms:
+                    length = max(position_ms, length - duration_ms)
+            elif name == "change_speed":
+                length = length * args[0]
+            else:
+                return None
+        return int(math.ceil(length))
+
+    def preview_source_ms(self, window_ms=None):
+        """
+        计算预览结果开头window_ms毫秒所需的源音频长度
+
+        参数:
+            window_ms: 预览时长(毫秒)，None表示使用preview_window_ms配置值
+
+        返回:
+            源音频长度(毫秒)，需要整段音频时返回None
+        """
+        if window_ms is None:
+            window_ms = int(get_config_value("preview_window_ms", 15000))
+        return self._source_window_ms(self.compile(), window_ms)
+
+    def render_preview(self, source, window_ms=None):
+        """
+        渲染编辑链结果的开头部分用于预览，只解码所需的源音频范围
+
+        源音频通过预览缓存加载，编辑链和窗口都不变时再次预览复用上次的结果
+
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            window_ms: 预览时长(毫秒)，None表示使用preview_window_ms配置值
+
+        返回:
+            AudioSegment对象
+        """
+        if window_ms is None:
+            window_ms = int(get_config_value("preview_window_ms", 15000))
+        operations = self.compile()
+        end_ms = self._source_window_ms(operations, window_ms)
+        audio = get_preview_cache().render(
+            source, "edit_chain", tuple(operations), 0, end_ms,
+            lambda audio: EditChain(operations).apply(audio)
+        )
+        return audio[:window_ms]
+
+    def render(self, source, outputs, progress=None, cancel_token=None):
+        """
+        执行编辑链并导出结果，整个过程只解码一次、编码一次
+
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            outputs: 输出文件路径，或AudioProcessor.export_multi支持的输出列表
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+        """
+        if isinstance(outputs, str):
+            outputs = [outputs]
+
+        streaming_path = AudioProcessor._get_streaming_path(source) if self.is_streamable else None
+        if streaming_path:
+            # 大文件按数据块处理，开头的剪切通过定位解码实现
+            cut_range, operations = self._split_leading_cut(self.compile())
+            if cut_range is not None:
+                start_ms, end_ms = cut_range
+                stream = open_pcm_stream(streaming_path, start_ms=start_ms, duration_ms=end_ms - start_ms)
+            else:
+                stream = open_pcm_stream(streaming_path)
+            AudioProcessor.export_multi(EditChain(operations).apply_stream(stream), outputs,
+                                        progress=progress, cancel_token=cancel_token)
+            return
+
+        audio = self.render_audio(
+            source,
+            progress=scale_progress(progress, 0.0, DECODE_PROGRESS_SHARE),
+            cancel_token=cancel_token
+        )
+        AudioProcessor.export_multi(audio, outputs,
+                                    progress=scale_progress(progress, DECODE_PROGRESS_SHARE, 1.0),
+                                    cancel_token=cancel_token)
@@ -0,0 +1,99 @@
+from pydub import AudioSegment
+
+from .stream_engine import PcmFormat
+from .resampler import convert_segment
+
+
+def get_merge_format(segments):
+    """
+    获取合并结果的格式: 取所有输入中最大的采样位宽、采样率和声道数
+    (与pydub中AudioSegment相加时的格式统一规则一致)
+
+    参数:
+        segments: AudioSegment列表
+
+    返回:
+        PcmFormat对象
+    """
+    return PcmFormat(
+        max(seg.sample_width for seg in segments),
+        max(seg.frame_rate for seg in segments),
+        max(seg.channels for seg in segments)
+    )
+
+
+def harmonize_segment(segment, fmt, mode=None):
+    """
+    将音频转换为指定格式，采样率、声道数和采样位宽的转换均按向量运算处理
+
+    参数:
+        segment: AudioSegment对象
+        fmt: 目标PcmFormat
+        mode: 重采样模式(resampler.QUALITY_MODE或FAST_MODE)，None表示使用配置值
+
+    返回:
+        转换后的AudioSegment对象
+    """
+    return convert_segment(segment, fmt, mode)
+
+
+def build_merge_layout(frame_counts, gaps_ms, fmt):
+    """
+    计算合并结果的布局: 每个片段的起始帧以及总帧数
+
+    参数:
+        frame_counts: 每个片段的帧数列表
+        gaps_ms: 片段之间的间隙(毫秒)列表，None表示无间隙
+        fmt: 合并结果的PcmFormat
+
+    返回:
+        (起始帧列表, 总帧数)元组
+    """
+    offsets = []
+    position = 0
+    for i, frames in enumerate(frame_counts):
+        if i > 0 and gaps_ms and i - 1 < len(gaps_ms) and gaps_ms[i - 1] > 0:
+            position += fmt.ms_to_frames(gaps_ms[i - 1])
+        offsets.append(position)
+        position += frames
+    return offsets, position
+
+
+def merge_segments(segments, gaps_ms=None, mode=None):
+    """
+    合并多个音频片段，片段之间可插入静音间隙
+
+    先计算最终布局，再将每个片段写入一次预先分配的缓冲区，
+    复制的数据量与总长度成线性关系(反复使用+拼接为平方关系)
+
+    参数:
+        segments: AudioSegment列表
+        gaps_ms: 间隙长度列表(毫秒)，gaps_ms[i]为第i个和第i+1个片段之间的间隙
+        mode: 格式不一致时的重采样模式，None表示使用配置值
+
+    返回:
+        合并后的AudioSegment对象
+    """
+    if not segments:
+        return AudioSegment.empty()
+
+    fmt = get_merge_format(segments)
+    segments = [harmonize_segment(seg, fmt, mode) for seg in segments]
+
+    frame_counts = [len(seg.raw_data) // fmt.frame_width for seg in segments]
+    offsets, total_frames = build_merge_layout(frame_counts, gaps_ms, fmt)
+
+    # 缓冲区初始为0，未写入的部分即为静音间隙
+    buffer = bytearray(total_frames * fmt.frame_width)
+    view = memoryview(buffer)
+    for seg, offset, frames in zip(segments, offsets, frame_counts):
+        start = offset * fmt.frame_width
+        view[start:start + frames * fmt.frame_width] = seg.raw_data
+    view.release()
+
+    return AudioSegment(
+        data=bytes(buffer),
+        sample_width=fmt.sample_width,
+        frame_rate=fmt.frame_rate,
+        channels=fmt.channels
+    )
@@ -0,0 +1,145 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.config import get_config_value
+
+
+def get_worker_count():
+    """
+    获取并行解码的工作线程数，配置为0时使用CPU核心数
+
+    返回:
+        工作线程数
+    """
+    workers = int(get_config_value("decode_workers", 0))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def get_max_inflight_bytes():
+    """
+    获取同时解码中(尚未被取走)的数据量上限(字节)
+    """
+    return int(get_config_value("decode_max_inflight_mb", 1024)) * 1024 * 1024
+
+
+class _InflightBudget:
+    """
+    限制同时处理中的结果大小: 按输入顺序放行，放行的总大小不超过上限
+
+    按顺序放行保证调用方等待的下一个结果总能开始处理，不会因为后面的输入占用了额度而死锁；
+    没有处理中的结果时，超过上限的单个输入也会放行
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._used = 0
+        self._next = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, index, weight):
+        """
+        等待轮到第index个输入且额度足够
+
+        返回:
+            是否放行，调用方已结束时返回False
+        """
+        with self._condition:
+            while not self._closed and not (
+                    index == self._next and (self._used == 0 or self._used + weight <= self.limit)):
+                self._condition.wait()
+            if self._closed:
+                return False
+            self._next += 1
+            self._used += weight
+            self._condition.notify_all()
+            return True
+
+    def release(self, weight):
+        """
+        结果已被取走，归还额度
+        """
+        with self._condition:
+            self._used -= weight
+            self._condition.notify_all()
+
+    def close(self):
+        """
+        调用方已结束，唤醒所有等待中的任务
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+def parallel_map(func, items, max_workers=None, weigh=None, max_inflight=None):
+    """
+    使用线程池并行处理多个输入，并按输入顺序返回结果
+
+    解码工作实际在ffmpeg子进程中进行，线程只负责等待和收集数据，
+    因此使用线程池即可利用多核，同时避免在进程间传递大块PCM数据
+
+    参数:
+        func: 处理函数，接收一个输入项
+        items: 输入项列表
+        max_workers: 工作线程数，None表示使用配置值
+        weigh: 估算每个输入项结果大小(字节)的函数(在工作线程中调用)，None表示不限制
+        max_inflight: 同时处理中(尚未被取走)的结果大小上限(字节)，None表示使用配置值
+
+    返回:
+        生成器，按输入顺序依次产生(输入项, 结果, 异常)元组，
+        成功时异常为None，失败时结果为None
+    """
+    items = list(items)
+    if max_workers is None:
+        max_workers = get_worker_count()
+    if max_inflight is None:
+        max_inflight = get_max_inflight_bytes()
+    max_workers = max(1, min(max_workers, len(items) or 1))
+    budget = _InflightBudget(max_inflight) if weigh is not None else None
+
+    weights = {}
+
+    def run(index, item):
+        # 估算(如读取文件信息)也在工作线程中进行，多个输入同时估算
+        if budget is not None:
+            weights[index] = _safe_weigh(weigh, item, max_inflight)
+            if not budget.acquire(index, weights[index]):
+                return None
+        return func(item)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque(
+            (index, item, executor.submit(run, index, item)) for index, item in enumerate(items)
+        )
+        try:
+            while pending:
+                index, item, future = pending.popleft()
+                try:
+                    result, error = future.result(), None
+                except Exception as e:
+                    result, error = None, e
+                if budget is not None:
+                    budget.release(weights.pop(index, 0))
+                yield item, result, error
+        finally:
+            # 调用方提前结束(如操作被取消)时，取消尚未开始的任务并唤醒等待额度的任务
+            if budget is not None:
+                budget.close()
+            for _, _, future in pending:
+                future.cancel()
+
+
+def _safe_weigh(weigh, item, unknown):
+    """
+    估算输入项的结果大小，无法估算时按unknown计算
+    """
+    try:
+        weight = weigh(item)
+    except Exception:
+        return unknown
+    return unknown if weight is None else weight
@@ -0,0 +1,308 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.utils.config import CACHE_DIR
+from .decode_cache import file_identity_key
+from .sample_buffer import SampleBuffer
+from .stream_engine import open_pcm_stream, track_progress
+
+# 波形峰值索引的缓存目录，每个文件一个sidecar文件，以文件标识命名
+PEAK_CACHE_DIR = os.path.join(CACHE_DIR, "peaks")
+
+# sidecar文件格式版本，格式变化时递增，旧文件自动重新生成
+PEAK_INDEX_VERSION = 1
+
+# 最精细一级中每个峰值覆盖的帧数
+BASE_BLOCK_FRAMES = 256
+
+# 相邻两级之间的倍数
+LEVEL_FACTOR = 4
+
+# 内存中保留的峰值索引数量
+MEMORY_CACHE_SIZE = 32
+
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+class PeakIndex:
+    """
+    多分辨率波形峰值索引(最小值/最大值金字塔)
+
+    第0级中每个元素是BASE_BLOCK_FRAMES帧内所有声道的最小值和最大值，
+    之后每一级由上一级每LEVEL_FACTOR个元素合并而成。
+    绘制时按每个像素对应的帧数选择合适的级别，
+    计算量只与绘制宽度有关，与文件长度无关
+    """
+
+    def __init__(self, frame_rate, total_frames, mins, maxs, base_block=BASE_BLOCK_FRAMES, factor=LEVEL_FACTOR):
+        """
+        参数:
+            frame_rate: 采样率
+            total_frames: 音频总帧数
+            mins: 各级最小值数组列表(int16，按16位满幅)
+            maxs: 各级最大值数组列表(int16，按16位满幅)
+            base_block: 第0级每个元素覆盖的帧数
+            factor: 相邻两级之间的倍数
+        """
+        self.frame_rate = frame_rate
+        self.total_frames = total_frames
+        self.mins = mins
+        self.maxs = maxs
+        self.base_block = base_block
+        self.factor = factor
+
+    @classmethod
+    def from_peaks(cls, frame_rate, total_frames, mins, maxs, base_block=BASE_BLOCK_FRAMES, factor=LEVEL_FACTOR):
+        """
+        根据第0级峰值生成全部级别
+
+        参数:
+            frame_rate: 采样率
+            total_frames: 音频总帧数
+            mins: 第0级最小值数组
+            maxs: 第0级最大值数组
+            base_block: 第0级每个元素覆盖的帧数
+            factor: 相邻两级之间的倍数
+
+        返回:
+            PeakIndex对象
+        """
+        level_mins, level_maxs = [mins], [maxs]
+        while len(level_mins[-1]) > 1:
+            starts = np.arange(0, len(level_mins[-1]), factor)
+            level_mins.append(np.minimum.reduceat(level_mins[-1], starts))
+            level_maxs.append(np.maximum.reduceat(level_maxs[-1], starts))
+        return cls(frame_rate, total_frames, level_mins, level_maxs, base_block, factor)
+
+    @property
+    def levels(self):
+        """
+        级别数
+        """
+        return len(self.mins)
+
+    @property
+    def duration_ms(self):
+        """
+        音频时长(毫秒)
+        """
+        return self.total_frames * 1000.0 / self.frame_rate
+
+    def block_frames(self, level):
+        """
+        指定级别中每个元素覆盖的帧数
+        """
+        return self.base_block * self.factor ** level
+
+    def choose_level(self, frames_per_column):
+        """
+        选择每个元素覆盖帧数不超过frames_per_column的最粗级别
+        """
+        level = 0
+        while level + 1 < self.levels and self.block_frames(level + 1) <= frames_per_column:
+            level += 1
+        return level
+
+    def peaks(self, start_ms, end_ms, columns):
+        """
+        获取一段时间范围内按列划分的峰值，用于绘制波形
+
+        参数:
+            start_ms: 开始时间(毫秒)
+            end_ms: 结束时间(毫秒)
+            columns: 列数(通常为绘制宽度的像素数)
+
+        返回:
+            (最小值数组, 最大值数组)，长度均为columns，取值范围-1到1，
+            超出音频范围的列为0
+        """
+        columns = max(0, int(columns))
+        mins = np.zeros(columns, dtype=np.float32)
+        maxs = np.zeros(columns, dtype=np.float32)
+        if columns == 0 or end_ms <= start_ms or self.total_frames == 0:
+            return mins, maxs
+
+        start_frame = start_ms * self.frame_rate / 1000.0
+        frames_per_column = (end_ms - start_ms) * self.frame_rate / 1000.0 / columns
+        level = self.choose_level(frames_per_column)
+        block = self.block_frames(level)
+        level_mins, level_maxs = self.mins[level], self.maxs[level]
+
+        edges = start_frame + np.arange(columns) * frames_per_column
+        valid = (edges >= 0) & (edges < self.total_frames)
+        if not valid.any():
+            return mins, maxs
+        starts = np.minimum((edges[valid] // block).astype(np.int64), len(level_mins) - 1)
+        # reduceat要求起点不递减，每列至少取起点所在的一个元素
+        mins[valid] = np.minimum.reduceat(level_mins, starts)
+        maxs[valid] = np.maximum.reduceat(level_maxs, starts)
+        # 最后一列只取到结束位置
+        last_end = min(len(level_mins), int(np.ceil((start_frame + columns * frames_per_column) / block)))
+        last = np.flatnonzero(valid)[-1]
+        last_start = starts[-1]
+        if last_end > last_start:
+            mins[last] = level_mins[last_start:last_end].min()
+            maxs[last] = level_maxs[last_start:last_end].max()
+        return mins / 32768.0, maxs / 32768.0
+
+    def save(self, path):
+        """
+        保存为sidecar文件(先写临时文件再替换)
+
+        参数:
+            path: 文件路径
+        """
+        arrays = {
+            'meta': np.array([PEAK_INDEX_VERSION, self.frame_rate, self.total_frames, self.base_block, self.factor],
+                             dtype=np.int64),
+            'mins': self.mins[0],
+            'maxs': self.maxs[0]
+        }
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        读取sidecar文件
+
+        参数:
+            path: 文件路径
+
+        返回:
+            PeakIndex对象，文件版本不一致时返回None
+        """
+        with np.load(path) as data:
+            version, frame_rate, total_frames, base_block, factor = (int(v) for v in data['meta'])
+            if version != PEAK_INDEX_VERSION:
+                return None
+            return cls.from_peaks(frame_rate, total_frames, data['mins'], data['maxs'], base_block, factor)
+
+
+def build_peak_index(file_path, progress=None, cancel_token=None):
+    """
+    按数据块解码整个文件并生成峰值索引，内存占用与文件长度无关
+
+    参数:
+        file_path: 音频文件路径
+        progress: 进度回调函数，参数为0到1之间的完成比例
+        cancel_token: CancellationToken对象，用于取消操作
+
+    返回:
+        PeakIndex对象
+    """
+    stream = open_pcm_stream(file_path)
+    mins, maxs = [], []
+    pending = None
+    total_frames = 0
+    for block in track_progress(stream, progress, cancel_token):
+        samples = SampleBuffer.from_segment(block).samples
+        if samples.dtype.itemsize == 4:
+            samples = samples >> 16
+        total_frames += len(samples)
+        # 每帧取所有声道中的最小值和最大值，与上一块剩余的不足一个峰值块的帧拼接
+        frame_mins = samples.min(axis=1).astype(np.int16)
+        frame_maxs = samples.max(axis=1).astype(np.int16)
+        if pending is not None:
+            frame_mins = np.concatenate((pending[0], frame_mins))
+            frame_maxs = np.concatenate((pending[1], frame_maxs))
+        usable = len(frame_mins) // BASE_BLOCK_FRAMES * BASE_BLOCK_FRAMES
+        if usable:
+            mins.append(frame_mins[:usable].reshape(-1, BASE_BLOCK_FRAMES).min(axis=1))
+            maxs.append(frame_maxs[:usable].reshape(-1, BASE_BLOCK_FRAMES).max(axis=1))
+        pending = (frame_mins[usable:], frame_maxs[usable:])
+
+    if pending is not None and len(pending[0]):
+        mins.append(pending[0].min(keepdims=True))
+        maxs.append(pending[1].max(keepdims=True))
+    if not mins:
+        mins, maxs = [np.zeros(1, dtype=np.int16)], [np.zeros(1, dtype=np.int16)]
+    return PeakIndex.from_peaks(stream.fmt.frame_rate, total_frames, np.concatenate(mins), np.concatenate(maxs))
+
+
+def _sidecar_path(key):
+    """
+    获取峰值索引sidecar文件路径
+    """
+    return os.path.join(PEAK_CACHE_DIR, f"{key}.npz")
+
+
+def get_cached_peak_index(file_path):
+    """
+    从内存或sidecar文件中获取峰值索引，不存在时返回None，不会解码音频
+
+    参数:
+        file_path: 音频文件路径
+
+    返回:
+        PeakIndex对象或None
+    """
+    try:
+        key = file_identity_key(file_path)
+    except OSError:
+        return None
+
+    with _memory_lock:
+        index = _memory_cache.get(key)
+        if index is not None:
+            _memory_cache.move_to_end(key)
+            return index
+
+    path = _sidecar_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        index = PeakIndex.load(path)
+    except Exception as e:
+        logging.error(f"读取波形索引失败: {e}")
+        index = None
+    if index is None:
+        # 损坏或版本不一致的sidecar文件在重新生成时覆盖
+        return None
+    _remember(key, index)
+    return index
+
+
+def get_peak_index(file_path, progress=None, cancel_token=None):
+    """
+    获取峰值索引，不存在时解码生成并保存为sidecar文件
+
+    参数:
+        file_path: 音频文件路径
+        progress: 进度回调函数，参数为0到1之间的完成比例
+        cancel_token: CancellationToken对象，用于取消操作
+
+    返回:
+        PeakIndex对象
+    """
+    index = get_cached_peak_index(file_path)
+    if index is not None:
+        return index
+
+    key = file_identity_key(file_path)
+    index = build_peak_index(file_path, progress, cancel_token)
+    try:
+        os.makedirs(PEAK_CACHE_DIR, exist_ok=True)
+        index.save(_sidecar_path(key))
+    except Exception as e:
+        logging.error(f"保存波形索引失败: {e}")
+    _remember(key, index)
+    return index
+
+
+def _remember(key, index):
+    """
+    将峰值索引放入内存缓存，超出数量上限时淘汰最久未使用的项
+    """
+    with _memory_lock:
+        _memory_cache[key] = index
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
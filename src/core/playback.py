@@ -0,0 +1,680 @@
+import time
+import wave
+import shutil
+import logging
+import platform
+import threading
+import subprocess
+
+from src.utils.config import get_config_value
+from .stream_engine import PcmFormat
+
+# sounddevice为可选依赖，未安装时使用外部播放器或空输出
+try:
+    import sounddevice
+except Exception:  # 未安装或找不到PortAudio库
+    sounddevice = None
+
+# 环形缓冲区容量(毫秒)，也是seek和stop之后需要丢弃的最大数据量
+BUFFER_MS = 200
+
+# 每次向环形缓冲区写入或从中读取的数据量(毫秒)
+CHUNK_MS = 20
+
+# 采样位宽(字节) -> sounddevice的采样类型
+_SOUNDDEVICE_DTYPES = {
+    1: 'int8',
+    2: 'int16',
+    3: 'int24',
+    4: 'int32'
+}
+
+
+class RingBuffer:
+    """
+    线程安全的PCM环形缓冲区
+
+    生产者线程写入解码后的数据，播放回调读取数据；缓冲区满时写入方等待，
+    数据不足时读取方立即得到已有的数据(不阻塞音频回调)
+    """
+
+    def __init__(self, capacity):
+        """
+        参数:
+            capacity: 容量(字节)
+        """
+        self._buffer = bytearray(capacity)
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+        self._condition = threading.Condition()
+
+    @property
+    def capacity(self):
+        """
+        容量(字节)
+        """
+        return self._capacity
+
+    @property
+    def available(self):
+        """
+        可读取的字节数
+        """
+        with self._condition:
+            return self._size
+
+    def write(self, data, should_stop=None):
+        """
+        写入数据，缓冲区满时等待播放回调读取
+
+        参数:
+            data: 要写入的字节串
+            should_stop: 返回True时放弃等待的函数
+
+        返回:
+            实际写入的字节数
+        """
+        view = memoryview(data)
+        written = 0
+        with self._condition:
+            while written < len(view):
+                while self._size == self._capacity:
+                    if should_stop is not None and should_stop():
+                        return written
+                    self._condition.wait(0.05)
+                end = (self._start + self._size) % self._capacity
+                count = min(len(view) - written, self._capacity - self._size, self._capacity - end)
+                self._buffer[end:end + count] = view[written:written + count]
+                self._size += count
+                written += count
+        return written
+
+    def read(self, size):
+        """
+        读取最多size字节，不等待
+
+        返回:
+            bytes，数据不足时长度小于size
+        """
+        with self._condition:
+            count = min(size, self._size)
+            first = min(count, self._capacity - self._start)
+            data = bytes(self._buffer[self._start:self._start + first])
+            if count > first:
+                data += bytes(self._buffer[:count - first])
+            self._start = (self._start + count) % self._capacity
+            self._size -= count
+            self._condition.notify_all()
+        return data
+
+    def clear(self):
+        """
+        丢弃全部数据
+        """
+        with self._condition:
+            self._start = 0
+            self._size = 0
+            self._condition.notify_all()
+
+
+class PlaybackSink:
+    """
+    播放输出的基类
+
+    start()之后输出端按自己的节奏调用pull(frames)获取数据，
+    pull返回(数据, 是否结束)，数据不足时由输出端决定补静音或稍后再取，结束后输出端停止
+    """
+
+    def start(self, fmt, pull):
+        """
+        开始输出
+
+        参数:
+            fmt: PcmFormat对象
+            pull: 获取数据的函数
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        """
+        立即停止输出
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        自然播放结束后释放输出(不能在音频回调或输出线程中调用)
+        """
+        self.stop()
+
+
+class SoundDeviceSink(PlaybackSink):
+    """
+    通过sounddevice(PortAudio)的回调直接输出到声卡，延迟最低
+    """
+
+    def __init__(self):
+        if sounddevice is None:
+            raise RuntimeError("未安装sounddevice，无法直接输出到声卡")
+        self._stream = None
+        self._finished = threading.Event()
+
+    def start(self, fmt, pull):
+        def callback(outdata, frames, time_info, status):
+            data, finished = pull(frames)
+            outdata[:len(data)] = data
+            if len(data) < len(outdata):
+                # 缓冲区欠载时补静音，保持输出连续
+                outdata[len(data):] = b'\0' * (len(outdata) - len(data))
+            if finished:
+                raise sounddevice.CallbackStop()
+
+        self._stream = sounddevice.RawOutputStream(
+            samplerate=fmt.frame_rate,
+            channels=fmt.channels,
+            dtype=_SOUNDDEVICE_DTYPES[fmt.sample_width],
+            blocksize=0,  # 由PortAudio选择最适合设备的块大小
+            latency='low',
+            callback=callback,
+            finished_callback=self._finished.set
+        )
+        self._stream.start()
+
+    def stop(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            stream.abort()
+            stream.close()
+
+    def close(self):
+        # 回调结束后声卡中还有已提交的数据，等流停止后再关闭，不截断结尾
+        self._finished.wait(timeout=1.0)
+        self.stop()
+
+
+class _ThreadSink(PlaybackSink):
+    """
+    在独立线程中不断获取数据并写出的输出端
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self, fmt, pull):
+        self._stopped.clear()
+        self._open(fmt)
+        self._thread = threading.Thread(target=self._run, args=(fmt, pull), name="audio_playback", daemon=True)
+        self._thread.start()
+
+    def _run(self, fmt, pull):
+        chunk_frames = max(1, fmt.ms_to_frames(CHUNK_MS))
+        try:
+            while not self._stopped.is_set():
+                data, finished = pull(chunk_frames)
+                if finished:
+                    if data:
+                        self._write(data, fmt)
+                    break
+                if not data:
+                    # 生产者尚未写入数据，稍后再取
+                    self._stopped.wait(0.002)
+                    continue
+                self._write(data, fmt)
+        except Exception as e:
+            logging.error(f"音频输出出错: {e}")
+        finally:
+            self._close()
+
+    def stop(self):
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            self._interrupt()
+            thread.join(timeout=1.0)
+        self._thread = None
+
+    def _open(self, fmt):
+        """
+        打开输出(在start中调用)
+        """
+
+    def _write(self, data, fmt):
+        """
+        写出一块数据
+        """
+        raise NotImplementedError
+
+    def _interrupt(self):
+        """
+        让阻塞中的_write尽快返回(在stop中调用)
+        """
+
+    def _close(self):
+        """
+        关闭输出(在输出线程结束时调用)
+        """
+
+
+class NullSink(_ThreadSink):
+    """
+    丢弃数据的输出端，用于没有声卡的环境和测试
+
+    realtime为True时按实际播放速度获取数据，否则尽快读完
+    """
+
+    def __init__(self, realtime=True):
+        super().__init__()
+        self.realtime = realtime
+        self.frames_written = 0
+
+    def _open(self, fmt):
+        self.frames_written = 0
+        self._clock = time.monotonic()
+
+    def _write(self, data, fmt):
+        frames = len(data) // fmt.frame_width
+        self.frames_written += frames
+        if self.realtime:
+            self._clock += frames / float(fmt.frame_rate)
+            delay = self._clock - time.monotonic()
+            if delay > 0:
+                self._stopped.wait(delay)
+
+
+class FileSink(NullSink):
+    """
+    将播放的数据写入WAV文件，用于测试和录制播放结果
+    """
+
+    def __init__(self, path, realtime=False):
+        """
+        参数:
+            path: WAV文件路径
+            realtime: 是否按实际播放速度写入
+        """
+        super().__init__(realtime)
+        self.path = path
+        self._file = None
+
+    def _open(self, fmt):
+        super()._open(fmt)
+        self._file = wave.open(self.path, 'wb')
+        self._file.setnchannels(fmt.channels)
+        self._file.setsampwidth(fmt.sample_width)
+        self._file.setframerate(fmt.frame_rate)
+
+    def _write(self, data, fmt):
+        self._file.writeframesraw(data)
+        super()._write(data, fmt)
+
+    def _close(self):
+        wav_file, self._file = self._file, None
+        if wav_file is not None:
+            wav_file.close()
+
+
+class PipeSink(_ThreadSink):
+    """
+    将原始PCM数据通过标准输入传给外部播放器(aplay或ffplay)，不需要临时文件
+    """
+
+    def __init__(self, command_builder):
+        """
+        参数:
+            command_builder: 根据PcmFormat生成播放器命令行的函数
+        """
+        super().__init__()
+        self.command_builder = command_builder
+        self._process = None
+
+    def _open(self, fmt):
+        self._process = subprocess.Popen(
+            self.command_builder(fmt),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+    def _write(self, data, fmt):
+        # 播放器按实际速度消费数据，管道写满时在此等待
+        self._process.stdin.write(data)
+
+    def _interrupt(self):
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def _close(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        if self._stopped.is_set():
+            if process.poll() is None:
+                process.kill()
+        process.wait()
+
+
+def _aplay_command(fmt):
+    """
+    aplay播放原始PCM的命令行(缓冲时间100毫秒)
+    """
+    formats = {1: "S8", 2: "S16_LE", 3: "S24_3LE", 4: "S32_LE"}
+    return ["aplay", "-q", "-t", "raw", "-f", formats[fmt.sample_width], "-r", str(fmt.frame_rate),
+            "-c", str(fmt.channels), "-B", "100000", "-"]
+
+
+def _ffplay_command(fmt):
+    """
+    ffplay播放原始PCM的命令行
+    """
+    formats = {1: "s8", 2: "s16le", 3: "s24le", 4: "s32le"}
+    return ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-fflags", "nobuffer",
+            "-f", formats[fmt.sample_width], "-ar", str(fmt.frame_rate), "-ac", str(fmt.channels), "-i", "-"]
+
+
+def create_sink(kind=None):
+    """
+    创建播放输出端
+
+    参数:
+        kind: "sounddevice"、"pipe"、"null"或"auto"，None表示使用playback_sink配置值；
+              auto依次尝试sounddevice、aplay(仅Linux)、ffplay，都不可用时使用空输出
+
+    返回:
+        PlaybackSink对象
+    """
+    if kind is None:
+        kind = get_config_value("playback_sink", "auto")
+    if kind == "null":
+        return NullSink()
+    if kind == "sounddevice" or (kind == "auto" and sounddevice is not None):
+        return SoundDeviceSink()
+    if kind in ("auto", "pipe"):
+        if platform.system() == 'Linux' and shutil.which("aplay"):
+            return PipeSink(_aplay_command)
+        if shutil.which("ffplay"):
+            return PipeSink(_ffplay_command)
+        if kind == "pipe":
+            raise RuntimeError("找不到aplay或ffplay，无法播放音频")
+        logging.warning("没有可用的音频输出设备，播放的音频将被丢弃")
+        return NullSink()
+    raise ValueError(f"未知的播放输出类型: {kind}")
+
+
+class PlaybackEngine:
+    """
+    进程内的音频播放引擎
+
+    播放内存中的PCM数据: 生产者线程按小块把数据写入环形缓冲区，
+    输出端的回调从环形缓冲区读取。开始播放只需填充一小块数据，不需要导出文件；
+    stop和seek清空环形缓冲区后立即生效
+    """
+
+    def __init__(self, sink_factory=None, buffer_ms=BUFFER_MS):
+        """
+        参数:
+            sink_factory: 创建输出端的函数，None表示使用create_sink
+            buffer_ms: 环形缓冲区容量(毫秒)
+        """
+        self.sink_factory = sink_factory or create_sink
+        self.buffer_ms = buffer_ms
+        self._lock = threading.RLock()
+        self._sink = None
+        self._feeder = None
+        self._session = 0          # 每次play递增，旧的生产者线程据此退出
+        self._data = None
+        self._fmt = None
+        self._resource = None      # 播放期间持有的资源(如临时文件)，播放结束时释放
+        self._total_frames = 0
+        self._ring = None
+        self._position = 0         # 生产者下一次写入的帧位置
+        self._played_base = 0      # 最近一次开始或seek时的帧位置
+        self._played_frames = 0    # 此后输出端已取走的帧数
+        self._eof = False
+        self._loop = False
+        self._on_finished = None
+
+    @property
+    def is_playing(self):
+        """
+        是否正在播放
+        """
+        return self._sink is not None
+
+    @property
+    def position_ms(self):
+        """
+        当前播放位置(毫秒)
+        """
+        with self._lock:
+            if self._fmt is None:
+                return 0
+            frame = self._played_base + self._played_frames
+            if self._loop and self._total_frames:
+                frame %= self._total_frames
+            return frame * 1000.0 / self._fmt.frame_rate
+
+    @property
+    def duration_ms(self):
+        """
+        正在播放的音频时长(毫秒)
+        """
+        with self._lock:
+            if self._fmt is None:
+                return 0
+            return self._total_frames * 1000.0 / self._fmt.frame_rate
+
+    def play(self, audio, start_ms=0, on_finished=None, loop=False):
+        """
+        开始播放，正在播放的内容先停止
+
+        参数:
+            audio: AudioSegment对象
+            start_ms: 开始位置(毫秒)
+            on_finished: 自然播放结束时调用的函数(在播放线程中调用)，stop()不会触发
+            loop: 是否循环播放(播放到结尾后无缝回到开头)，直到调用stop()或开始新的播放
+        """
+        fmt = PcmFormat(audio.sample_width, audio.frame_rate, audio.channels)
+        self.play_pcm(audio.raw_data, fmt, start_ms, on_finished, loop=loop)
+
+    def play_pcm(self, data, fmt, start_ms=0, on_finished=None, resource=None, loop=False):
+        """
+        播放原始PCM数据，数据直接从传入的缓冲区读取，不复制
+
+        参数:
+            data: 支持缓冲区协议的PCM数据(bytes、mmap等)
+            fmt: PcmFormat对象
+            start_ms: 开始位置(毫秒)
+            on_finished: 自然播放结束时调用的函数(在播放线程中调用)，stop()不会触发
+            resource: 播放期间持有的资源，播放结束、停止或被新的播放替换时调用其release()
+            loop: 是否循环播放
+        """
+        self.stop()
+        with self._lock:
+            self._fmt = fmt
+            self._data = memoryview(data).cast('B')
+            self._total_frames = len(self._data) // fmt.frame_width
+            self._resource = resource
+            self._loop = loop and self._total_frames > 0
+            capacity = max(1, self._fmt.ms_to_frames(self.buffer_ms)) * self._fmt.frame_width
+            self._ring = RingBuffer(capacity)
+            self._on_finished = on_finished
+            self._seek_locked(start_ms)
+            self._session += 1
+            session = self._session
+
+            # 先写入一小块数据再启动输出，避免开头出现静音
+            self._fill(self._fmt.ms_to_frames(CHUNK_MS), session)
+            self._feeder = threading.Thread(target=self._feed, args=(session,), name="audio_feeder", daemon=True)
+            self._feeder.start()
+            self._sink = self.sink_factory()
+            self._sink.start(self._fmt, lambda frames: self._pull(frames, session))
+
+    def stop(self):
+        """
+        停止播放
+        """
+        with self._lock:
+            sink, self._sink = self._sink, None
+            resource = self._end_session_locked()
+        if sink is not None:
+            sink.stop()
+        self._release(resource)
+
+    def _end_session_locked(self):
+        """
+        结束当前播放: 让生产者线程和输出端退出，放开数据缓冲区(调用方持有锁)
+
+        返回:
+            需要释放的资源
+        """
+        self._session += 1
+        if self._ring is not None:
+            self._ring.clear()
+        data, self._data = self._data, None
+        if data is not None:
+            data.release()
+        resource, self._resource = self._resource, None
+        return resource
+
+    @staticmethod
+    def _release(resource):
+        """
+        释放播放期间持有的资源
+        """
+        if resource is None:
+            return
+        try:
+            resource.release()
+        except Exception as e:
+            logging.error(f"释放播放资源出错: {e}")
+
+    def seek(self, position_ms):
+        """
+        跳转到指定位置，播放中时从新位置继续播放
+
+        参数:
+            position_ms: 播放位置(毫秒)
+        """
+        with self._lock:
+            if self._data is None:
+                return
+            self._seek_locked(position_ms)
+            self._ring.clear()
+
+    def _seek_locked(self, position_ms):
+        """
+        设置播放位置(调用方持有锁)
+        """
+        total = self._total_frames
+        frame = min(total, max(0, self._fmt.ms_to_frames(position_ms)))
+        self._position = frame
+        self._played_base = frame
+        self._played_frames = 0
+        self._eof = frame >= total
+
+    def _fill(self, frames, session):
+        """
+        从当前位置取出最多frames帧写入环形缓冲区
+
+        返回:
+            是否还有数据
+        """
+        with self._lock:
+            if session != self._session or self._eof:
+                return False
+            width = self._fmt.frame_width
+            start = self._position * width
+            chunk = self._data[start:start + frames * width]
+            # 缓冲区有足够空间时才写入，不在持有锁时等待
+            if len(chunk) > self._ring.capacity - self._ring.available:
+                return True
+            self._ring.write(chunk)
+            self._position += len(chunk) // width
+            if start + len(chunk) >= len(self._data):
+                if self._loop:
+                    # 循环播放时紧接着写入开头的数据，两次之间没有停顿
+                    self._position = 0
+                else:
+                    self._eof = True
+            return not self._eof
+
+    def _feed(self, session):
+        """
+        生产者线程: 保持环形缓冲区接近填满
+        """
+        chunk_frames = max(1, self._fmt.ms_to_frames(CHUNK_MS))
+        chunk_seconds = CHUNK_MS / 2000.0
+        while session == self._session:
+            if not self._fill(chunk_frames, session):
+                if self._eof:
+                    # 数据已全部写入，等待seek(可能回到前面)或结束
+                    time.sleep(chunk_seconds)
+                    continue
+                return
+            if self._ring.available + chunk_frames * self._fmt.frame_width > self._ring.capacity:
+                time.sleep(chunk_seconds)
+
+    def _pull(self, frames, session):
+        """
+        输出端获取数据(在输出线程或音频回调中调用)，不等待
+
+        返回:
+            (数据, 是否结束)，缓冲区欠载时数据可能少于frames帧
+        """
+        with self._lock:
+            if session != self._session:
+                return b'', True
+            ring = self._ring
+            width = self._fmt.frame_width
+            # 在锁内读取，保证seek之后计入的都是新位置的数据
+            data = ring.read(frames * width)
+            self._played_frames += len(data) // width
+            finished = self._eof and ring.available == 0 and len(data) < frames * width
+        if finished:
+            self._finish(session)
+        return data, finished
+
+    def _finish(self, session):
+        """
+        自然播放结束
+        """
+        with self._lock:
+            if session != self._session:
+                return
+            sink, self._sink = self._sink, None
+            resource = self._end_session_locked()
+            callback = self._on_finished
+        self._release(resource)
+        if sink is not None:
+            # 此时位于输出端的音频回调或输出线程中，不能在这里关闭输出端
+            threading.Thread(target=sink.close, name="audio_sink_close", daemon=True).start()
+        if callback is not None:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"播放结束回调出错: {e}")
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_playback_engine():
+    """
+    获取全局共享的播放引擎，新的预览会替换正在播放的预览
+
+    返回:
+        PlaybackEngine对象
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PlaybackEngine()
+        return _engine
@@ -0,0 +1,225 @@
+import threading
+from collections import OrderedDict
+
+from pydub import AudioSegment
+
+from src.utils.config import get_config_value
+from .audio_probe import probe_audio
+from .audio_session import AudioHandle
+from .decode_cache import file_identity_key
+from .stream_engine import read_pcm_range
+
+# 源音频按此时长(毫秒)对齐分块解码和缓存，调整预览范围时只需解码新边界所在的块
+PREVIEW_BLOCK_MS = 2000
+
+
+class PreviewCache:
+    """
+    预览渲染缓存
+
+    缓存两类数据，按总字节数进行LRU淘汰:
+    - 源音频块: (源文件标识, 块序号) -> 解码后的数据块。
+      预览范围变化时，范围内已解码的块直接复用，只解码新边界所在的块
+    - 渲染结果: (源文件标识, 操作, 参数, 窗口) -> 操作的处理结果。
+      参数和窗口都不变时再次预览不重新处理
+
+    已常驻内存的音频直接截取，不经过块缓存
+    """
+
+    def __init__(self, max_bytes=None, block_ms=PREVIEW_BLOCK_MS):
+        """
+        参数:
+            max_bytes: 缓存容量上限(字节)，None表示使用preview_cache_mb配置值
+            block_ms: 源音频块的时长(毫秒)
+        """
+        if max_bytes is None:
+            max_bytes = int(get_config_value("preview_cache_mb", 256)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.block_ms = block_ms
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        """
+        缓存中的数据量(字节)
+        """
+        with self._lock:
+            return self._size
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def load_range(self, source, start_ms=0, end_ms=None):
+        """
+        加载源音频的指定时间范围，按块复用已解码的数据
+
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            start_ms: 开始时间(毫秒)
+            end_ms: 结束时间(毫秒)，None表示到结尾
+
+        返回:
+            AudioSegment对象
+        """
+        resident = _resident_audio(source)
+        if resident is not None:
+            return resident[start_ms:end_ms]
+
+        path = source.path if isinstance(source, AudioHandle) else source
+        identity = file_identity_key(path)
+        start_ms = max(0, int(start_ms))
+        if end_ms is None:
+            end_ms = int(source_duration_ms(source)) + self.block_ms
+        end_ms = int(end_ms)
+        if end_ms <= start_ms:
+            return AudioSegment.empty()
+
+        first = start_ms // self.block_ms
+        last = (end_ms - 1) // self.block_ms
+        blocks = self._get_blocks(path, identity, first, last)
+
+        data = b''.join(block.raw_data for block in blocks)
+        audio = blocks[0]._spawn(data)
+        offset = first * self.block_ms
+        return audio[start_ms - offset:end_ms - offset]
+
+    def _get_blocks(self, path, identity, first, last):
+        """
+        获取序号从first到last的源音频块，连续缺失的块一次解码
+        """
+        blocks = {}
+        missing = []
+        with self._lock:
+            for index in range(first, last + 1):
+                block = self._lookup(("block", identity, index))
+                if block is None:
+                    missing.append(index)
+                else:
+                    blocks[index] = block
+
+        # 把缺失的块合并成连续区间，每个区间只启动一次解码
+        runs = []
+        for index in missing:
+            if runs and runs[-1][1] == index - 1:
+                runs[-1][1] = index
+            else:
+                runs.append([index, index])
+
+        for run_first, run_last in runs:
+            start_ms = run_first * self.block_ms
+            audio = read_pcm_range(path, start_ms, (run_last - run_first + 1) * self.block_ms)
+            for index in range(run_first, run_last + 1):
+                offset = (index - run_first) * self.block_ms
+                # 超出文件结尾的块为空，同样缓存，避免重复解码
+                block = audio[offset:offset + self.block_ms]
+                blocks[index] = block
+                self._store(("block", identity, index), block)
+
+        return [blocks[index] for index in range(first, last + 1)]
+
+    def render(self, source, operation, params, start_ms, end_ms, render_func):
+        """
+        获取操作在指定窗口上的处理结果，参数和窗口都不变时复用上次的结果
+
+        参数:
+            source: 音频文件路径、AudioHandle或AudioSegment对象
+            operation: 操作名称
+            params: 操作参数(可哈希)
+            start_ms: 源音频窗口的开始时间(毫秒)
+            end_ms: 源音频窗口的结束时间(毫秒)
+            render_func: 处理函数，参数为窗口内的源音频，返回AudioSegment对象
+
+        返回:
+            AudioSegment对象
+        """
+        if isinstance(source, AudioSegment):
+            # 内存中的临时音频没有稳定的标识，不缓存结果
+            return render_func(source[start_ms:end_ms])
+
+        path = source.path if isinstance(source, AudioHandle) else source
+        key = ("render", file_identity_key(path), operation, tuple(params), start_ms, end_ms)
+        with self._lock:
+            audio = self._lookup(key)
+        if audio is None:
+            audio = render_func(self.load_range(source, start_ms, end_ms))
+            self._store(key, audio)
+        return audio
+
+    def _lookup(self, key):
+        """
+        查找缓存项并标记为最近使用(调用方持有锁)
+        """
+        audio = self._entries.get(key)
+        if audio is not None:
+            self._entries.move_to_end(key)
+        return audio
+
+    def _store(self, key, audio):
+        """
+        放入缓存项，超出容量上限时淘汰最久未使用的项
+        """
+        size = len(audio.raw_data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.raw_data)
+            self._entries[key] = audio
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.raw_data)
+
+
+def _resident_audio(source):
+    """
+    获取已在内存中的音频，不触发解码
+    """
+    if isinstance(source, AudioSegment):
+        return source
+    if isinstance(source, AudioHandle) and source.is_loaded:
+        return source.audio
+    return None
+
+
+def source_duration_ms(source):
+    """
+    获取源音频时长(毫秒)，文件只读取文件信息，不解码
+
+    参数:
+        source: 音频文件路径、AudioHandle或AudioSegment对象
+
+    返回:
+        时长(毫秒)
+    """
+    if isinstance(source, AudioSegment):
+        return len(source)
+    if isinstance(source, AudioHandle):
+        return source.duration_ms
+    return probe_audio(source)['duration_ms']
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_preview_cache():
+    """
+    获取全局共享的预览渲染缓存
+
+    返回:
+        PreviewCache对象
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PreviewCache()
+        return _cache
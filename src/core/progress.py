@@ -0,0 +1,153 @@
+import re
+import subprocess
+import threading
+
+
+class OperationCancelled(Exception):
+    """
+    操作被用户取消时抛出的异常
+    """
+    pass
+
+
+class CancellationToken:
+    """
+    取消标记，由界面线程设置，由执行操作的线程定期检查
+
+    一个标记可以传给多个嵌套的操作，调用cancel()后所有检查点都会抛出OperationCancelled
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """
+        请求取消操作
+        """
+        self._event.set()
+
+    @property
+    def is_cancelled(self):
+        """
+        是否已请求取消
+        """
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """
+        已请求取消时抛出OperationCancelled
+        """
+        if self._event.is_set():
+            raise OperationCancelled("操作已取消")
+
+    def wait(self, timeout):
+        """
+        等待取消请求，最多等待timeout秒
+
+        返回:
+            是否已请求取消
+        """
+        return self._event.wait(timeout)
+
+
+def check_cancelled(cancel_token):
+    """
+    检查取消标记，cancel_token为None时不做任何事
+
+    参数:
+        cancel_token: CancellationToken对象或None
+    """
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+
+def report_progress(progress, fraction):
+    """
+    报告进度，progress为None时不做任何事
+
+    参数:
+        progress: 进度回调函数，参数为0到1之间的完成比例
+        fraction: 完成比例
+    """
+    if progress is not None:
+        progress(min(1.0, max(0.0, fraction)))
+
+
+def scale_progress(progress, start, end):
+    """
+    将子任务的进度(0到1)映射到总进度的[start, end]区间
+
+    参数:
+        progress: 总进度回调函数，可以为None
+        start: 子任务开始时的总进度
+        end: 子任务结束时的总进度
+
+    返回:
+        子任务使用的进度回调函数，progress为None时返回None
+    """
+    if progress is None:
+        return None
+    return lambda fraction: progress(start + (end - start) * fraction)
+
+
+# ffmpeg -progress输出中表示已处理时长的字段(单位均为微秒)
+_FFMPEG_TIME_PATTERN = re.compile(r'^out_time_(?:us|ms)=(\d+)$')
+
+
+def run_ffmpeg(cmd, duration_ms=None, progress=None, cancel_token=None, poll_interval=0.1):
+    """
+    执行ffmpeg命令，解析-progress输出报告进度，并响应取消请求
+
+    命令的标准输出会被用于进度信息，因此输出文件不能是pipe:1
+
+    参数:
+        cmd: ffmpeg命令列表，第一项为ffmpeg可执行文件
+        duration_ms: 输出的预计时长(毫秒)，用于计算完成比例，None表示不报告进度
+        progress: 进度回调函数(在读取线程中调用)
+        cancel_token: CancellationToken对象，取消时终止ffmpeg进程
+        poll_interval: 检查取消请求的间隔(秒)
+
+    返回:
+        ffmpeg的标准错误输出(bytes)
+    """
+    check_cancelled(cancel_token)
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    stderr_chunks = []
+
+    def read_progress():
+        for line in process.stdout:
+            match = _FFMPEG_TIME_PATTERN.match(line.decode('ascii', errors='ignore').strip())
+            if match and duration_ms:
+                report_progress(progress, int(match.group(1)) / 1000.0 / duration_ms)
+
+    def read_stderr():
+        stderr_chunks.append(process.stderr.read())
+
+    # 分别在线程中读取两个管道，避免任一管道写满导致ffmpeg阻塞
+    readers = [threading.Thread(target=read_progress, daemon=True), threading.Thread(target=read_stderr, daemon=True)]
+    for reader in readers:
+        reader.start()
+
+    try:
+        if cancel_token is None:
+            process.wait()
+        while process.poll() is None:
+            if cancel_token.wait(poll_interval):
+                raise OperationCancelled("操作已取消")
+    finally:
+        # 取消或出错时终止ffmpeg进程
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        for reader in readers:
+            reader.join()
+        process.stdout.close()
+        process.stderr.close()
+
+    stderr = b''.join(stderr_chunks)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    report_progress(progress, 1.0)
+    return stderr
@@ -0,0 +1,562 @@
+import json
+
+import numpy as np
+from pydub import AudioSegment
+
+from src.utils.config import get_config_value
+from .audio_processor import AudioProcessor, DECODE_PROGRESS_SHARE
+from .audio_probe import probe_audio
+from .audio_session import AudioHandle
+from .merge_engine import get_merge_format, harmonize_segment
+from .preview_cache import get_preview_cache
+from .progress import check_cancelled, report_progress, scale_progress
+from .sample_buffer import SampleBuffer, SILENT_POWER
+from .stream_engine import PcmFormat
+
+# 项目文件格式版本
+PROJECT_VERSION = 1
+
+class Clip:
+    """
+    项目中的一个片段: 引用源文件的一段时间范围，以及片段之前的空白、增益和淡入淡出
+
+    片段只记录编辑参数，不保存音频数据，渲染时才从源文件中解码所需范围
+    """
+
+    def __init__(self, source, source_start_ms, source_end_ms, gap_before_ms=0, gain_db=0.0,
+                 fade_in_ms=0, fade_out_ms=0):
+        """
+        参数:
+            source: 源音频文件路径或AudioHandle
+            source_start_ms: 在源文件中的开始时间(毫秒)
+            source_end_ms: 在源文件中的结束时间(毫秒)
+            gap_before_ms: 片段之前的空白时长(毫秒)
+            gain_db: 增益(分贝)
+            fade_in_ms: 淡入时长(毫秒)
+            fade_out_ms: 淡出时长(毫秒)
+        """
+        if source_end_ms < source_start_ms:
+            raise ValueError("片段的结束时间不能早于开始时间")
+        self.source = source
+        self.source_start_ms = source_start_ms
+        self.source_end_ms = source_end_ms
+        self.gap_before_ms = max(0, gap_before_ms)
+        self.gain_db = gain_db
+        self.fade_in_ms = max(0, fade_in_ms)
+        self.fade_out_ms = max(0, fade_out_ms)
+
+    @property
+    def path(self):
+        """
+        源文件路径
+        """
+        return self.source.path if isinstance(self.source, AudioHandle) else self.source
+
+    @property
+    def duration_ms(self):
+        """
+        片段时长(毫秒)，不含之前的空白
+        """
+        return self.source_end_ms - self.source_start_ms
+
+    @property
+    def is_plain(self):
+        """
+        是否只是源文件中的一段(没有之前的空白、增益和淡入淡出)
+        """
+        return not (self.gap_before_ms or self.gain_db or self.fade_in_ms or self.fade_out_ms)
+
+    def copy(self, **changes):
+        """
+        复制片段，可同时修改部分参数
+
+        参数:
+            **changes: 要修改的参数(与构造函数的参数同名)
+
+        返回:
+            新的Clip对象
+        """
+        values = self.to_dict()
+        values["source"] = self.source
+        values.update(changes)
+        return Clip(**values)
+
+    def to_dict(self):
+        """
+        转换为可序列化的字典
+        """
+        return {
+            "source": self.path,
+            "source_start_ms": self.source_start_ms,
+            "source_end_ms": self.source_end_ms,
+            "gap_before_ms": self.gap_before_ms,
+            "gain_db": self.gain_db,
+            "fade_in_ms": self.fade_in_ms,
+            "fade_out_ms": self.fade_out_ms
+        }
+
+    def render(self, start_ms=0, end_ms=None, loader=None):
+        """
+        渲染片段中的一段，只解码源文件中对应的范围，输出为源文件的格式
+
+        参数:
+            start_ms: 片段内的开始时间(毫秒)
+            end_ms: 片段内的结束时间(毫秒)，None表示到片段结尾
+            loader: 加载源音频范围的函数，参数与AudioProcessor.load_audio_range相同，
+                    None表示使用AudioProcessor.load_audio_range
+
+        返回:
+            AudioSegment对象
+        """
+        loader = loader or AudioProcessor.load_audio_range
+        fmt = get_merge_format([loader(self.source, 0, 1)])
+        end_ms = self.duration_ms if end_ms is None else min(end_ms, self.duration_ms)
+        return self.render_frames(fmt, fmt.ms_to_frames(max(0, start_ms)), fmt.ms_to_frames(end_ms),
+                                  fmt.ms_to_frames(self.duration_ms), loader)
+
+    def render_frames(self, fmt, first, last, clip_frames, loader=None):
+        """
+        按帧渲染片段中的一段，增益和淡入淡出逐帧计算
+
+        源音频按整秒边界加载(整秒对应的帧号总是整数)，并按片段内的帧号计算淡入淡出，
+        因此无论窗口从哪里开始，同一帧的渲染结果都与渲染整个片段时相同
+
+        参数:
+            fmt: 输出的PcmFormat
+            first: 片段内的起始帧
+            last: 片段内的结束帧(不含)
+            clip_frames: 片段的总帧数，决定淡出的位置
+            loader: 加载源音频范围的函数，None表示使用AudioProcessor.load_audio_range
+
+        返回:
+            AudioSegment对象，格式为fmt，长度为last - first帧
+        """
+        first = max(0, first)
+        last = min(last, clip_frames)
+        if last <= first:
+            return _silent_frames(fmt, 0)
+
+        loader = loader or AudioProcessor.load_audio_range
+        rate = fmt.frame_rate
+        # 片段起点在源文件中对应的帧(按输出采样率)
+        origin = fmt.ms_to_frames(self.source_start_ms)
+        first_second = (origin + first) // rate
+        last_second = -(-(origin + last) // rate)
+        chunk = loader(self.source, first_second * 1000, last_second * 1000)
+        if not chunk.raw_data:
+            return _silent_frames(fmt, last - first)
+
+        buffer = SampleBuffer.from_segment(harmonize_segment(chunk, fmt))
+        offset = origin + first - first_second * rate
+        samples = buffer.samples[offset:offset + last - first]
+        if len(samples) < last - first:
+            # 片段超出源文件结尾的部分为静音
+            samples = np.pad(samples, ((0, last - first - len(samples)), (0, 0)))
+        buffer = SampleBuffer(samples, rate, buffer.sample_width, buffer.output_width).apply_gain(self.gain_db)
+
+        fade_in = fmt.ms_to_frames(self.fade_in_ms)
+        if first < fade_in:
+            stop = min(last, fade_in)
+            buffer = buffer.apply_ramp(0, SampleBuffer.linear_ramp(SILENT_POWER, 1.0, fade_in, first, stop))
+        fade_out = min(fmt.ms_to_frames(self.fade_out_ms), clip_frames)
+        fade_out_start = clip_frames - fade_out
+        if fade_out and last > fade_out_start:
+            start = max(first, fade_out_start)
+            ramp = SampleBuffer.linear_ramp(1.0, SILENT_POWER, fade_out,
+                                            start - fade_out_start, last - fade_out_start)
+            buffer = buffer.apply_ramp(start - first, ramp)
+        return harmonize_segment(buffer.to_segment(), fmt)
+
+
+class Project:
+    """
+    非破坏性编辑项目: 以编辑决策列表(EDL)的形式记录片段的排列、空白、增益和淡入淡出
+
+    编辑操作只修改片段列表，不解码也不写文件；
+    只有预览或导出时才渲染，且预览只渲染需要播放的时间范围
+    """
+
+    def __init__(self, clips=None):
+        """
+        参数:
+            clips: 初始Clip列表
+        """
+        self.clips = list(clips or [])
+
+    @classmethod
+    def from_sequence(cls, sources, gaps_ms=None, durations_ms=None):
+        """
+        根据文件列表和间隙创建项目(与合并音频的参数一致)
+
+        参数:
+            sources: 音频文件路径或AudioHandle列表
+            gaps_ms: 间隙长度列表(毫秒)，gaps_ms[i]为第i个和第i+1个文件之间的间隙
+            durations_ms: 各文件的时长(毫秒)，None表示读取文件信息获取
+
+        返回:
+            Project对象
+        """
+        project = cls()
+        for i, source in enumerate(sources):
+            gap = gaps_ms[i - 1] if i > 0 and gaps_ms and i - 1 < len(gaps_ms) else 0
+            duration = durations_ms[i] if durations_ms else None
+            project.add_clip(source, end_ms=duration, gap_before_ms=gap)
+        return project
+
+    def add_clip(self, source, start_ms=0, end_ms=None, gap_before_ms=0, index=None):
+        """
+        添加片段
+
+        参数:
+            source: 源音频文件路径或AudioHandle
+            start_ms: 在源文件中的开始时间(毫秒)
+            end_ms: 在源文件中的结束时间(毫秒)，None表示到源文件结尾
+            gap_before_ms: 片段之前的空白时长(毫秒)
+            index: 插入位置，None表示添加到末尾
+
+        返回:
+            新的Clip对象
+        """
+        if end_ms is None:
+            info = source.info if isinstance(source, AudioHandle) else probe_audio(source)
+            end_ms = int(round(info['duration_ms']))
+        clip = Clip(source, start_ms, end_ms, gap_before_ms)
+        if index is None:
+            self.clips.append(clip)
+        else:
+            self.clips.insert(index, clip)
+        return clip
+
+    def remove_clip(self, index):
+        """
+        删除片段
+
+        参数:
+            index: 片段位置
+        """
+        del self.clips[index]
+
+    def update_clip(self, index, **changes):
+        """
+        修改片段的参数，例如gain_db、fade_in_ms、gap_before_ms
+
+        参数:
+            index: 片段位置
+            **changes: 要修改的参数
+        """
+        self.clips[index] = self.clips[index].copy(**changes)
+
+    def copy(self):
+        """
+        复制项目(片段只在修改时替换，不需要逐个复制)，用于撤销和在后台线程中渲染
+
+        返回:
+            Project对象
+        """
+        return Project(self.clips)
+
+    def adjust_gain(self, volume_db):
+        """
+        调整整个项目的音量，只修改片段的增益
+
+        参数:
+            volume_db: 音量调整值(分贝)
+        """
+        for index, clip in enumerate(self.clips):
+            self.update_clip(index, gain_db=clip.gain_db + volume_db)
+
+    def set_fade_in(self, fade_ms):
+        """
+        设置项目开头的淡入(作用于第一个片段)
+
+        参数:
+            fade_ms: 淡入时长(毫秒)
+        """
+        if self.clips:
+            self.update_clip(0, fade_in_ms=min(max(0, fade_ms), self.clips[0].duration_ms))
+
+    def set_fade_out(self, fade_ms):
+        """
+        设置项目结尾的淡出(作用于最后一个片段)
+
+        参数:
+            fade_ms: 淡出时长(毫秒)
+        """
+        if self.clips:
+            self.update_clip(-1, fade_out_ms=min(max(0, fade_ms), self.clips[-1].duration_ms))
+
+    def clip_offsets(self):
+        """
+        计算每个片段在时间轴上的开始时间
+
+        返回:
+            开始时间(毫秒)列表
+        """
+        offsets = []
+        position = 0
+        for clip in self.clips:
+            position += clip.gap_before_ms
+            offsets.append(position)
+            position += clip.duration_ms
+        return offsets
+
+    @property
+    def duration_ms(self):
+        """
+        项目总时长(毫秒)
+        """
+        return sum(clip.gap_before_ms + clip.duration_ms for clip in self.clips)
+
+    def delete_range(self, start_ms, end_ms):
+        """
+        从时间轴上删除一段(片段和空白)，只修改片段列表
+
+        参数:
+            start_ms: 开始时间(毫秒)
+            end_ms: 结束时间(毫秒)
+        """
+        if end_ms <= start_ms:
+            return
+
+        clips = []
+        pending_gap = 0  # 保留下来的空白，加到下一个保留的片段之前
+        position = 0
+        for clip in self.clips:
+            gap_start, clip_start = position, position + clip.gap_before_ms
+            clip_end = clip_start + clip.duration_ms
+            position = clip_end
+
+            removed_gap = max(0, min(clip_start, end_ms) - max(gap_start, start_ms))
+            pending_gap += clip.gap_before_ms - removed_gap
+
+            if clip_start < start_ms:
+                # 保留删除范围之前的部分，删除范围从片段中间开始时去掉淡出
+                keep_end = min(clip_end, start_ms) - clip_start
+                trimmed = keep_end < clip.duration_ms
+                clips.append(clip.copy(
+                    source_end_ms=clip.source_start_ms + keep_end,
+                    gap_before_ms=pending_gap,
+                    fade_in_ms=min(clip.fade_in_ms, keep_end),
+                    fade_out_ms=0 if trimmed else clip.fade_out_ms
+                ))
+                pending_gap = 0
+            if clip_end > end_ms:
+                # 保留删除范围之后的部分，删除范围在片段中间结束时去掉淡入
+                keep_start = max(clip_start, end_ms) - clip_start
+                trimmed = keep_start > 0
+                clips.append(clip.copy(
+                    source_start_ms=clip.source_start_ms + keep_start,
+                    gap_before_ms=pending_gap,
+                    fade_in_ms=0 if trimmed else clip.fade_in_ms,
+                    fade_out_ms=min(clip.fade_out_ms, clip.duration_ms - keep_start)
+                ))
+                pending_gap = 0
+        self.clips = clips
+
+    def trim(self, start_ms, end_ms):
+        """
+        只保留时间轴上的指定范围(剪切)
+
+        参数:
+            start_ms: 开始时间(毫秒)
+            end_ms: 结束时间(毫秒)
+        """
+        self.delete_range(end_ms, self.duration_ms)
+        self.delete_range(0, start_ms)
+
+    def render_range(self, start_ms=0, end_ms=None, progress=None, cancel_token=None, loader=None):
+        """
+        渲染时间轴上的一段，只解码与该范围重叠的片段的对应部分
+
+        参数:
+            start_ms: 开始时间(毫秒)
+            end_ms: 结束时间(毫秒)，None表示到项目结尾
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+            loader: 加载源音频范围的函数，None表示使用AudioProcessor.load_audio_range
+
+        返回:
+            AudioSegment对象，帧数与整体渲染结果中该范围的帧数相同
+        """
+        start_ms = max(0, start_ms)
+        end_ms = self.duration_ms if end_ms is None else end_ms
+        if end_ms <= start_ms:
+            return AudioSegment.empty()
+
+        loader = loader or AudioProcessor.load_audio_range
+        fmt = self.output_format(loader)
+        # 时间轴上的位置统一换算为输出格式的帧，窗口与整体渲染时的帧位置完全一致
+        first = fmt.ms_to_frames(start_ms)
+        last = fmt.ms_to_frames(end_ms)
+        visible = []
+        for offset, clip in zip(self.clip_offsets(), self.clips):
+            clip_first = fmt.ms_to_frames(offset)
+            clip_last = fmt.ms_to_frames(offset + clip.duration_ms)
+            if clip_first < last and clip_last > first:
+                visible.append((clip_first, clip_last, clip))
+
+        # 缓冲区初始为0，未写入的部分即为空白
+        buffer = bytearray((last - first) * fmt.frame_width)
+        for i, (clip_first, clip_last, clip) in enumerate(visible):
+            check_cancelled(cancel_token)
+            segment = clip.render_frames(fmt, first - clip_first, last - clip_first,
+                                         clip_last - clip_first, loader)
+            start = max(clip_first, first) - first
+            buffer[start * fmt.frame_width:start * fmt.frame_width + len(segment.raw_data)] = segment.raw_data
+            report_progress(progress, (i + 1) / float(len(visible)))
+
+        return AudioSegment(
+            data=bytes(buffer),
+            sample_width=fmt.sample_width,
+            frame_rate=fmt.frame_rate,
+            channels=fmt.channels
+        )
+
+    def output_format(self, loader=None):
+        """
+        获取渲染结果的格式: 取所有片段源文件中最大的采样位宽、采样率和声道数
+        (与合并音频的格式规则一致，窗口渲染和整体渲染的格式相同)
+
+        参数:
+            loader: 加载源音频范围的函数，None表示使用AudioProcessor.load_audio_range
+
+        返回:
+            PcmFormat对象，没有片段时为16位、44100Hz单声道
+        """
+        loader = loader or AudioProcessor.load_audio_range
+        heads = {}
+        for clip in self.clips:
+            if clip.path not in heads:
+                heads[clip.path] = loader(clip.source, 0, 1)
+        if not heads:
+            return PcmFormat(2, 44100, 1)
+        return get_merge_format(list(heads.values()))
+
+    def render(self, outputs, progress=None, cancel_token=None):
+        """
+        渲染整个项目并导出，所有编辑只在此时解码和编码一次
+
+        项目只是源文件中的一段且没有增益和淡入淡出时，按剪切导出(可以流复制时不重新编码)
+
+        参数:
+            outputs: 输出文件路径，或AudioProcessor.export_multi支持的输出列表
+            progress: 进度回调函数，参数为0到1之间的完成比例
+            cancel_token: CancellationToken对象，用于取消操作
+
+        返回:
+            bool: 是否使用了流复制，False表示进行了重新编码
+        """
+        if isinstance(outputs, str) and len(self.clips) == 1:
+            clip = self.clips[0]
+            if clip.is_plain:
+                return AudioProcessor.cut_audio(clip.source, outputs, clip.source_start_ms, clip.source_end_ms,
+                                                progress=progress, cancel_token=cancel_token)
+
+        if isinstance(outputs, str):
+            outputs = [outputs]
+        audio = self.render_range(
+            progress=scale_progress(progress, 0.0, DECODE_PROGRESS_SHARE),
+            cancel_token=cancel_token
+        )
+        AudioProcessor.export_multi(audio, outputs,
+                                    progress=scale_progress(progress, DECODE_PROGRESS_SHARE, 1.0),
+                                    cancel_token=cancel_token)
+        return False
+
+    def render_source(self, source, duration_ms, end_ms=None, loader=None):
+        """
+        获取项目的结果，作为倒放、变速和编辑链等无法记录为片段参数的处理的输入
+
+        项目未经编辑(只有source的完整内容)时直接返回source，不解码
+
+        参数:
+            source: 项目最初载入的音频(路径或AudioHandle)
+            duration_ms: source的时长(毫秒)
+            end_ms: 只需要项目开头到end_ms的部分(预览)，None表示整个项目
+            loader: 加载源音频范围的函数，None表示使用AudioProcessor.load_audio_range
+
+        返回:
+            source或渲染得到的AudioSegment对象
+        """
+        if len(self.clips) == 1:
+            clip = self.clips[0]
+            if (clip.source is source and clip.is_plain and clip.source_start_ms <= 0
+                    and clip.source_end_ms >= duration_ms):
+                return source
+        end_ms = self.duration_ms if end_ms is None else min(end_ms, self.duration_ms)
+        return self.render_range(0, end_ms, loader=loader)
+
+    def preview(self, start_ms=0, duration_ms=None, loop=False):
+        """
+        预览项目，只渲染需要播放的范围，源音频通过预览缓存加载
+
+        参数:
+            start_ms: 开始时间(毫秒)
+            duration_ms: 预览时长(毫秒)，None表示使用preview_window_ms配置值
+            loop: 是否循环播放
+        """
+        if duration_ms is None:
+            duration_ms = int(get_config_value("preview_window_ms", 15000))
+        end_ms = min(self.duration_ms, start_ms + duration_ms)
+        audio = self.render_range(start_ms, end_ms, loader=get_preview_cache().load_range)
+        AudioProcessor.preview_audio(audio, loop=loop)
+
+    def to_dict(self):
+        """
+        转换为可序列化的字典
+        """
+        return {
+            "version": PROJECT_VERSION,
+            "clips": [clip.to_dict() for clip in self.clips]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        从字典创建项目
+
+        参数:
+            data: to_dict()返回的字典
+
+        返回:
+            Project对象
+        """
+        if data.get("version", PROJECT_VERSION) > PROJECT_VERSION:
+            raise ValueError("项目文件的版本过新，无法打开")
+        return cls([Clip(**clip) for clip in data.get("clips", [])])
+
+    def save(self, file_path):
+        """
+        保存项目文件(JSON)，只保存编辑参数和源文件路径
+
+        参数:
+            file_path: 项目文件路径
+        """
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=4)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        打开项目文件
+
+        参数:
+            file_path: 项目文件路径
+
+        返回:
+            Project对象
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def _silent_frames(fmt, frames):
+    """
+    创建指定格式和帧数的静音
+    """
+    return AudioSegment(
+        data=bytes(frames * fmt.frame_width),
+        sample_width=fmt.sample_width,
+        frame_rate=fmt.frame_rate,
+        channels=fmt.channels
+    )
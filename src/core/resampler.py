@@ -0,0 +1,268 @@
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pydub import AudioSegment
+
+from src.utils.config import get_config_value
+
+# 重采样模式: 高质量(加窗sinc插值，带抗混叠滤波)和快速(线性插值)
+QUALITY_MODE = "quality"
+FAST_MODE = "fast"
+RESAMPLE_MODES = (QUALITY_MODE, FAST_MODE)
+
+# 高质量模式下sinc核单侧的过零点数，越大过渡带越窄
+SINC_ZERO_CROSSINGS = 16
+
+# 凯撒窗参数，约对应80dB的阻带衰减
+KAISER_BETA = 8.6
+
+# 预先计算的滤波器相位数上限，采样率之比的分母超过该值时按最接近的相位取整
+MAX_PHASES = 1024
+
+# 每次处理的输出帧数，限制临时数组的大小
+BLOCK_FRAMES = 65536
+
+
+def get_resample_mode(mode=None):
+    """
+    获取重采样模式，未指定时使用resample_mode配置值
+
+    参数:
+        mode: QUALITY_MODE、FAST_MODE或None
+
+    返回:
+        重采样模式
+    """
+    if mode is None:
+        mode = get_config_value("resample_mode", QUALITY_MODE)
+    if mode not in RESAMPLE_MODES:
+        raise ValueError(f"未知的重采样模式: {mode}")
+    return mode
+
+
+def bytes_to_array(data, sample_width, channels):
+    """
+    将PCM数据转换为形状为(帧数, 声道数)的int32数组，采样值按32位满幅对齐
+
+    参数:
+        data: PCM数据(小端有符号整数，与pydub一致)
+        sample_width: 采样位宽(字节)，1到4
+        channels: 声道数
+
+    返回:
+        int32数组
+    """
+    if sample_width == 3:
+        # 24位采样放入32位整数的高3个字节
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        samples = np.zeros((len(raw), 4), dtype=np.uint8)
+        samples[:, 1:] = raw
+        samples = samples.view('<i4').ravel()
+    else:
+        dtype = {1: np.int8, 2: '<i2', 4: '<i4'}[sample_width]
+        samples = np.frombuffer(data, dtype=dtype).astype(np.int32)
+        if sample_width < 4:
+            samples <<= 32 - 8 * sample_width
+    return samples.reshape(-1, channels)
+
+
+def array_to_bytes(samples, sample_width):
+    """
+    将按32位满幅对齐的采样转换为指定位宽的PCM数据
+
+    浮点采样四舍五入并限幅，整数采样直接截去低位(与audioop.lin2lin一致)
+
+    参数:
+        samples: 二维数组，int32或浮点
+        sample_width: 采样位宽(字节)，1到4
+
+    返回:
+        bytes
+    """
+    shift = 32 - 8 * sample_width
+    if samples.dtype.kind == 'f':
+        scaled = np.rint(samples / float(1 << shift))
+        limit = 1 << (8 * sample_width - 1)
+        np.clip(scaled, -limit, limit - 1, out=scaled)
+        samples = scaled.astype(np.int32)
+    elif shift:
+        samples = samples >> shift
+
+    if sample_width == 3:
+        return np.ascontiguousarray(samples, dtype='<i4').view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    dtype = {1: np.int8, 2: '<i2', 4: '<i4'}[sample_width]
+    return samples.astype(dtype).tobytes()
+
+
+def convert_channels(samples, channels):
+    """
+    转换声道数: 单声道复制到各个声道，多声道取平均混合为单声道
+
+    参数:
+        samples: 形状为(帧数, 声道数)的数组
+        channels: 目标声道数
+
+    返回:
+        转换后的数组(多声道混合为单声道时为浮点数组)
+    """
+    source_channels = samples.shape[1]
+    if source_channels == channels:
+        return samples
+    if source_channels == 1:
+        return np.repeat(samples, channels, axis=1)
+    if channels == 1:
+        return samples.mean(axis=1, keepdims=True)
+    raise ValueError(f"不支持从{source_channels}声道转换为{channels}声道")
+
+
+def _kaiser(positions, half_width):
+    """
+    计算凯撒窗在指定位置的值，|positions| >= half_width时为0
+    """
+    ratio = np.clip(positions / half_width, -1.0, 1.0)
+    return np.i0(KAISER_BETA * np.sqrt(1.0 - ratio * ratio)) / np.i0(KAISER_BETA)
+
+
+class _SincTable:
+    """
+    加窗sinc插值滤波器表: 每个小数相位对应一组抽头系数
+    """
+
+    def __init__(self, from_rate, to_rate):
+        # 降采样时截止频率降为目标采样率的奈奎斯特频率，同时按比例加宽滤波器
+        self.cutoff = min(1.0, to_rate / float(from_rate))
+        self.half_taps = int(np.ceil(SINC_ZERO_CROSSINGS / self.cutoff))
+        self.offsets = np.arange(-self.half_taps + 1, self.half_taps + 1)
+
+        divisor = gcd(from_rate, to_rate)
+        self.up = to_rate // divisor      # 采样率之比的分子和分母(输出每up帧对应输入down帧)
+        self.down = from_rate // divisor
+        self.phases = min(self.up, MAX_PHASES)
+        fractions = np.arange(self.phases) / float(self.phases)
+        distance = self.offsets[np.newaxis, :] - fractions[:, np.newaxis]
+        table = self.cutoff * np.sinc(self.cutoff * distance) * _kaiser(distance, self.half_taps)
+        # 每个相位的系数之和归一化为1，直流增益不变；按抽头存放，便于逐个抽头取系数
+        self.table = np.ascontiguousarray((table / table.sum(axis=1, keepdims=True)).T)
+
+
+def _resample_polyphase(padded, pad, out_frames, table):
+    """
+    按多相结构计算全部输出帧，要求table.phases == table.up
+
+    输出帧序号除以up的余数相同的帧使用同一组系数，且对应的输入位置间隔固定为down帧，
+    因此每组输出都是输入滑动窗口的等间隔子集与系数向量的矩阵乘法
+    """
+    windows = sliding_window_view(padded, len(table.offsets), axis=0)
+    output = np.empty((out_frames, padded.shape[1]), dtype=np.float64)
+    rows_per_block = max(1, BLOCK_FRAMES // table.up)
+    for residue in range(min(table.up, out_frames)):
+        base, phase = divmod(residue * table.down, table.up)
+        first = base + pad + table.offsets[0]
+        count = len(range(residue, out_frames, table.up))
+        coefficients = table.table[:, phase]
+        for row in range(0, count, rows_per_block):
+            rows = min(rows_per_block, count - row)
+            start = first + row * table.down
+            selected = windows[start:start + (rows - 1) * table.down + 1:table.down]
+            output[residue + row * table.up:residue + (row + rows) * table.up:table.up] = selected @ coefficients
+    return output
+
+
+def _resample_block(padded, pad, positions, table):
+    """
+    按高质量模式计算一组输出帧，用于采样率之比的分母过大、无法使用多相结构的情况
+
+    参数:
+        padded: 两端补0后的输入(帧数, 声道数)，浮点
+        pad: 开头补0的帧数
+        positions: 输出帧在输入中的位置(浮点，单位为输入帧)
+        table: _SincTable对象
+    """
+    base = np.floor(positions).astype(np.int64)
+    phase = np.rint((positions - base) * table.phases).astype(np.int64)
+    # 小数部分取整到1时进位到下一帧
+    carry = phase == table.phases
+    base[carry] += 1
+    phase[carry] = 0
+
+    base += pad
+    output = np.zeros((len(positions), padded.shape[1]), dtype=np.float64)
+    for index, offset in enumerate(table.offsets):
+        output += padded[base + offset] * table.table[index][phase][:, np.newaxis]
+    return output
+
+
+def resample(samples, from_rate, to_rate, mode=None):
+    """
+    改变采样率
+
+    参数:
+        samples: 形状为(帧数, 声道数)的数组
+        from_rate: 原采样率
+        to_rate: 目标采样率
+        mode: QUALITY_MODE、FAST_MODE或None(使用配置值)
+
+    返回:
+        float64数组，帧数为原帧数按采样率之比换算后取整
+    """
+    mode = get_resample_mode(mode)
+    frames = len(samples)
+    out_frames = int(round(frames * to_rate / float(from_rate)))
+    if from_rate == to_rate:
+        return samples.astype(np.float64)
+    if frames == 0 or out_frames == 0:
+        return np.zeros((out_frames, samples.shape[1]), dtype=np.float64)
+
+    step = from_rate / float(to_rate)
+    if mode == FAST_MODE:
+        positions = np.arange(out_frames, dtype=np.float64) * step
+        source = np.arange(frames, dtype=np.float64)
+        output = np.empty((out_frames, samples.shape[1]), dtype=np.float64)
+        for channel in range(samples.shape[1]):
+            output[:, channel] = np.interp(positions, source, samples[:, channel])
+        return output
+
+    table = _SincTable(from_rate, to_rate)
+    pad = table.half_taps + 1
+    padded = np.zeros((frames + 2 * pad, samples.shape[1]), dtype=np.float64)
+    padded[pad:pad + frames] = samples
+    if table.phases == table.up:
+        return _resample_polyphase(padded, pad, out_frames, table)
+
+    output = np.empty((out_frames, samples.shape[1]), dtype=np.float64)
+    for start in range(0, out_frames, BLOCK_FRAMES):
+        end = min(start + BLOCK_FRAMES, out_frames)
+        positions = np.arange(start, end, dtype=np.float64) * step
+        output[start:end] = _resample_block(padded, pad, positions, table)
+    return output
+
+
+def convert_segment(segment, fmt, mode=None):
+    """
+    将音频转换为指定的采样位宽、采样率和声道数
+
+    参数:
+        segment: AudioSegment对象
+        fmt: 目标PcmFormat
+        mode: 重采样模式，None表示使用配置值
+
+    返回:
+        转换后的AudioSegment对象，格式相同时返回原对象
+    """
+    if (segment.sample_width, segment.frame_rate, segment.channels) == tuple(fmt):
+        return segment
+
+    samples = bytes_to_array(segment.raw_data, segment.sample_width, segment.channels)
+    # 在声道数较少的一侧重采样，减少计算量
+    if fmt.channels < segment.channels:
+        samples = convert_channels(samples, fmt.channels)
+    if segment.frame_rate != fmt.frame_rate:
+        samples = resample(samples, segment.frame_rate, fmt.frame_rate, mode)
+    samples = convert_channels(samples, fmt.channels)
+    return AudioSegment(
+        data=array_to_bytes(samples, fmt.sample_width),
+        sample_width=fmt.sample_width,
+        frame_rate=fmt.frame_rate,
+        channels=fmt.channels
+    )
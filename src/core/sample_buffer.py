@@ -0,0 +1,362 @@
+import numpy as np
+from pydub import AudioSegment
+from pydub.utils import db_to_float
+
+from .time_stretch import time_stretch
+
+# 采样位宽(字节) -> 整数采样的NumPy类型
+_INT_DTYPES = {
+    2: np.int16,
+    4: np.int32
+}
+
+# 采样位宽(字节) -> 处理时使用的浮点类型(float32不足以精确表示32位采样)
+_FLOAT_DTYPES = {
+    2: np.float32,
+    4: np.float64
+}
+
+# 淡入淡出的最低增益，与pydub的fade_in/fade_out一致
+SILENT_POWER = db_to_float(-120)
+
+
+class SampleBuffer:
+    """
+    以NumPy数组(帧数 × 声道数)表示的音频数据
+
+    从AudioSegment创建时直接引用原始数据(不复制)，切片和倒放返回视图；
+    增益、变速等效果按向量运算处理，结果为浮点采样(数值范围与整数采样相同)，
+    连续处理时不再量化，只在转换回AudioSegment时量化为原来的采样位宽
+    """
+
+    def __init__(self, samples, frame_rate, sample_width, output_width=None):
+        """
+        参数:
+            samples: 形状为(帧数, 声道数)的数组，整数采样或浮点采样
+            frame_rate: 采样率
+            sample_width: 整数采样的位宽(字节)，2或4
+            output_width: 转换回AudioSegment时的采样位宽(字节)，None表示与sample_width相同
+        """
+        if samples.ndim != 2:
+            raise ValueError("采样数组必须是二维的(帧数 × 声道数)")
+        self.samples = samples
+        self.frame_rate = frame_rate
+        self.sample_width = sample_width
+        self.output_width = output_width or sample_width
+
+    @classmethod
+    def from_segment(cls, audio):
+        """
+        从AudioSegment创建，16位和32位音频直接引用原始数据，不复制；
+        8位和24位音频按16位/32位处理，to_segment时转换回原来的位宽
+
+        参数:
+            audio: AudioSegment对象
+
+        返回:
+            SampleBuffer对象
+        """
+        original_width = audio.sample_width
+        if audio.sample_width not in _INT_DTYPES:
+            # 8位和24位音频先转换为16位/32位
+            audio = audio.set_sample_width(2 if audio.sample_width == 1 else 4)
+        dtype = _INT_DTYPES[audio.sample_width]
+        samples = np.frombuffer(audio.raw_data, dtype=dtype).reshape(-1, audio.channels)
+        return cls(samples, audio.frame_rate, audio.sample_width, original_width)
+
+    @classmethod
+    def silent(cls, duration_ms, frame_rate=44100, channels=1, sample_width=2):
+        """
+        创建静音
+
+        参数:
+            duration_ms: 时长(毫秒)
+            frame_rate: 采样率
+            channels: 声道数
+            sample_width: 采样位宽(字节)
+
+        返回:
+            SampleBuffer对象
+        """
+        frames = int(round(duration_ms * frame_rate / 1000.0))
+        return cls(np.zeros((frames, channels), dtype=_INT_DTYPES[sample_width]), frame_rate, sample_width)
+
+    def to_segment(self):
+        """
+        转换为AudioSegment，浮点采样在此时量化为整数，位宽为output_width
+
+        返回:
+            AudioSegment对象
+        """
+        samples = self._as_int()
+        if not samples.flags.c_contiguous and samples.strides[1] == samples.itemsize:
+            # 倒放等视图的帧内数据连续，按整帧复制比逐个采样复制快得多
+            samples = samples.view(np.dtype((np.void, samples.itemsize * self.channels)))
+        audio = AudioSegment(
+            data=samples.tobytes(),
+            sample_width=self.sample_width,
+            frame_rate=self.frame_rate,
+            channels=self.channels
+        )
+        if self.output_width != self.sample_width:
+            audio = audio.set_sample_width(self.output_width)
+        return audio
+
+    @property
+    def channels(self):
+        """
+        声道数
+        """
+        return self.samples.shape[1]
+
+    @property
+    def frame_count(self):
+        """
+        帧数
+        """
+        return self.samples.shape[0]
+
+    @property
+    def duration_ms(self):
+        """
+        时长(毫秒)
+        """
+        return self.frame_count * 1000.0 / self.frame_rate
+
+    def __len__(self):
+        # 与AudioSegment一致，长度为取整后的毫秒数
+        return int(round(self.duration_ms))
+
+    def ms_to_frames(self, ms):
+        """
+        将毫秒转换为帧数，结果限制在音频范围内
+        """
+        return min(self.frame_count, max(0, int(round(ms * self.frame_rate / 1000.0))))
+
+    def _derive(self, samples):
+        """
+        基于当前格式创建新的SampleBuffer
+        """
+        return SampleBuffer(samples, self.frame_rate, self.sample_width, self.output_width)
+
+    @property
+    def is_float(self):
+        """
+        是否为未量化的浮点采样
+        """
+        return self.samples.dtype.kind == 'f'
+
+    def _to_float(self, samples):
+        """
+        将采样转换为浮点类型(总是返回新数组，可以原地修改)
+        """
+        return samples.astype(_FLOAT_DTYPES[self.sample_width])
+
+    def _quantize(self, samples):
+        """
+        将浮点采样四舍五入并限幅为输出采样位宽的整数
+        """
+        dtype = _INT_DTYPES[self.sample_width]
+        info = np.iinfo(dtype)
+        rounded = np.rint(samples)
+        np.clip(rounded, info.min, info.max, out=rounded)
+        return rounded.astype(dtype)
+
+    def _as_int(self):
+        """
+        获取按输出采样位宽量化后的整数采样
+        """
+        if self.is_float:
+            return self._quantize(self.samples)
+        dtype = _INT_DTYPES[self.sample_width]
+        return self.samples if self.samples.dtype == dtype else self.samples.astype(dtype)
+
+    def _scaled(self, factor):
+        """
+        将全部采样乘以factor，返回浮点采样
+        """
+        if self.is_float:
+            return self._derive(self.samples * factor)
+        samples = self._to_float(self.samples)
+        samples *= factor
+        return self._derive(samples)
+
+    def slice(self, start_ms=0, end_ms=None):
+        """
+        截取一段音频，返回视图，不复制数据
+
+        参数:
+            start_ms: 开始时间(毫秒)
+            end_ms: 结束时间(毫秒)，None表示到结尾
+
+        返回:
+            SampleBuffer对象
+        """
+        start = self.ms_to_frames(start_ms)
+        end = self.frame_count if end_ms is None else self.ms_to_frames(end_ms)
+        return self._derive(self.samples[start:max(start, end)])
+
+    def remove(self, start_ms, end_ms):
+        """
+        删除一段音频
+
+        参数:
+            start_ms: 开始时间(毫秒)
+            end_ms: 结束时间(毫秒)
+
+        返回:
+            SampleBuffer对象
+        """
+        start = self.ms_to_frames(start_ms)
+        end = max(start, self.ms_to_frames(end_ms))
+        return self._derive(np.concatenate((self.samples[:start], self.samples[end:])))
+
+    def insert_silence(self, position_ms, duration_ms):
+        """
+        在指定位置插入静音，位置超过音频长度时追加在结尾
+
+        参数:
+            position_ms: 插入位置(毫秒)
+            duration_ms: 静音时长(毫秒)
+
+        返回:
+            SampleBuffer对象
+        """
+        position = self.ms_to_frames(position_ms)
+        frames = max(0, int(round(duration_ms * self.frame_rate / 1000.0)))
+        silence = np.zeros((frames, self.channels), dtype=self.samples.dtype)
+        return self._derive(np.concatenate((self.samples[:position], silence, self.samples[position:])))
+
+    def reverse(self):
+        """
+        倒放，返回视图，不复制数据
+
+        返回:
+            SampleBuffer对象
+        """
+        return self._derive(self.samples[::-1])
+
+    def apply_gain(self, volume_db):
+        """
+        调整音量
+
+        参数:
+            volume_db: 音量调整值(分贝)
+
+        返回:
+            SampleBuffer对象
+        """
+        if volume_db == 0:
+            return self
+        return self._scaled(db_to_float(volume_db))
+
+    def normalize(self, headroom_db=0.1):
+        """
+        音量标准化，将峰值调整到满幅以下headroom_db分贝(与pydub的effects.normalize一致)
+
+        参数:
+            headroom_db: 峰值与满幅之间保留的余量(分贝)
+
+        返回:
+            SampleBuffer对象
+        """
+        if not self.samples.size:
+            return self
+        # 分别取最大值和最小值，避免整数取绝对值时溢出
+        peak = max(abs(float(self.samples.max())), abs(float(self.samples.min())))
+        if peak == 0:
+            return self
+        target = db_to_float(-headroom_db) * (np.iinfo(_INT_DTYPES[self.sample_width]).max + 1)
+        return self._scaled(target / peak)
+
+    @staticmethod
+    def linear_ramp(from_power, to_power, frames, start=0, stop=None):
+        """
+        从from_power线性变化到to_power(不含)的frames个振幅比例中第start到stop个值
+
+        与np.linspace(from_power, to_power, frames, endpoint=False)[start:stop]逐值相同，
+        分块处理时各块的比例与整体计算时完全一致
+
+        参数:
+            from_power: 起始振幅比例
+            to_power: 结束振幅比例
+            frames: 整个变化过程的帧数
+            start: 起始序号
+            stop: 结束序号(不含)，None表示frames
+
+        返回:
+            一维float64数组
+        """
+        stop = frames if stop is None else stop
+        return np.arange(start, stop) * ((to_power - from_power) / frames) + from_power
+
+    def apply_ramp(self, start_frame, ramp):
+        """
+        从start_frame开始逐帧乘以ramp中的振幅比例，范围外不变
+
+        只有处理范围内的采样参与浮点运算，整数采样处理后仍为整数
+
+        参数:
+            start_frame: 起始帧
+            ramp: 每帧的振幅比例(一维数组)
+
+        返回:
+            SampleBuffer对象
+        """
+        end_frame = start_frame + len(ramp)
+        samples = self.samples.copy()
+        ramp = ramp[:, np.newaxis]
+        if self.is_float:
+            samples[start_frame:end_frame] *= ramp
+        else:
+            region = self._to_float(samples[start_frame:end_frame])
+            region *= ramp
+            samples[start_frame:end_frame] = self._quantize(region)
+        return self._derive(samples)
+
+    def fade_in(self, fade_ms):
+        """
+        淡入，振幅从静音线性增加到原音量
+
+        参数:
+            fade_ms: 淡入时长(毫秒)
+
+        返回:
+            SampleBuffer对象
+        """
+        frames = self.ms_to_frames(fade_ms)
+        if frames <= 0:
+            return self
+        return self.apply_ramp(0, self.linear_ramp(SILENT_POWER, 1.0, frames))
+
+    def fade_out(self, fade_ms):
+        """
+        淡出，振幅从原音量线性减小到静音
+
+        参数:
+            fade_ms: 淡出时长(毫秒)
+
+        返回:
+            SampleBuffer对象
+        """
+        frames = self.ms_to_frames(fade_ms)
+        if frames <= 0:
+            return self
+        return self.apply_ramp(self.frame_count - frames, self.linear_ramp(1.0, SILENT_POWER, frames))
+
+    def change_speed(self, speed_factor):
+        """
+        改变速度(不改变音调)，按WSOLA算法变速，采样率不变
+
+        参数:
+            speed_factor: 速度因子，>1加速，<1减速
+
+        返回:
+            SampleBuffer对象
+        """
+        if speed_factor <= 0:
+            raise ValueError("速度因子必须大于0")
+        if speed_factor == 1 or self.frame_count == 0:
+            return self
+        result = time_stretch(self.samples, self.frame_rate, speed_factor)
+        return self._derive(result.astype(_FLOAT_DTYPES[self.sample_width], copy=False))
@@ -0,0 +1,345 @@
+import os
+import time
+import mmap
+import atexit
+import shutil
+import logging
+import tempfile
+import threading
+
+from src.utils.config import CACHE_DIR, get_config_value
+
+# 临时目录名前缀，与旧版本tempfile.mkdtemp使用的前缀相同，清理时一并处理
+SCRATCH_PREFIX = "audio_editor_"
+
+# 无法确认所属进程是否仍在运行时，超过此时间(秒)未修改的临时文件视为遗留文件
+STALE_AGE_SECONDS = 24 * 3600
+
+
+class ScratchQuotaExceeded(OSError):
+    """
+    临时文件占用超过配额
+    """
+
+
+class ScratchEntry:
+    """
+    临时区中的一个文件或目录，按引用计数管理
+
+    创建时引用计数为1，acquire()增加引用，release()减少引用，
+    计数归零时立即删除。也可以用作上下文管理器，退出时释放一次引用
+    """
+
+    def __init__(self, area, path, size, is_dir):
+        self.area = area
+        self.path = path
+        self.size = size
+        self.is_dir = is_dir
+        self._refs = 1
+        self._map = None
+
+    @property
+    def refs(self):
+        """
+        当前引用计数
+        """
+        return self._refs
+
+    @property
+    def is_alive(self):
+        """
+        是否尚未删除
+        """
+        return self._refs > 0
+
+    def acquire(self):
+        """
+        增加一次引用
+
+        返回:
+            自身
+        """
+        with self.area._lock:
+            if self._refs <= 0:
+                raise ValueError("临时文件已被删除")
+            self._refs += 1
+        return self
+
+    def release(self):
+        """
+        释放一次引用，计数归零时删除文件
+        """
+        with self.area._lock:
+            if self._refs <= 0:
+                return
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        self.area._remove(self)
+
+    def map(self):
+        """
+        以只读方式将文件映射到内存，映射在文件删除时关闭
+
+        返回:
+            mmap对象，空文件返回空的bytes
+        """
+        if self._map is None:
+            if os.path.getsize(self.path) == 0:
+                return b''
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _close_map(self):
+        """
+        关闭内存映射(删除文件前调用)
+        """
+        file_map, self._map = self._map, None
+        if file_map is not None:
+            try:
+                file_map.close()
+            except BufferError:
+                # 仍有视图引用映射内容时无法关闭，等待垃圾回收
+                logging.warning(f"临时文件映射仍在使用: {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class ScratchArea:
+    """
+    本进程的临时文件区
+
+    所有临时文件都位于一个以进程号命名的会话目录中，
+    按预计大小计入配额，引用计数归零、程序退出或下次启动时清理
+    """
+
+    def __init__(self, root=None, quota_bytes=None):
+        """
+        参数:
+            root: 存放会话目录的目录，None表示使用scratch_dir配置值(为空时使用系统临时目录)
+            quota_bytes: 配额(字节)，None表示使用scratch_quota_mb配置值
+        """
+        self.root = root or get_config_value("scratch_dir", "") or tempfile.gettempdir()
+        if quota_bytes is None:
+            quota_bytes = int(get_config_value("scratch_quota_mb", 4096)) * 1024 * 1024
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        self._entries = set()
+        self._used = 0
+        self._counter = 0
+        self._session_dir = None
+
+    @property
+    def used_bytes(self):
+        """
+        未删除的临时文件预计占用的字节数
+        """
+        with self._lock:
+            return self._used
+
+    @property
+    def session_dir(self):
+        """
+        本进程的会话目录，首次使用时创建
+        """
+        with self._lock:
+            if self._session_dir is None:
+                os.makedirs(self.root, exist_ok=True)
+                self._session_dir = tempfile.mkdtemp(prefix=f"{SCRATCH_PREFIX}{os.getpid()}_", dir=self.root)
+            return self._session_dir
+
+    def create_file(self, suffix="", size=0):
+        """
+        创建临时文件(只分配路径，由调用方写入)
+
+        参数:
+            suffix: 文件扩展名
+            size: 预计大小(字节)，计入配额
+
+        返回:
+            ScratchEntry对象
+        """
+        return self._create(suffix, size, is_dir=False)
+
+    def create_dir(self, size=0):
+        """
+        创建临时目录
+
+        参数:
+            size: 目录中文件的预计总大小(字节)，计入配额
+
+        返回:
+            ScratchEntry对象
+        """
+        return self._create("", size, is_dir=True)
+
+    def _create(self, suffix, size, is_dir):
+        """
+        检查配额并创建临时文件或目录
+        """
+        session_dir = self.session_dir
+        with self._lock:
+            if self._used + size > self.quota_bytes:
+                raise ScratchQuotaExceeded(
+                    f"临时文件超过配额: 已使用{self._used // (1024 * 1024)}MB，"
+                    f"还需要{size // (1024 * 1024)}MB，上限{self.quota_bytes // (1024 * 1024)}MB"
+                )
+            self._counter += 1
+            path = os.path.join(session_dir, f"{self._counter}{suffix}")
+            entry = ScratchEntry(self, path, size, is_dir)
+            self._entries.add(entry)
+            self._used += size
+        if is_dir:
+            os.makedirs(path, exist_ok=True)
+        return entry
+
+    def _remove(self, entry):
+        """
+        删除引用计数归零的临时文件或目录
+        """
+        with self._lock:
+            if entry not in self._entries:
+                return
+            self._entries.discard(entry)
+            self._used -= entry.size
+        entry._close_map()
+        try:
+            if entry.is_dir:
+                shutil.rmtree(entry.path, ignore_errors=True)
+            elif os.path.exists(entry.path):
+                os.remove(entry.path)
+        except OSError as e:
+            logging.error(f"删除临时文件失败: {e}")
+
+    def cleanup(self):
+        """
+        删除本进程的全部临时文件(程序退出时调用)
+        """
+        with self._lock:
+            entries = list(self._entries)
+            session_dir, self._session_dir = self._session_dir, None
+        for entry in entries:
+            entry._refs = 0
+            self._remove(entry)
+        if session_dir is not None:
+            shutil.rmtree(session_dir, ignore_errors=True)
+
+
+def _is_process_alive(pid):
+    """
+    检查进程是否仍在运行，无法判断时返回None
+    """
+    if os.name != 'posix':
+        # Windows上os.kill会结束目标进程，不能用来探测
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 进程存在但属于其他用户
+        return True
+    return True
+
+
+def _is_stale(path, now):
+    """
+    判断临时目录中的项是否为已退出的进程遗留的文件
+    """
+    name = os.path.basename(path)
+    owner = name[len(SCRATCH_PREFIX):].split('_', 1)[0]
+    if owner.isdigit():
+        pid = int(owner)
+        if pid == os.getpid():
+            return False
+        alive = _is_process_alive(pid)
+        if alive is not None:
+            return not alive
+    # 旧版本创建的目录或无法判断所属进程，按修改时间判断
+    return now - os.path.getmtime(path) > STALE_AGE_SECONDS
+
+
+def sweep_stale_files(root=None):
+    """
+    清理已退出的进程遗留的临时文件，以及缓存目录中写了一半的.tmp文件(启动时调用)
+
+    参数:
+        root: 存放会话目录的目录，None表示使用scratch_dir配置值(为空时使用系统临时目录)
+
+    返回:
+        释放的字节数
+    """
+    root = root or get_config_value("scratch_dir", "") or tempfile.gettempdir()
+    now = time.time()
+    freed = 0
+
+    stale = []
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.name.startswith(SCRATCH_PREFIX) and _is_stale(entry.path, now):
+                    stale.append(entry.path)
+    except OSError:
+        pass
+
+    # 解码缓存和波形索引先写.tmp再替换，进程中途退出时会留下.tmp文件
+    if os.path.isdir(CACHE_DIR):
+        for dir_path, _, file_names in os.walk(CACHE_DIR):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                if name.endswith(".tmp") and _is_stale_tmp(path, now):
+                    stale.append(path)
+
+    for path in stale:
+        try:
+            if os.path.isdir(path):
+                size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+                shutil.rmtree(path)
+            else:
+                size = os.path.getsize(path)
+                os.remove(path)
+            freed += size
+        except OSError as e:
+            logging.error(f"清理遗留临时文件失败: {e}")
+
+    if stale:
+        logging.info(f"清理了{len(stale)}个遗留临时文件，共{freed // (1024 * 1024)}MB")
+    return freed
+
+
+def _is_stale_tmp(path, now):
+    """
+    判断缓存目录中的.tmp文件是否已被遗弃，文件名格式为"名称.进程号.线程号.tmp"
+    """
+    parts = os.path.basename(path).split('.')
+    if len(parts) >= 4 and parts[-3].isdigit():
+        pid = int(parts[-3])
+        if pid != os.getpid():
+            alive = _is_process_alive(pid)
+            if alive is not None:
+                return not alive
+    return now - os.path.getmtime(path) > STALE_AGE_SECONDS
+
+
+_area = None
+_area_lock = threading.Lock()
+
+
+def get_scratch_area():
+    """
+    获取本进程共享的临时文件区，程序退出时自动清理
+
+    返回:
+        ScratchArea对象
+    """
+    global _area
+    with _area_lock:
+        if _area is None:
+            _area = ScratchArea()
+            atexit.register(_area.cleanup)
+        return _area
@@ -0,0 +1,679 @@
+import os
+import wave
+import subprocess
+from collections import namedtuple
+
+import numpy as np
+from pydub import AudioSegment
+
+from .audio_probe import probe_audio
+from .progress import check_cancelled, report_progress
+from .sample_buffer import SampleBuffer, SILENT_POWER
+from .time_stretch import TimeStretcher
+
+# 每个数据块的时长(毫秒)
+BLOCK_MS = 1000
+
+# ffmpeg输出时使用的默认编码器(与pydub导出保持一致)
+DEFAULT_CODECS = {
+    "ogg": "libvorbis"
+}
+
+# 各采样位宽(字节)对应的ffmpeg原始PCM格式，8位PCM按WAV的约定为无符号采样
+PCM_FORMATS = {
+    1: "u8",
+    2: "s16le",
+    3: "s24le",
+    4: "s32le"
+}
+
+
+class PcmFormat(namedtuple('PcmFormat', ['sample_width', 'frame_rate', 'channels'])):
+    """
+    PCM数据格式: 采样位宽(字节)、采样率、声道数
+    """
+
+    @property
+    def frame_width(self):
+        """
+        每帧字节数
+        """
+        return self.sample_width * self.channels
+
+    def ms_to_frames(self, ms):
+        """
+        将毫秒转换为帧数
+        """
+        return int(round(ms * self.frame_rate / 1000.0))
+
+
+class PcmStream:
+    """
+    解码后的PCM数据流，按固定大小的数据块依次读取
+
+    blocks为AudioSegment数据块的生成器，每个数据块最多包含BLOCK_MS毫秒的音频。
+    pydub不支持24位数据，24位的源在数据块中为32位，output_width记录写入文件时使用的原位深
+    """
+
+    def __init__(self, fmt, blocks, total_frames=None, output_width=None):
+        """
+        参数:
+            fmt: PcmFormat对象(数据块的格式)
+            blocks: AudioSegment数据块的可迭代对象
+            total_frames: 总帧数，未知时为None
+            output_width: 写入文件时的采样位宽(字节)，None表示与数据块相同
+        """
+        self.fmt = fmt
+        self.blocks = blocks
+        self.total_frames = total_frames
+        self.output_width = output_width or fmt.sample_width
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def _derive(self, blocks, total_frames=None):
+        """
+        基于当前数据流创建新的数据流(格式不变)
+        """
+        return PcmStream(self.fmt, blocks, total_frames, self.output_width)
+
+
+def open_pcm_stream(file_path, block_ms=BLOCK_MS, start_ms=0, duration_ms=None):
+    """
+    以数据块方式打开音频文件，内存占用与文件长度无关
+
+    PCM编码的WAV文件直接读取(保持原位深)，其他格式通过ffmpeg解码: 24/32位的源保持原位深，其余解码为16位PCM。
+    指定时间范围时只解码该范围: WAV按帧精确定位，其他格式使用ffmpeg的输入定位(-ss/-t)
+
+    参数:
+        file_path: 音频文件路径
+        block_ms: 每个数据块的时长(毫秒)
+        start_ms: 开始时间(毫秒)
+        duration_ms: 持续时间(毫秒)，None表示到结尾
+
+    返回:
+        PcmStream对象
+    """
+    start_ms = max(0, start_ms or 0)
+    ext = os.path.splitext(file_path)[1].lower().strip('.')
+    if ext == 'wav':
+        try:
+            with wave.open(file_path, 'rb') as wav_file:
+                sample_width = wav_file.getsampwidth()
+                if sample_width in PCM_FORMATS:
+                    fmt = PcmFormat(4 if sample_width == 3 else sample_width,
+                                    wav_file.getframerate(), wav_file.getnchannels())
+                    start_frame = min(fmt.ms_to_frames(start_ms), wav_file.getnframes())
+                    total_frames = wav_file.getnframes() - start_frame
+                    if duration_ms is not None:
+                        total_frames = min(total_frames, fmt.ms_to_frames(duration_ms))
+                    blocks = _read_wav_blocks(file_path, fmt, block_ms, start_frame, total_frames)
+                    return PcmStream(fmt, blocks, total_frames, sample_width)
+        except (wave.Error, EOFError):
+            # 非PCM编码的WAV文件交给ffmpeg处理
+            pass
+
+    info = probe_audio(file_path)
+    # 24/32位的源解码为32位PCM，写入时恢复原位深
+    output_width = info.get('sample_width') if info.get('sample_width') in (3, 4) else 2
+    # 采样率或声道数未知时由ffmpeg转换为默认的44100Hz立体声
+    fmt = PcmFormat(2 if output_width == 2 else 4, int(info['sample_rate'] or 44100), int(info['channels'] or 2))
+    total_frames = max(0, fmt.ms_to_frames(info['duration_ms']) - fmt.ms_to_frames(start_ms))
+    if duration_ms is not None:
+        total_frames = min(total_frames, fmt.ms_to_frames(duration_ms))
+    blocks = _read_ffmpeg_blocks(file_path, fmt, block_ms, start_ms, duration_ms)
+    stream = PcmStream(fmt, blocks, total_frames, output_width)
+    if duration_ms is not None:
+        # ffmpeg的-t按时间戳截断，这里再按帧数精确截取
+        stream = take_range(stream, 0, duration_ms)
+    return stream
+
+
+def _read_wav_blocks(file_path, fmt, block_ms, start_frame=0, max_frames=None):
+    """
+    从WAV文件中按块读取PCM数据，8位采样转换为有符号，24位采样扩展为32位
+    """
+    block_frames = max(1, fmt.ms_to_frames(block_ms))
+    with wave.open(file_path, 'rb') as wav_file:
+        file_width = wav_file.getsampwidth()
+        if start_frame:
+            wav_file.setpos(start_frame)
+        remaining = wav_file.getnframes() - start_frame if max_frames is None else max_frames
+        while remaining > 0:
+            data = wav_file.readframes(min(block_frames, remaining))
+            if not data:
+                break
+            remaining -= len(data) // (file_width * fmt.channels)
+            if file_width == 1:
+                data = _flip_8bit_sign(data)
+            elif file_width == 3:
+                data = _widen_24bit(data)
+            yield _make_segment(data, fmt)
+
+
+def _read_ffmpeg_blocks(file_path, fmt, block_ms, start_ms=0, duration_ms=None):
+    """
+    通过ffmpeg解码音频文件，并从管道中按块读取PCM数据
+    """
+    cmd = ["ffmpeg", "-v", "error"]
+    if start_ms:
+        # -ss放在-i之前为输入定位，只解码定位点附近的数据
+        cmd.extend(["-ss", f"{start_ms / 1000.0:.6f}"])
+    if duration_ms is not None:
+        cmd.extend(["-t", f"{duration_ms / 1000.0:.6f}"])
+    cmd.extend([
+        "-i", file_path,
+        "-vn",
+        "-f", PCM_FORMATS[fmt.sample_width],
+        "-acodec", f"pcm_{PCM_FORMATS[fmt.sample_width]}",
+        "-ar", str(fmt.frame_rate),
+        "-ac", str(fmt.channels),
+        "pipe:1"
+    ])
+    block_bytes = max(1, fmt.ms_to_frames(block_ms)) * fmt.frame_width
+
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        pending = b''
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            data = pending + data
+            # 保证每个数据块都是完整的帧
+            usable = len(data) - len(data) % fmt.frame_width
+            pending = data[usable:]
+            if usable:
+                yield _make_segment(data[:usable], fmt)
+
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    finally:
+        # 下游提前结束读取时终止ffmpeg进程
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def segment_to_stream(audio, block_ms=BLOCK_MS):
+    """
+    将内存中的AudioSegment按数据块包装为数据流
+
+    参数:
+        audio: AudioSegment对象
+        block_ms: 每个数据块的时长(毫秒)
+
+    返回:
+        PcmStream对象
+    """
+    fmt = PcmFormat(audio.sample_width, audio.frame_rate, audio.channels)
+    total_frames = len(audio.raw_data) // fmt.frame_width
+    block_frames = max(1, fmt.ms_to_frames(block_ms))
+
+    def blocks():
+        for start in range(0, total_frames, block_frames):
+            yield audio.get_sample_slice(start, min(start + block_frames, total_frames))
+
+    return PcmStream(fmt, blocks(), total_frames)
+
+
+def track_progress(stream, progress=None, cancel_token=None):
+    """
+    在读取每个数据块之前检查取消请求，并按已读取的帧数报告进度
+
+    参数:
+        stream: PcmStream对象
+        progress: 进度回调函数，参数为0到1之间的完成比例
+        cancel_token: CancellationToken对象
+
+    返回:
+        新的PcmStream对象
+    """
+    def blocks():
+        iterator = iter(stream)
+        done = 0
+        try:
+            while True:
+                check_cancelled(cancel_token)
+                block = next(iterator, None)
+                if block is None:
+                    break
+                yield block
+                done += int(block.frame_count())
+                if stream.total_frames:
+                    report_progress(progress, done / float(stream.total_frames))
+        finally:
+            # 取消时立即关闭上游数据流(终止解码进程)
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    return stream._derive(blocks(), stream.total_frames)
+
+
+def _flip_8bit_sign(data):
+    """
+    8位采样在有符号(pydub内部)与无符号(WAV文件、ffmpeg的u8格式)之间转换
+    """
+    return (np.frombuffer(data, dtype=np.uint8) ^ 0x80).tobytes()
+
+
+def _widen_24bit(data):
+    """
+    将24位采样扩展为32位(补一个最低字节，与pydub读取24位WAV的方式一致)
+    """
+    samples = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+    widened = np.zeros((len(samples), 4), dtype=np.uint8)
+    widened[:, 1:] = samples
+    return widened.tobytes()
+
+
+def _file_pcm_data(block, sample_width):
+    """
+    将数据块转换为写入文件的原始PCM数据: 转换为sample_width位宽，8位采样转换为无符号
+    """
+    if sample_width == 3:
+        if block.sample_width != 4:
+            block = block.set_sample_width(4)
+        # 去掉32位采样的最低字节
+        return np.frombuffer(block.raw_data, dtype=np.uint8).reshape(-1, 4)[:, 1:].tobytes()
+    if block.sample_width != sample_width:
+        block = block.set_sample_width(sample_width)
+    data = block.raw_data
+    if sample_width == 1:
+        data = _flip_8bit_sign(data)
+    return data
+
+
+def _make_segment(data, fmt):
+    """
+    根据原始PCM数据创建AudioSegment
+    """
+    return AudioSegment(
+        data=data,
+        sample_width=fmt.sample_width,
+        frame_rate=fmt.frame_rate,
+        channels=fmt.channels
+    )
+
+
+def read_pcm_range(file_path, start_ms=0, duration_ms=None):
+    """
+    只解码指定时间范围的音频
+
+    参数:
+        file_path: 音频文件路径
+        start_ms: 开始时间(毫秒)
+        duration_ms: 持续时间(毫秒)，None表示到结尾
+
+    返回:
+        AudioSegment对象
+    """
+    stream = open_pcm_stream(file_path, start_ms=start_ms, duration_ms=duration_ms)
+    data = b''.join(block.raw_data for block in stream)
+    return _make_segment(data, stream.fmt)
+
+
+def _iter_positioned(stream):
+    """
+    遍历数据块，同时给出每个数据块的起始帧和结束帧
+    """
+    position = 0
+    for block in stream:
+        frames = int(block.frame_count())
+        yield position, position + frames, block
+        position += frames
+
+
+def take_range(stream, start_ms, end_ms=None):
+    """
+    只保留指定时间范围内的音频
+
+    参数:
+        stream: PcmStream对象
+        start_ms: 开始时间(毫秒)
+        end_ms: 结束时间(毫秒)，None表示到结尾
+
+    返回:
+        新的PcmStream对象
+    """
+    fmt = stream.fmt
+    start_frame = fmt.ms_to_frames(max(0, start_ms))
+    end_frame = fmt.ms_to_frames(end_ms) if end_ms is not None else None
+
+    def blocks():
+        for block_start, block_end, block in _iter_positioned(stream):
+            if end_frame is not None and block_start >= end_frame:
+                break
+            if block_end <= start_frame:
+                continue
+            local_start = max(0, start_frame - block_start)
+            local_end = block_end - block_start if end_frame is None else min(block_end, end_frame) - block_start
+            yield block.get_sample_slice(local_start, local_end)
+
+    total = None
+    if stream.total_frames is not None:
+        upper = stream.total_frames if end_frame is None else min(end_frame, stream.total_frames)
+        total = max(0, upper - start_frame)
+    return stream._derive(blocks(), total)
+
+
+def skip_range(stream, start_ms, end_ms):
+    """
+    删除指定时间范围内的音频
+
+    参数:
+        stream: PcmStream对象
+        start_ms: 删除部分的开始时间(毫秒)
+        end_ms: 删除部分的结束时间(毫秒)
+
+    返回:
+        新的PcmStream对象
+    """
+    fmt = stream.fmt
+    start_frame = fmt.ms_to_frames(max(0, start_ms))
+    end_frame = fmt.ms_to_frames(end_ms)
+
+    def blocks():
+        for block_start, block_end, block in _iter_positioned(stream):
+            if block_end <= start_frame or block_start >= end_frame:
+                yield block
+                continue
+            if block_start < start_frame:
+                yield block.get_sample_slice(0, start_frame - block_start)
+            if block_end > end_frame:
+                yield block.get_sample_slice(end_frame - block_start, block_end - block_start)
+
+    total = None
+    if stream.total_frames is not None:
+        removed = max(0, min(end_frame, stream.total_frames) - start_frame)
+        total = stream.total_frames - removed
+    return stream._derive(blocks(), total)
+
+
+def insert_silence(stream, position_ms, duration_ms, block_ms=BLOCK_MS):
+    """
+    在指定位置插入静音，位置超过音频长度时追加在结尾
+
+    参数:
+        stream: PcmStream对象
+        position_ms: 插入位置(毫秒)
+        duration_ms: 静音时长(毫秒)
+        block_ms: 静音数据块的最大时长(毫秒)
+
+    返回:
+        新的PcmStream对象
+    """
+    fmt = stream.fmt
+    position_frame = fmt.ms_to_frames(max(0, position_ms))
+    silence_frames = fmt.ms_to_frames(duration_ms)
+
+    def silence():
+        block_frames = max(1, fmt.ms_to_frames(block_ms))
+        remaining = silence_frames
+        while remaining > 0:
+            frames = min(block_frames, remaining)
+            yield _make_segment(b'\0' * (frames * fmt.frame_width), fmt)
+            remaining -= frames
+
+    def blocks():
+        inserted = False
+        for block_start, block_end, block in _iter_positioned(stream):
+            if not inserted and block_end > position_frame:
+                split = position_frame - block_start
+                if split > 0:
+                    yield block.get_sample_slice(0, split)
+                yield from silence()
+                inserted = True
+                if split < block_end - block_start:
+                    yield block.get_sample_slice(split, block_end - block_start)
+                continue
+            yield block
+        if not inserted:
+            yield from silence()
+
+    total = None
+    if stream.total_frames is not None:
+        total = stream.total_frames + silence_frames
+    return stream._derive(blocks(), total)
+
+
+def apply_gain(stream, volume_db):
+    """
+    调整音量
+
+    参数:
+        stream: PcmStream对象
+        volume_db: 音量调整值(分贝)
+
+    返回:
+        新的PcmStream对象
+    """
+    def blocks():
+        for block in stream:
+            yield block.apply_gain(volume_db)
+
+    return stream._derive(blocks(), stream.total_frames)
+
+
+def apply_fade(stream, fade_ms, fade_in=True):
+    """
+    添加淡入或淡出效果，振幅按帧线性变化，结果与SampleBuffer.fade_in/fade_out逐采样相同
+
+    淡出需要知道音频总长度，因此要求stream.total_frames已知
+
+    参数:
+        stream: PcmStream对象
+        fade_ms: 淡入/淡出时长(毫秒)
+        fade_in: True为淡入，False为淡出
+
+    返回:
+        新的PcmStream对象
+    """
+    fmt = stream.fmt
+    fade_frames = fmt.ms_to_frames(fade_ms)
+    if stream.total_frames is not None:
+        fade_frames = min(fade_frames, stream.total_frames)
+
+    if fade_in:
+        fade_start = 0
+        from_power, to_power = SILENT_POWER, 1.0
+    else:
+        if stream.total_frames is None:
+            raise ValueError("淡出需要已知音频总长度")
+        fade_start = stream.total_frames - fade_frames
+        from_power, to_power = 1.0, SILENT_POWER
+    fade_end = fade_start + fade_frames
+
+    def blocks():
+        for block_start, block_end, block in _iter_positioned(stream):
+            if fade_frames <= 0 or block_end <= fade_start or block_start >= fade_end:
+                # 淡入/淡出区间之外的数据不变
+                yield block
+                continue
+
+            # 按帧序号计算本块内的振幅比例，块的划分不影响结果
+            part_start = max(block_start, fade_start)
+            part_end = min(block_end, fade_end)
+            ramp = SampleBuffer.linear_ramp(from_power, to_power, fade_frames,
+                                            part_start - fade_start, part_end - fade_start)
+            yield SampleBuffer.from_segment(block).apply_ramp(part_start - block_start, ramp).to_segment()
+
+    return stream._derive(blocks(), stream.total_frames)
+
+
+def apply_time_stretch(stream, speed_factor):
+    """
+    改变速度(不改变音调)，数据块依次送入WSOLA处理器，内存占用与音频长度无关
+
+    参数:
+        stream: PcmStream对象
+        speed_factor: 速度因子，>1加速，<1减速
+
+    返回:
+        新的PcmStream对象(8位音频的数据块转换为16位，写入文件时仍使用原位深)
+    """
+    fmt = stream.fmt
+    sample_width = 2 if fmt.sample_width <= 2 else 4
+    out_fmt = PcmFormat(sample_width, fmt.frame_rate, fmt.channels)
+    stretcher = TimeStretcher(speed_factor, fmt.frame_rate, fmt.channels)
+
+    def to_segment(samples):
+        return SampleBuffer(samples, fmt.frame_rate, sample_width).to_segment()
+
+    def blocks():
+        for block in stream:
+            output = stretcher.push(SampleBuffer.from_segment(block).samples)
+            if len(output):
+                yield to_segment(output)
+        output = stretcher.flush()
+        if len(output):
+            yield to_segment(output)
+
+    total = None
+    if stream.total_frames is not None:
+        total = int(round(stream.total_frames / speed_factor))
+    return PcmStream(out_fmt, blocks(), total, stream.output_width)
+
+
+def write_pcm_stream(stream, output_path):
+    """
+    将数据流逐块写入输出文件，WAV直接写入，其他格式通过ffmpeg编码
+
+    参数:
+        stream: PcmStream对象
+        output_path: 输出文件路径
+    """
+    write_pcm_stream_multi(stream, [(output_path, None)])
+
+
+def snapshot_mtimes(paths):
+    """
+    记录文件的修改时间，文件不存在时为None，用于操作失败后找出本次写入过的文件
+
+    参数:
+        paths: 文件路径列表
+
+    返回:
+        修改时间列表
+    """
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except (OSError, TypeError):
+            mtimes.append(None)
+    return mtimes
+
+
+def remove_changed_files(paths, mtimes):
+    """
+    删除与snapshot_mtimes记录相比新建或被改动过的文件，原本就存在且未被改动的文件保留
+
+    参数:
+        paths: 文件路径列表
+        mtimes: snapshot_mtimes的返回值
+    """
+    for path, before, after in zip(paths, mtimes, snapshot_mtimes(paths)):
+        if after is not None and after != before:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def write_pcm_stream_multi(stream, outputs):
+    """
+    只读取一次数据流，同时写入多个输出文件
+
+    WAV输出直接写入，其他格式的输出由同一个ffmpeg进程编码(一个PCM输入，多个输出)
+
+    参数:
+        stream: PcmStream对象
+        outputs: (输出文件路径, 比特率)元组列表，比特率为None时使用编码器的默认值
+    """
+    fmt = PcmFormat(stream.output_width, stream.fmt.frame_rate, stream.fmt.channels)
+    wav_paths = []
+    encoded_outputs = []
+    for output_path, bitrate in outputs:
+        ext = os.path.splitext(output_path)[1].lower().strip('.')
+        if ext == 'wav':
+            wav_paths.append(output_path)
+        else:
+            encoded_outputs.append((output_path, ext, bitrate))
+
+    # 写入失败时删除写了一半的输出(例如只有文件头的WAV)，避免被当作已完成的结果
+    output_paths = [output_path for output_path, _ in outputs]
+    before = snapshot_mtimes(output_paths)
+    try:
+        _write_outputs(stream, fmt, wav_paths, encoded_outputs)
+    except BaseException:
+        remove_changed_files(output_paths, before)
+        raise
+
+
+def _write_outputs(stream, fmt, wav_paths, encoded_outputs):
+    """
+    将数据流写入WAV输出和ffmpeg编码的输出，输出保持数据流的采样位宽
+    """
+    wav_files = []
+    process = None
+    cmd = None
+    try:
+        for output_path in wav_paths:
+            wav_file = wave.open(output_path, 'wb')
+            wav_files.append(wav_file)
+            wav_file.setsampwidth(fmt.sample_width)
+            wav_file.setframerate(fmt.frame_rate)
+            wav_file.setnchannels(fmt.channels)
+
+        if encoded_outputs:
+            cmd = [
+                "ffmpeg",
+                "-v", "error",
+                "-f", PCM_FORMATS[fmt.sample_width],
+                "-ar", str(fmt.frame_rate),
+                "-ac", str(fmt.channels),
+                "-i", "pipe:0"
+            ]
+            for output_path, ext, bitrate in encoded_outputs:
+                # 每个输出都映射同一个输入，编码参数只作用于其后的输出文件
+                cmd.extend(["-map", "0:a"])
+                if ext in DEFAULT_CODECS:
+                    cmd.extend(["-acodec", DEFAULT_CODECS[ext]])
+                if bitrate:
+                    cmd.extend(["-b:a", bitrate])
+                cmd.extend(["-y", output_path])
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+        try:
+            for block in stream:
+                data = _file_pcm_data(block, fmt.sample_width)
+                for wav_file in wav_files:
+                    wav_file.writeframesraw(data)
+                if process is not None:
+                    process.stdin.write(data)
+            if process is not None:
+                process.stdin.close()
+                stderr = process.stderr.read()
+                if process.wait() != 0:
+                    raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+        except BrokenPipeError:
+            stderr = process.stderr.read()
+            process.wait()
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+    finally:
+        for wav_file in wav_files:
+            wav_file.close()
+        if process is not None:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            process.stderr.close()
@@ -0,0 +1,196 @@
+import numpy as np
+
+# 分析帧时长(毫秒)，相邻输出帧重叠一半
+FRAME_MS = 40
+
+# 寻找最佳拼接位置时的搜索范围(毫秒)，在标称位置前后各搜索这么长
+SEARCH_MS = 10
+
+
+class TimeStretcher:
+    """
+    基于WSOLA(波形相似叠加)的变速不变调处理器
+
+    输出按固定的帧移(帧长的一半)加汉宁窗叠加；每一帧在输入中的位置按速度因子推进，
+    并在标称位置附近搜索与上一帧自然延续部分最相似的波形(互相关最大)，
+    避免相位不连续。输入按数据块送入，内存占用与文件长度无关，耗时与长度成正比
+    """
+
+    def __init__(self, speed_factor, frame_rate, channels, frame_ms=FRAME_MS, search_ms=SEARCH_MS):
+        """
+        参数:
+            speed_factor: 速度因子，>1加速，<1减速
+            frame_rate: 采样率
+            channels: 声道数
+            frame_ms: 分析帧时长(毫秒)
+            search_ms: 搜索范围(毫秒)
+        """
+        if speed_factor <= 0:
+            raise ValueError("速度因子必须大于0")
+        self.speed_factor = speed_factor
+        self.channels = channels
+
+        # 帧长取偶数，帧移为帧长的一半，汉宁窗在该帧移下叠加后恒为1
+        self.frame_length = max(64, int(frame_rate * frame_ms / 1000.0) // 2 * 2)
+        self.synthesis_hop = self.frame_length // 2
+        self.analysis_hop = self.synthesis_hop * speed_factor
+        self.tolerance = int(frame_rate * search_ms / 1000.0)
+        self.window = np.hanning(self.frame_length + 1)[:-1][:, np.newaxis]
+
+        # 互相关只需要非负偏移，FFT长度不小于搜索区域长度即可避免混叠
+        fft_size = 1
+        while fft_size < self.frame_length + self.tolerance * 2:
+            fft_size *= 2
+        self.fft_size = fft_size
+
+        # 输入前补半帧静音，使第一帧以开头为中心，开头不会出现窗函数造成的淡入
+        self._input = np.zeros((self.synthesis_hop, channels), dtype=np.float64)
+        self._input_mono = np.zeros(self.synthesis_hop, dtype=np.float64)  # 混合为单声道的输入，用于搜索
+        self._input_base = -self.synthesis_hop  # _input[0]在整个输入中的位置
+        self._input_total = 0       # 已送入的总帧数
+        self._output = np.zeros((self.frame_length, channels), dtype=np.float64)
+        self._frame_index = 0       # 下一个输出帧的序号
+        self._previous_start = None # 上一帧在输入中的实际开始位置
+        self._skip = self.synthesis_hop  # 输出开头对应补零部分、需要丢弃的帧数
+        self._emitted = 0           # 已输出的总帧数
+
+    def _frame_start(self, index, final):
+        """
+        计算第index帧在输入中的开始位置，数据不足时返回None
+        """
+        nominal = int(round(index * self.analysis_hop)) - self.synthesis_hop
+        if self._previous_start is None:
+            return nominal if final or nominal + self.frame_length <= self._input_total else None
+
+        natural = self._previous_start + self.synthesis_hop
+        low = max(-self.synthesis_hop, nominal - self.tolerance)
+        high = nominal + self.tolerance
+        if not final and max(high, natural) + self.frame_length > self._input_total:
+            return None
+
+        template = self._mono(natural, self.frame_length)
+        region = self._mono(low, high - low + self.frame_length)
+        if not template.any() or not region.any():
+            return nominal
+
+        # 通过FFT计算模板与搜索区域在每个偏移处的互相关
+        spectrum = np.fft.rfft(region, self.fft_size) * np.conj(np.fft.rfft(template, self.fft_size))
+        correlation = np.fft.irfft(spectrum, self.fft_size)[:high - low + 1]
+        return low + int(np.argmax(correlation))
+
+    def _mono(self, start, length):
+        """
+        取输入中的一段并混合为单声道，超出已有数据的部分补0
+        """
+        local = start - self._input_base
+        data = self._input_mono[max(0, local):local + length]
+        if len(data) < length:
+            data = np.concatenate((data, np.zeros(length - len(data))))
+        return data
+
+    def _frame(self, start):
+        """
+        取输入中从start开始的一帧，超出已有数据的部分补0
+        """
+        local = start - self._input_base
+        data = self._input[local:local + self.frame_length]
+        if len(data) < self.frame_length:
+            data = np.concatenate((data, np.zeros((self.frame_length - len(data), self.channels))))
+        return data
+
+    def _run(self, final):
+        """
+        处理当前可以处理的全部输出帧
+
+        返回:
+            已确定的输出数据
+        """
+        hop = self.synthesis_hop
+        chunks = []
+        target = int(round(self._input_total / self.speed_factor))
+        while True:
+            if final and (self._frame_index - 1) * hop >= target:
+                break
+            start = self._frame_start(self._frame_index, final)
+            if start is None:
+                break
+            self._output += self._frame(start) * self.window
+            self._previous_start = start
+            self._frame_index += 1
+
+            # 前半部分不再与后续帧重叠，可以输出
+            chunks.append(self._output[:hop].copy())
+            self._output = np.concatenate((self._output[hop:], np.zeros((hop, self.channels))))
+        self._discard_input()
+
+        output = np.concatenate(chunks) if chunks else np.zeros((0, self.channels))
+        if self._skip:
+            skipped = min(self._skip, len(output))
+            output = output[skipped:]
+            self._skip -= skipped
+        if final:
+            # 总长度精确为输入长度除以速度因子
+            output = output[:max(0, target - self._emitted)]
+            if len(output) < target - self._emitted:
+                missing = target - self._emitted - len(output)
+                output = np.concatenate((output, self._output[:missing]))
+        self._emitted += len(output)
+        return output
+
+    def _discard_input(self):
+        """
+        丢弃后续帧不再需要的输入数据
+        """
+        needed = int(round(self._frame_index * self.analysis_hop)) - self.synthesis_hop - self.tolerance
+        if self._previous_start is not None:
+            needed = min(needed, self._previous_start + self.synthesis_hop)
+        drop = needed - self._input_base
+        if drop > 0:
+            self._input = self._input[drop:]
+            self._input_mono = self._input_mono[drop:]
+            self._input_base += drop
+
+    def push(self, samples):
+        """
+        送入一块输入数据
+
+        参数:
+            samples: 形状为(帧数, 声道数)的数组
+
+        返回:
+            已确定的输出数据(float64数组，可能为空)
+        """
+        if len(samples):
+            samples = np.asarray(samples, dtype=np.float64)
+            self._input = np.concatenate((self._input, samples))
+            self._input_mono = np.concatenate((self._input_mono, samples.mean(axis=1)))
+            self._input_total += len(samples)
+        return self._run(final=False)
+
+    def flush(self):
+        """
+        输入结束，输出剩余的全部数据
+
+        返回:
+            剩余的输出数据(float64数组)
+        """
+        return self._run(final=True)
+
+
+def time_stretch(samples, frame_rate, speed_factor, block_frames=65536):
+    """
+    对整段音频变速不变调
+
+    参数:
+        samples: 形状为(帧数, 声道数)的数组
+        frame_rate: 采样率
+        speed_factor: 速度因子，>1加速，<1减速
+        block_frames: 每次送入处理器的帧数
+
+    返回:
+        float64数组，帧数为输入帧数除以速度因子
+    """
+    stretcher = TimeStretcher(speed_factor, frame_rate, samples.shape[1])
+    outputs = [stretcher.push(samples[i:i + block_frames]) for i in range(0, len(samples), block_frames)]
+    outputs.append(stretcher.flush())
+    return np.concatenate(outputs)
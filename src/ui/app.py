@@ -1,15 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, StringVar, Menu
 import os
+import logging
 
-from src.utils import (
-    load_audio_file, 
-    format_time, 
-    get_audio_duration
-)
+from src.utils import format_time, show_error, show_info
+from src.ui.dialogs import load_audio_file, load_project_file, save_project_file, save_audio_file
+from src.core import AudioSession
+from src.core.edit_chain import EditChain
+from src.core.project import Project
+from src.core.peak_index import get_peak_index
+from src.core.playback import get_playback_engine
+from src.core.scratch import get_scratch_area, sweep_stale_files
+from src.core.progress import OperationCancelled
 from src.utils.language import get_text, set_language
 from src.utils.config import get_language
 from src.ui.language_switcher import LanguageSwitcher
+from src.ui.job_executor import JobExecutor
 
 from .tabs.main_tab import MainTab
 from .tabs.cut_tab import CutTab
@@ -17,6 +23,9 @@ from .tabs.merge_tab import MergeTab
 from .tabs.effects_tab import EffectsTab
 from .tabs.extract_tab import ExtractTab
 
+# 项目编辑最多可以撤销的步数
+PROJECT_UNDO_LIMIT = 100
+
 class AudioEditorApp:
     """
     音频编辑器应用主类
@@ -41,6 +50,27 @@ class AudioEditorApp:
         self.current_audio_path = None
         self.audio_duration = 0
         
+        # 已加载音频的共享缓存，各选项卡通过current_audio句柄使用同一份解码数据
+        self.audio_session = AudioSession()
+        self.current_audio = None
+        
+        # 各选项卡叠加的编辑操作，导出时一次性执行
+        self.edit_chain = EditChain()
+        
+        # 当前编辑的项目: 剪切、删除、音量和淡入淡出只修改片段列表，导出项目时才渲染
+        self.project = Project()
+        self._project_history = []
+        
+        # 后台任务执行器，耗时的音频处理不在界面线程中执行
+        self.jobs = JobExecutor(self.root)
+        
+        # 正在后台生成波形索引的文件 -> 完成后的回调列表
+        self._pending_peaks = {}
+        
+        # 清理上次异常退出时遗留的临时文件
+        self.jobs.submit(sweep_stale_files, description="清理临时文件")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # 设置样式
         self.setup_styles()
         
@@ -76,11 +106,16 @@ class AudioEditorApp:
         self.menu_bar.add_cascade(label=get_text("file"), menu=file_menu)
         file_menu.add_command(label=get_text("open"), command=self.load_audio)
         file_menu.add_separator()
-        file_menu.add_command(label=get_text("exit"), command=self.root.quit)
+        file_menu.add_command(label=get_text("open_project"), command=self.open_project)
+        file_menu.add_command(label=get_text("save_project"), command=self.save_project)
+        file_menu.add_command(label=get_text("export_project"), command=self.export_project)
+        file_menu.add_separator()
+        file_menu.add_command(label=get_text("exit"), command=self.on_close)
         
         # 编辑菜单
         edit_menu = Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label=get_text("edit"), menu=edit_menu)
+        edit_menu.add_command(label=get_text("undo"), command=self.undo_project_edit)
         
         # 帮助菜单
         help_menu = Menu(self.menu_bar, tearoff=0)
@@ -129,6 +164,19 @@ class AudioEditorApp:
         status_label = ttk.Label(status_frame, textvariable=self.status_var)
         status_label.pack(side=tk.LEFT)
         
+        # 后台任务状态、进度和取消按钮
+        self.job_status_var = StringVar()
+        job_status_label = ttk.Label(status_frame, textvariable=self.job_status_var)
+        job_status_label.pack(side=tk.LEFT, padx=(20, 5))
+        
+        self.job_progress = ttk.Progressbar(status_frame, length=150, maximum=100)
+        self.job_progress.pack(side=tk.LEFT, padx=5)
+        
+        self.cancel_button = ttk.Button(status_frame, text="取消", command=self.jobs.cancel_all, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        
+        self.jobs.add_listener(self.update_job_status)
+        
         # 在状态栏添加语言切换下拉框
         self.lang_switcher.create_language_combobox(status_frame)
     
@@ -144,23 +192,214 @@ class AudioEditorApp:
             f"一个简单的桌面音频编辑应用"
         )
     
+    def update_job_status(self, jobs):
+        """
+        更新状态栏中的后台任务信息
+        
+        参数:
+            jobs: 正在执行的Job列表
+        """
+        if jobs:
+            self.job_status_var.set(f"正在处理: {', '.join(job.description for job in jobs)}")
+        else:
+            self.job_status_var.set("")
+        
+        # 显示支持进度报告的任务的平均进度
+        progress = [job.progress for job in jobs if job.progress is not None]
+        self.job_progress["value"] = sum(progress) / len(progress) * 100 if progress else 0
+        
+        cancellable = any(job.cancellable for job in jobs)
+        self.cancel_button.configure(state=tk.NORMAL if cancellable else tk.DISABLED)
+    
+    def add_edit_operation(self, name, *args):
+        """
+        在编辑链末尾添加一个操作并刷新编辑链列表
+        
+        参数:
+            name: 操作名称
+            *args: 操作参数
+        """
+        self.edit_chain.add(name, *args)
+        self.effects_tab.refresh_edit_chain()
+        self.status_var.set(f"已加入编辑链: {self.edit_chain.operations[-1].describe()}")
+    
+    def request_peak_index(self, file_path, on_ready=None):
+        """
+        在后台读取或生成文件的波形峰值索引，同一文件同时只生成一次
+        
+        参数:
+            file_path: 音频文件路径
+            on_ready: 完成后在主线程中调用的回调，参数为(文件路径, PeakIndex对象)
+        """
+        callbacks = self._pending_peaks.get(file_path)
+        if callbacks is not None:
+            if on_ready is not None:
+                callbacks.append(on_ready)
+            return
+        self._pending_peaks[file_path] = [on_ready] if on_ready is not None else []
+        
+        def on_done(index):
+            for callback in self._pending_peaks.pop(file_path, []):
+                callback(file_path, index)
+        
+        def on_error(error):
+            self._pending_peaks.pop(file_path, None)
+            if not isinstance(error, OperationCancelled):
+                logging.error(f"生成波形索引失败: {error}")
+        
+        self.jobs.submit(
+            get_peak_index, file_path,
+            on_done=on_done,
+            on_error=on_error,
+            description="生成波形索引",
+            cancellable=True
+        )
+    
+    def on_close(self):
+        """
+        关闭窗口，取消尚未开始的后台任务，停止预览并删除临时文件
+        """
+        self.jobs.shutdown()
+        get_playback_engine().stop()
+        get_scratch_area().cleanup()
+        self.root.destroy()
+    
     def load_audio(self):
         """
-        加载音频文件
+        加载音频文件，文件信息在后台读取
         """
         file_path = load_audio_file()
         if file_path:
-            self.current_audio_path = file_path
-            self.audio_duration = get_audio_duration(file_path)
-            
-            filename = os.path.basename(file_path)
-            duration_str = format_time(self.audio_duration)
-            
-            self.status_var.set(f"{get_text('load_audio_file')}: {filename} ({get_text('duration')}: {duration_str})")
-            self.main_tab.update_audio_info(file_path, self.audio_duration)
-            
-            # 更新其他选项卡的信息
-            self.cut_tab.update_duration(self.audio_duration)
-            
+            self.jobs.submit(
+                self.audio_session.open, file_path,
+                on_done=self.on_audio_loaded,
+                on_error=lambda e: show_error("错误", f"无法获取音频时长: {str(e)}"),
+                description="读取音频信息"
+            )
             return True
-        return False 
\ No newline at end of file
+        return False
+    
+    def on_audio_loaded(self, handle):
+        """
+        音频文件信息读取完成后更新界面
+        
+        参数:
+            handle: AudioHandle对象
+        """
+        file_path = handle.path
+        self.current_audio_path = file_path
+        self.current_audio = handle
+        self.audio_duration = int(round(handle.duration_ms))
+        
+        filename = os.path.basename(file_path)
+        duration_str = format_time(self.audio_duration)
+        
+        self.status_var.set(f"{get_text('load_audio_file')}: {filename} ({get_text('duration')}: {duration_str})")
+        self.main_tab.update_audio_info(file_path, self.audio_duration)
+        
+        # 以整个文件作为新项目，之后的剪切、删除等编辑都记录在项目中
+        project = Project()
+        project.add_clip(handle, end_ms=self.audio_duration)
+        self.set_project(project)
+        
+        # 在后台准备波形索引，之后任意缩放级别的波形都可以直接绘制
+        self.request_peak_index(file_path)
+    
+    def set_project(self, project):
+        """
+        替换当前编辑的项目，清空撤销记录
+        
+        参数:
+            project: Project对象
+        """
+        self.project = project
+        self._project_history = []
+        self.cut_tab.update_project()
+    
+    def edit_project(self, description, func, *args):
+        """
+        修改当前项目并记录撤销点，只修改片段列表，不解码也不写文件
+        
+        参数:
+            description: 操作说明，显示在状态栏中
+            func: 修改函数，参数为Project对象和*args
+            *args: 传递给修改函数的参数
+        """
+        if not self.project.clips:
+            show_error("错误", "请先加载音频文件")
+            return
+        self._project_history.append(self.project.copy())
+        del self._project_history[:-PROJECT_UNDO_LIMIT]
+        func(self.project, *args)
+        self.cut_tab.update_project()
+        self.status_var.set(f"已修改项目: {description}(导出项目时生效)")
+    
+    def undo_project_edit(self):
+        """
+        撤销上一次项目编辑
+        """
+        if not self._project_history:
+            self.status_var.set("没有可以撤销的项目编辑")
+            return
+        self.project = self._project_history.pop()
+        self.cut_tab.update_project()
+        self.status_var.set("已撤销上一次项目编辑")
+    
+    def open_project(self):
+        """
+        打开项目文件，只读取编辑参数，不解码音频
+        """
+        file_path = load_project_file()
+        if not file_path:
+            return
+        try:
+            project = Project.load(file_path)
+        except Exception as e:
+            show_error("错误", f"打开项目失败: {str(e)}")
+            return
+        self.set_project(project)
+        self.status_var.set(f"已打开项目: {os.path.basename(file_path)}")
+    
+    def save_project(self):
+        """
+        保存当前项目，只保存编辑参数和源文件路径
+        """
+        if not self.project.clips:
+            show_error("错误", "项目为空，请先加载音频文件")
+            return
+        file_path = save_project_file()
+        if not file_path:
+            return
+        try:
+            self.project.save(file_path)
+        except Exception as e:
+            show_error("错误", f"保存项目失败: {str(e)}")
+            return
+        self.status_var.set(f"已保存项目: {os.path.basename(file_path)}")
+    
+    def export_project(self):
+        """
+        渲染当前项目并导出，全部编辑只在此时解码和编码一次
+        """
+        if not self.project.clips:
+            show_error("错误", "项目为空，请先加载音频文件")
+            return
+        output_path = save_audio_file()
+        if not output_path:
+            return
+        
+        def on_done(stream_copied):
+            mode_str = "（无损流复制）" if stream_copied else ""
+            show_info("成功", f"已成功导出项目到: {output_path}{mode_str}")
+        
+        def on_error(error):
+            if not isinstance(error, OperationCancelled):
+                show_error("错误", f"导出项目失败: {str(error)}")
+        
+        self.jobs.submit(
+            self.project.copy().render, output_path,
+            on_done=on_done,
+            on_error=on_error,
+            description="导出项目",
+            cancellable=True
+        )
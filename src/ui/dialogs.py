@@ -0,0 +1,146 @@
+import time
+from tkinter import filedialog
+
+def load_audio_file():
+    """
+    选择音频文件
+    
+    返回:
+        所选音频文件的路径
+    """
+    filetypes = [
+        ('音频文件', '*.mp3 *.wav *.aac *.ogg *.flac *.m4a'),
+        ('所有文件', '*.*')
+    ]
+    file_path = filedialog.askopenfilename(
+        title="选择音频文件",
+        filetypes=filetypes
+    )
+    return file_path
+
+def load_video_file():
+    """
+    选择视频文件
+    
+    返回:
+        所选视频文件的路径
+    """
+    filetypes = [
+        ('视频文件', '*.mp4 *.avi *.mov *.mkv *.flv *.wmv *.webm'),
+        ('所有文件', '*.*')
+    ]
+    file_path = filedialog.askopenfilename(
+        title="选择视频文件",
+        filetypes=filetypes
+    )
+    return file_path
+
+def load_multiple_video_files():
+    """
+    选择多个视频文件
+    
+    返回:
+        所选视频文件的路径列表
+    """
+    filetypes = [
+        ('视频文件', '*.mp4 *.avi *.mov *.mkv *.flv *.wmv *.webm'),
+        ('所有文件', '*.*')
+    ]
+    file_paths = filedialog.askopenfilenames(
+        title="选择多个视频文件",
+        filetypes=filetypes
+    )
+    return file_paths
+
+def select_output_directory():
+    """
+    选择输出目录
+    
+    返回:
+        所选目录的路径
+    """
+    return filedialog.askdirectory(title="选择输出目录")
+
+def load_multiple_audio_files():
+    """
+    选择多个音频文件
+    
+    返回:
+        所选音频文件的路径列表
+    """
+    filetypes = [
+        ('音频文件', '*.mp3 *.wav *.aac *.ogg *.flac *.m4a'),
+        ('所有文件', '*.*')
+    ]
+    file_paths = filedialog.askopenfilenames(
+        title="选择多个音频文件",
+        filetypes=filetypes
+    )
+    return file_paths
+
+def save_audio_file(default_ext=".mp3"):
+    """
+    选择保存音频文件的位置
+    
+    参数:
+        default_ext: 默认文件扩展名
+        
+    返回:
+        保存文件的路径
+    """
+    filetypes = [
+        ('MP3文件', '*.mp3'),
+        ('WAV文件', '*.wav'),
+        ('AAC文件', '*.aac'),
+        ('OGG文件', '*.ogg'),
+        ('FLAC文件', '*.flac'),
+        ('M4A文件', '*.m4a'),
+        ('所有文件', '*.*')
+    ]
+    
+    # 生成默认文件名，使用当前时间戳
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    default_filename = f"audio_edit_{timestamp}{default_ext}"
+    
+    file_path = filedialog.asksaveasfilename(
+        title="保存音频文件",
+        filetypes=filetypes,
+        defaultextension=default_ext,
+        initialfile=default_filename
+    )
+    return file_path
+
+def load_project_file():
+    """
+    选择项目文件
+    
+    返回:
+        所选项目文件的路径
+    """
+    filetypes = [
+        ('项目文件', '*.aep.json'),
+        ('所有文件', '*.*')
+    ]
+    return filedialog.askopenfilename(
+        title="打开项目",
+        filetypes=filetypes
+    )
+
+def save_project_file():
+    """
+    选择保存项目文件的位置
+    
+    返回:
+        保存文件的路径
+    """
+    filetypes = [
+        ('项目文件', '*.aep.json'),
+        ('所有文件', '*.*')
+    ]
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    return filedialog.asksaveasfilename(
+        title="保存项目",
+        filetypes=filetypes,
+        defaultextension=".aep.json",
+        initialfile=f"project_{timestamp}.aep.json"
+    )
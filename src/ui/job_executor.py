@@ -0,0 +1,245 @@
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.config import get_config_value
+from src.core.progress import CancellationToken, OperationCancelled
+
+
+class Job:
+    """
+    一个后台任务的状态: 描述、进度和取消标记
+    """
+
+    def __init__(self, description, cancellable=False):
+        """
+        参数:
+            description: 任务描述
+            cancellable: 是否支持进度报告和取消
+        """
+        self.description = description
+        self.cancel_token = CancellationToken() if cancellable else None
+        self.progress = None
+        self.future = None
+
+    @property
+    def cancellable(self):
+        """
+        任务是否支持取消
+        """
+        return self.cancel_token is not None
+
+    def set_progress(self, fraction):
+        """
+        记录任务进度(可在工作线程中调用)
+
+        参数:
+            fraction: 0到1之间的完成比例
+        """
+        self.progress = fraction
+
+    def cancel(self):
+        """
+        取消任务: 尚未开始的任务不再执行，正在执行的任务在下一个检查点停止
+        """
+        if self.future is not None:
+            self.future.cancel()
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+
+
+class JobExecutor:
+    """
+    后台任务执行器，让耗时的音频处理不阻塞Tk事件循环
+
+    任务在线程池中执行(音频处理的主要耗时在ffmpeg子进程和文件读写中)，
+    完成后把回调放入队列，由Tk主线程通过after()定时取出并执行，
+    因此回调中可以安全地操作界面组件。
+    工作线程只向队列中放入数据，不调用任何Tk方法；队列检查只在主线程中安排
+
+    除post()以外的方法都只能在主线程中调用
+    """
+
+    def __init__(self, root, max_workers=None, poll_ms=50, idle_poll_ms=200):
+        """
+        初始化任务执行器(在主线程中调用)，同时开始定时检查队列
+
+        参数:
+            root: Tkinter根窗口
+            max_workers: 工作线程数，None表示使用配置值
+            poll_ms: 有任务时检查完成队列的间隔(毫秒)
+            idle_poll_ms: 没有任务时检查队列的间隔(毫秒)
+        """
+        if max_workers is None:
+            max_workers = max(1, int(get_config_value("job_workers", 2)))
+        self.root = root
+        self.poll_ms = poll_ms
+        self.idle_poll_ms = idle_poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audio_job")
+        self._completed = queue.Queue()
+        self._posted = queue.Queue()
+        self._closed = False
+        self._active = {}
+        self._poll_id = None
+        self._listeners = []
+        self._last_progress = None
+        self._schedule_poll(self.idle_poll_ms)
+
+    def submit(self, func, *args, on_done=None, on_error=None, description=None, cancellable=False, **kwargs):
+        """
+        在后台线程中执行任务
+
+        参数:
+            func: 要执行的函数
+            *args, **kwargs: 传递给函数的参数
+            on_done: 成功时在主线程中调用的回调，参数为函数返回值
+            on_error: 失败时在主线程中调用的回调，参数为异常对象
+            description: 任务描述，用于状态显示
+            cancellable: 为True时向函数传入progress和cancel_token关键字参数，
+                         任务可以报告进度并通过cancel_all()取消
+
+        返回:
+            Job对象
+        """
+        job = Job(description or getattr(func, "__name__", ""), cancellable)
+        if cancellable:
+            kwargs["progress"] = job.set_progress
+            kwargs["cancel_token"] = job.cancel_token
+        future = self._executor.submit(func, *args, **kwargs)
+        job.future = future
+        self._active[future] = job
+        future.add_done_callback(lambda f: self._completed.put((f, on_done, on_error)))
+        self._notify()
+        # 空闲时的检查间隔较长，有新任务时提前下一次检查
+        self._schedule_poll(self.poll_ms)
+        return job
+
+    def post(self, callback, *args):
+        """
+        从任意线程请求在主线程中调用callback，用于在任务执行期间更新界面
+
+        只放入队列，不调用Tk方法，由主线程的定时检查取出执行
+
+        参数:
+            callback: 要在主线程中调用的函数
+            *args: 传递给函数的参数
+        """
+        self._posted.put((callback, args))
+
+    def add_listener(self, listener):
+        """
+        注册任务状态监听器，任务开始、结束或进度变化时在主线程中调用
+
+        参数:
+            listener: 回调函数，参数为正在执行的Job列表
+        """
+        self._listeners.append(listener)
+
+    @property
+    def active_jobs(self):
+        """
+        正在执行或等待执行的Job列表
+        """
+        return list(self._active.values())
+
+    def cancel_all(self):
+        """
+        取消全部未完成的可取消任务，不可取消的任务(如读取音频信息)照常执行
+        """
+        for job in self.active_jobs:
+            if job.cancellable:
+                job.cancel()
+
+    @property
+    def is_busy(self):
+        """
+        是否有尚未完成的任务
+        """
+        return bool(self._active)
+
+    def shutdown(self):
+        """
+        取消尚未开始的任务并停止执行器，不等待正在执行的任务结束
+        """
+        self._closed = True
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_poll(self, delay_ms):
+        """
+        安排下一次队列检查(只在主线程中调用)，已安排的检查会被替换
+
+        参数:
+            delay_ms: 距下一次检查的时间(毫秒)
+        """
+        if self._closed:
+            return
+        if self._poll_id is not None:
+            if delay_ms >= self.idle_poll_ms:
+                return
+            self.root.after_cancel(self._poll_id)
+        self._poll_id = self.root.after(delay_ms, self._poll)
+
+    def _poll(self):
+        """
+        在主线程中取出已完成的任务并执行回调
+        """
+        self._poll_id = None
+
+        # 通过post()提交的界面更新
+        while True:
+            try:
+                callback, args = self._posted.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                logging.error(f"执行界面更新时出错: {e}")
+
+        while True:
+            try:
+                future, on_done, on_error = self._completed.get_nowait()
+            except queue.Empty:
+                break
+
+            self._active.pop(future, None)
+            # 开始执行前就被取消的任务同样通过on_error通知，调用方可以据此恢复界面状态
+            error = OperationCancelled("操作已取消") if future.cancelled() else future.exception()
+            try:
+                if error is None:
+                    if on_done is not None:
+                        on_done(future.result())
+                elif on_error is not None:
+                    on_error(error)
+                else:
+                    logging.error(f"后台任务执行失败: {error}")
+            except Exception as e:
+                logging.error(f"执行任务回调时出错: {e}")
+            self._notify()
+
+        # 进度有变化时通知监听器
+        progress = tuple(job.progress for job in self._active.values())
+        if progress != self._last_progress:
+            self._notify()
+
+        # 检查一直在主线程中继续，有任务时间隔较短
+        busy = self._active or not self._posted.empty()
+        self._schedule_poll(self.poll_ms if busy else self.idle_poll_ms)
+
+    def _notify(self):
+        """
+        通知监听器任务状态发生变化
+        """
+        jobs = self.active_jobs
+        self._last_progress = tuple(job.progress for job in jobs)
+        for listener in self._listeners:
+            try:
+                listener(jobs)
+            except Exception as e:
+                logging.error(f"任务状态监听器出错: {e}")
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 from src.utils.language import get_text
+from src.utils import show_error
+from src.core.progress import OperationCancelled
 
 class BaseTab:
     """
@@ -23,4 +25,36 @@ class BaseTab:
         """
         创建UI组件，子类需重写此方法
         """
-        pass 
\ No newline at end of file
+        pass
+    
+    def run_in_background(self, func, *args, on_done=None, on_error=None, error_prefix="操作失败",
+                          description=None, cancellable=False):
+        """
+        在后台线程中执行耗时操作，完成后在主线程中处理结果
+        
+        参数:
+            func: 要执行的函数
+            *args: 传递给函数的参数
+            on_done: 成功时调用的回调，参数为函数返回值
+            on_error: 失败时在显示错误消息之后调用的回调，参数为异常对象
+            error_prefix: 失败时错误消息的前缀
+            description: 任务描述，显示在状态栏中
+            cancellable: 为True时向函数传入progress和cancel_token参数，可在状态栏中查看进度和取消
+            
+        返回:
+            Job对象
+        """
+        def handle_error(error):
+            # 用户主动取消时不显示错误消息
+            if not isinstance(error, OperationCancelled):
+                show_error("错误", f"{error_prefix}: {str(error)}")
+            if on_error is not None:
+                on_error(error)
+        
+        return self.app.jobs.submit(
+            func, *args,
+            on_done=on_done,
+            on_error=handle_error,
+            description=description,
+            cancellable=cancellable
+        )
\ No newline at end of file
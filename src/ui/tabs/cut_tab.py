@@ -4,18 +4,31 @@ from tkinter import ttk, StringVar
 from src.utils import (
     format_time, 
     parse_time, 
-    save_audio_file, 
-    show_error, 
-    show_info
+    parse_time_strict, 
+    show_error
 )
 from src.core import AudioProcessor
+from src.core.project import Project
+from src.core.preview_cache import get_preview_cache
 from .base_tab import BaseTab
 
+# 预览删除效果时，从删除点之前多长时间开始播放(毫秒)
+PREVIEW_LEAD_MS = 3000
+
+# 循环试听删除效果时，删除点前后各播放多长时间(毫秒)
+LOOP_CONTEXT_MS = 2000
+
+# 循环试听时修改时间后，等待多长时间(毫秒)没有新的修改再重新渲染
+LOOP_RESTART_DELAY_MS = 300
+
 class CutTab(BaseTab):
     """
     剪切/删除选项卡
     """
     def __init__(self, parent, app):
+        self.looping = False
+        self._loop_generation = 0
+        self._loop_restart_id = None
         super().__init__(parent, app)
     
     def create_widgets(self):
@@ -58,6 +71,38 @@ class CutTab(BaseTab):
         remove_button = ttk.Button(button_frame, text="删除选定部分", command=self.remove_segment)
         remove_button.pack(side=tk.LEFT, padx=5)
         
+        # 剪切和删除只修改项目，导出项目时才解码和编码一次
+        project_frame = ttk.Frame(cut_frame)
+        project_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Button(project_frame, text="撤销", command=self.app.undo_project_edit).pack(side=tk.LEFT, padx=5)
+        ttk.Button(project_frame, text="导出项目", command=self.app.export_project).pack(side=tk.LEFT, padx=5)
+        ttk.Label(project_frame, text="剪切和删除不会立即写文件，编辑完成后导出项目").pack(side=tk.LEFT, padx=5)
+        
+        # 循环试听: A为选区本身，B为删除选区后接缝前后的一段；循环中修改时间或切换A/B立即生效
+        loop_frame = ttk.Frame(cut_frame)
+        loop_frame.pack(fill=tk.X, pady=5)
+        
+        self.loop_mode_var = StringVar(value="keep")
+        ttk.Radiobutton(loop_frame, text="A: 保留选区", variable=self.loop_mode_var,
+                        value="keep").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(loop_frame, text="B: 删除选区", variable=self.loop_mode_var,
+                        value="remove").pack(side=tk.LEFT, padx=5)
+        self.loop_button = ttk.Button(loop_frame, text="循环试听", command=self.toggle_loop)
+        self.loop_button.pack(side=tk.LEFT, padx=5)
+        
+        for var in (self.start_time_var, self.end_time_var, self.loop_mode_var):
+            var.trace_add("write", lambda *_: self.schedule_loop_restart())
+        
+        # 加入编辑链，在"音频效果"选项卡中与其他操作一起导出
+        chain_frame = ttk.Frame(cut_frame)
+        chain_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Button(chain_frame, text="剪切加入编辑链",
+                   command=lambda: self.add_to_chain("cut")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(chain_frame, text="删除加入编辑链",
+                   command=lambda: self.add_to_chain("remove_segment")).pack(side=tk.LEFT, padx=5)
+        
         # 说明
         note_label = ttk.Label(
             cut_frame, 
@@ -66,15 +111,14 @@ class CutTab(BaseTab):
         )
         note_label.pack(fill=tk.X, pady=5)
     
-    def update_duration(self, duration):
+    def update_project(self):
         """
-        更新音频时长
-        
-        参数:
-            duration: 音频时长(毫秒)
+        项目改变后更新总时长，时间范围对应项目的时间轴
         """
+        duration = self.app.project.duration_ms
         self.duration_var.set(format_time(duration))
-        # 默认设置结束时间为音频总时长
+        # 默认选中整个项目
+        self.start_time_var.set(format_time(0))
         self.end_time_var.set(format_time(duration))
     
     def validate_time_range(self):
@@ -84,7 +128,7 @@ class CutTab(BaseTab):
         返回:
             成功时返回(start_ms, end_ms)元组，失败返回None
         """
-        if not self.app.current_audio_path:
+        if not self.app.project.clips:
             show_error("错误", "请先加载音频文件")
             return None
         
@@ -102,6 +146,18 @@ class CutTab(BaseTab):
             show_error("错误", f"时间格式错误: {str(e)}")
             return None
     
+    def add_to_chain(self, name):
+        """
+        将剪切或删除操作加入编辑链
+        
+        参数:
+            name: "cut"或"remove_segment"
+        """
+        time_range = self.validate_time_range()
+        if not time_range:
+            return
+        self.app.add_edit_operation(name, *time_range)
+    
     def preview_cut(self):
         """
         预览剪切效果
@@ -112,15 +168,12 @@ class CutTab(BaseTab):
             
         start_ms, end_ms = time_range
         
-        try:
-            # 使用统一的预览接口
-            AudioProcessor.preview_operation(
-                self.app.current_audio_path,
-                AudioProcessor.cut_audio,
-                start_ms, end_ms
-            )
-        except Exception as e:
-            show_error("错误", f"预览剪切音频失败: {str(e)}")
+        # 只渲染项目中选定的范围，源音频通过预览缓存加载
+        self.run_in_background(
+            self.play_loop_audio, self.app.project.copy(), "keep", start_ms, end_ms,
+            error_prefix="预览剪切音频失败",
+            description="预览剪切"
+        )
     
     def preview_remove(self):
         """
@@ -132,54 +185,138 @@ class CutTab(BaseTab):
             
         start_ms, end_ms = time_range
         
+        # 在项目的副本上删除，预览时只渲染删除点前后的一段
+        project = self.app.project.copy()
+        project.delete_range(start_ms, end_ms)
+        
+        self.run_in_background(
+            project.preview, max(0, start_ms - PREVIEW_LEAD_MS),
+            error_prefix="预览删除效果失败",
+            description="预览删除"
+        )
+    
+    @staticmethod
+    def play_loop_audio(project, mode, start_ms, end_ms):
+        """
+        渲染并播放一次选区或删除效果(不循环)
+        """
+        AudioProcessor.preview_audio(CutTab.render_loop_audio(project, mode, start_ms, end_ms))
+    
+    def toggle_loop(self):
+        """
+        开始或停止循环试听
+        """
+        if self.looping:
+            self.stop_loop()
+            return
+        if not self.validate_time_range():
+            return
+        self.looping = True
+        self.loop_button.config(text="停止循环")
+        self.restart_loop()
+    
+    def stop_loop(self):
+        """
+        停止循环试听
+        """
+        self.looping = False
+        self._loop_generation += 1
+        if self._loop_restart_id is not None:
+            self.frame.after_cancel(self._loop_restart_id)
+            self._loop_restart_id = None
+        self.loop_button.config(text="循环试听")
+        AudioProcessor.stop_preview()
+    
+    def schedule_loop_restart(self):
+        """
+        循环试听中修改了时间或A/B，稍后按新的设置重新开始循环
+        """
+        if not self.looping:
+            return
+        if self._loop_restart_id is not None:
+            self.frame.after_cancel(self._loop_restart_id)
+        self._loop_restart_id = self.frame.after(LOOP_RESTART_DELAY_MS, self.restart_loop)
+    
+    def restart_loop(self):
+        """
+        按当前的时间范围和A/B设置渲染并循环播放
+        """
+        self._loop_restart_id = None
+        if not self.looping:
+            return
         try:
-            # 使用统一的预览接口
-            AudioProcessor.preview_operation(
-                self.app.current_audio_path,
-                AudioProcessor.remove_segment,
-                start_ms, end_ms
-            )
-        except Exception as e:
-            show_error("错误", f"预览删除效果失败: {str(e)}")
+            # 每次按键都会触发，格式不完整时不弹出错误对话框，等待下一次修改
+            start_ms = parse_time_strict(self.start_time_var.get())
+            end_ms = parse_time_strict(self.end_time_var.get())
+        except ValueError:
+            return
+        if start_ms >= end_ms:
+            return
+        
+        self._loop_generation += 1
+        generation = self._loop_generation
+        
+        def on_done(audio):
+            # 在界面线程中检查并开始播放，与stop_loop不会交错执行；
+            # 渲染期间又有新的修改或已停止循环时，不播放过时的结果
+            if self.looping and generation == self._loop_generation:
+                AudioProcessor.preview_audio(audio, loop=True)
+        
+        def on_error(_):
+            if generation == self._loop_generation:
+                self.stop_loop()
+        
+        self.run_in_background(
+            self.render_loop_audio, self.app.project.copy(), self.loop_mode_var.get(), start_ms, end_ms,
+            on_done=on_done,
+            on_error=on_error,
+            error_prefix="循环试听失败",
+            description="循环试听"
+        )
+    
+    @staticmethod
+    def render_loop_audio(project, mode, start_ms, end_ms):
+        """
+        渲染循环试听的音频，源音频通过预览缓存加载，只解码新边界所在的块
+        
+        参数:
+            project: Project对象(副本，不会被修改)
+            mode: "keep"(选区本身)或"remove"(删除选区后接缝前后的一段)
+            start_ms: 选区开始时间(毫秒)
+            end_ms: 选区结束时间(毫秒)
+            
+        返回:
+            AudioSegment对象
+        """
+        cache = get_preview_cache()
+        if mode == "keep":
+            return project.render_range(start_ms, end_ms, loader=cache.load_range)
+        
+        project = project.copy()
+        project.delete_range(start_ms, end_ms)
+        return project.render_range(max(0, start_ms - LOOP_CONTEXT_MS), start_ms + LOOP_CONTEXT_MS,
+                                    loader=cache.load_range)
     
     def cut_audio(self):
         """
-        剪切音频
+        剪切音频: 项目中只保留选定部分
         """
         time_range = self.validate_time_range()
         if not time_range:
             return
-            
         start_ms, end_ms = time_range
-        
-        try:
-            output_path = save_audio_file()
-            if not output_path:
-                return
-                
-            AudioProcessor.cut_audio(self.app.current_audio_path, output_path, start_ms, end_ms)
-            show_info("成功", f"已成功剪切音频并保存到: {output_path}")
-            
-        except Exception as e:
-            show_error("错误", f"剪切音频失败: {str(e)}")
+        self.app.edit_project(
+            f"剪切 {format_time(start_ms)} - {format_time(end_ms)}", Project.trim, start_ms, end_ms
+        )
     
     def remove_segment(self):
         """
-        删除音频片段
+        删除音频片段: 从项目中删除选定部分
         """
         time_range = self.validate_time_range()
         if not time_range:
             return
-            
         start_ms, end_ms = time_range
-        
-        try:
-            output_path = save_audio_file()
-            if not output_path:
-                return
-                
-            AudioProcessor.remove_segment(self.app.current_audio_path, output_path, start_ms, end_ms)
-            show_info("成功", f"已成功删除音频片段并保存到: {output_path}")
-            
-        except Exception as e:
-            show_error("错误", f"删除音频片段失败: {str(e)}") 
\ No newline at end of file
+        self.app.edit_project(
+            f"删除 {format_time(start_ms)} - {format_time(end_ms)}", Project.delete_range, start_ms, end_ms
+        )
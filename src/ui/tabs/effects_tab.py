@@ -1,12 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, DoubleVar, IntVar
 
-from src.utils import (
-    save_audio_file, 
-    show_error, 
-    show_info
-)
+from src.utils import show_error, show_info
+from src.ui.dialogs import save_audio_file
+from src.utils.config import get_config_value
 from src.core import AudioProcessor
+from src.core.preview_cache import get_preview_cache
+from src.core.project import Project
 from .base_tab import BaseTab
 
 class EffectsTab(BaseTab):
@@ -28,6 +28,9 @@ class EffectsTab(BaseTab):
         reverse_button = ttk.Button(reverse_frame, text="倒放音频", command=self.reverse_audio)
         reverse_button.pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(reverse_frame, text="加入编辑链",
+                   command=lambda: self.app.add_edit_operation("reverse")).pack(side=tk.LEFT, padx=5)
+        
         ttk.Label(reverse_frame, text="将音频从后向前播放").pack(side=tk.LEFT, padx=5)
         
         # 调整音量
@@ -45,6 +48,10 @@ class EffectsTab(BaseTab):
         volume_button = ttk.Button(volume_frame, text="应用", command=self.adjust_volume)
         volume_button.pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(volume_frame, text="加入编辑链",
+                   command=lambda: self.app.add_edit_operation("adjust_volume", round(self.volume_var.get(), 1))
+                   ).pack(side=tk.LEFT, padx=5)
+        
         # 改变速度
         speed_frame = ttk.Frame(effects_frame)
         speed_frame.pack(fill=tk.X, pady=5)
@@ -60,6 +67,12 @@ class EffectsTab(BaseTab):
         speed_button = ttk.Button(speed_frame, text="应用", command=self.change_speed)
         speed_button.pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(speed_frame, text="预览", command=self.preview_speed).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(speed_frame, text="加入编辑链",
+                   command=lambda: self.app.add_edit_operation("change_speed", round(self.speed_var.get(), 2))
+                   ).pack(side=tk.LEFT, padx=5)
+        
         # 淡入淡出
         fade_frame = ttk.Frame(effects_frame)
         fade_frame.pack(fill=tk.X, pady=5)
@@ -74,98 +87,259 @@ class EffectsTab(BaseTab):
         
         fade_out_button = ttk.Button(fade_frame, text="应用淡出", command=self.apply_fade_out)
         fade_out_button.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(fade_frame, text="淡入加入编辑链",
+                   command=lambda: self.add_fade_to_chain("fade_in")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(fade_frame, text="淡出加入编辑链",
+                   command=lambda: self.add_fade_to_chain("fade_out")).pack(side=tk.LEFT, padx=5)
+        
+        # 编辑链: 叠加多个操作后一次性导出
+        self.create_chain_widgets()
     
-    def reverse_audio(self):
+    def create_chain_widgets(self):
         """
-        倒放音频
+        创建编辑链界面，显示已叠加的操作
+        """
+        chain_frame = ttk.LabelFrame(self.frame, text="编辑链(按顺序执行，只解码和编码一次)", padding="10")
+        chain_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        list_frame = ttk.Frame(chain_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        
+        scrollbar = ttk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.chain_listbox = tk.Listbox(list_frame, height=6, yscrollcommand=scrollbar.set)
+        self.chain_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.chain_listbox.yview)
+        
+        button_frame = ttk.Frame(chain_frame)
+        button_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Button(button_frame, text="移除所选", command=self.remove_chain_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="清空", command=self.clear_chain).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="预览编辑链", command=self.preview_chain).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="导出编辑链结果", command=self.export_chain).pack(side=tk.LEFT, padx=5)
+    
+    def refresh_edit_chain(self):
+        """
+        根据应用的编辑链刷新列表
+        """
+        self.chain_listbox.delete(0, tk.END)
+        for index, operation in enumerate(self.app.edit_chain, 1):
+            self.chain_listbox.insert(tk.END, f"{index}. {operation.describe()}")
+    
+    def add_fade_to_chain(self, name):
+        """
+        将淡入或淡出加入编辑链
+        
+        参数:
+            name: "fade_in"或"fade_out"
         """
-        if not self.app.current_audio_path:
-            show_error("错误", "请先加载音频文件")
-            return
-            
         try:
-            output_path = save_audio_file()
-            if not output_path:
-                return
-                
-            AudioProcessor.reverse_audio(self.app.current_audio_path, output_path)
-            show_info("成功", f"已成功倒放音频并保存到: {output_path}")
-            
+            fade_ms = self.fade_var.get()
         except Exception as e:
-            show_error("错误", f"倒放音频失败: {str(e)}")
+            show_error("错误", f"淡入/淡出时长无效: {str(e)}")
+            return
+        self.app.add_edit_operation(name, fade_ms)
     
-    def adjust_volume(self):
+    def remove_chain_selected(self):
         """
-        调整音频音量
+        从编辑链中移除选定的操作
         """
-        if not self.app.current_audio_path:
+        for index in sorted(self.chain_listbox.curselection(), reverse=True):
+            self.app.edit_chain.remove(index)
+        self.refresh_edit_chain()
+    
+    def clear_chain(self):
+        """
+        清空编辑链
+        """
+        self.app.edit_chain.clear()
+        self.refresh_edit_chain()
+    
+    def validate_chain(self):
+        """
+        检查是否可以执行编辑链
+        
+        返回:
+            bool: 是否可以执行
+        """
+        if not self.app.project.clips:
             show_error("错误", "请先加载音频文件")
+            return False
+        if not len(self.app.edit_chain):
+            show_error("错误", "编辑链为空，请先加入操作")
+            return False
+        return True
+    
+    def preview_chain(self):
+        """
+        预览编辑链的处理结果
+        """
+        if not self.validate_chain():
             return
+        
+        chain = self.app.edit_chain.copy()
+        
+        def render_and_play(project):
+            # 只渲染预览时长对应的部分，编辑链不变时复用上次的结果
+            source = self.project_source(project, chain.preview_source_ms())
+            AudioProcessor.preview_audio(chain.render_preview(source))
+        
+        self.run_in_background(
+            render_and_play, self.app.project.copy(),
+            error_prefix="预览编辑链失败",
+            description="预览编辑链"
+        )
+    
+    def project_source(self, project, end_ms=None):
+        """
+        获取项目的结果作为处理的输入(在后台线程中调用)，项目未经编辑时直接使用已加载的音频
+        
+        参数:
+            project: Project对象(副本)
+            end_ms: 只需要项目开头到end_ms的部分(预览)，None表示整个项目
             
-        try:
-            output_path = save_audio_file()
-            if not output_path:
-                return
-                
-            AudioProcessor.adjust_volume(self.app.current_audio_path, output_path, self.volume_var.get())
-            show_info("成功", f"已成功调整音频音量并保存到: {output_path}")
-            
-        except Exception as e:
-            show_error("错误", f"调整音频音量失败: {str(e)}")
+        返回:
+            AudioHandle或AudioSegment对象
+        """
+        return project.render_source(self.app.current_audio, self.app.audio_duration, end_ms,
+                                     loader=get_preview_cache().load_range if end_ms is not None else None)
     
-    def change_speed(self):
+    def export_chain(self):
         """
-        改变音频速度
+        执行编辑链并导出结果
         """
-        if not self.app.current_audio_path:
+        if not self.validate_chain():
+            return
+        
+        output_path = save_audio_file()
+        if not output_path:
+            return
+        
+        chain = self.app.edit_chain.copy()
+        
+        def render(project, output_path, progress=None, cancel_token=None):
+            chain.render(self.project_source(project), output_path, progress=progress, cancel_token=cancel_token)
+        
+        self.run_in_background(
+            render, self.app.project.copy(), output_path,
+            on_done=lambda _: show_info("成功", f"已成功执行编辑链并保存到: {output_path}"),
+            error_prefix="执行编辑链失败",
+            description="执行编辑链",
+            cancellable=True
+        )
+    
+    def check_project(self):
+        """
+        检查是否已加载音频
+        
+        返回:
+            bool: 是否已加载
+        """
+        if not self.app.project.clips:
             show_error("错误", "请先加载音频文件")
+            return False
+        return True
+    
+    def run_on_project(self, operation, output_path, *args, **kwargs):
+        """
+        在后台对项目的结果执行一个会写出新文件的处理(倒放、变速)
+        
+        参数:
+            operation: AudioProcessor的处理函数
+            output_path: 输出文件路径
+            *args: 处理函数的其他参数
+            **kwargs: 传递给run_in_background的参数
+        """
+        def run(project, progress=None, cancel_token=None):
+            return operation(self.project_source(project), output_path, *args,
+                             progress=progress, cancel_token=cancel_token)
+        
+        self.run_in_background(run, self.app.project.copy(), cancellable=True, **kwargs)
+    
+    def reverse_audio(self):
+        """
+        倒放音频(项目的结果)并保存为新文件
+        """
+        if not self.check_project():
             return
             
-        try:
-            output_path = save_audio_file()
-            if not output_path:
-                return
-                
-            AudioProcessor.change_speed(self.app.current_audio_path, output_path, self.speed_var.get())
-            show_info("成功", f"已成功改变音频速度并保存到: {output_path}")
-            
-        except Exception as e:
-            show_error("错误", f"改变音频速度失败: {str(e)}")
+        output_path = save_audio_file()
+        if not output_path:
+            return
+        
+        self.run_on_project(
+            AudioProcessor.reverse_audio, output_path,
+            on_done=lambda _: show_info("成功", f"已成功倒放音频并保存到: {output_path}"),
+            error_prefix="倒放音频失败",
+            description="倒放音频"
+        )
     
-    def apply_fade_in(self):
+    def adjust_volume(self):
         """
-        应用淡入效果
+        调整项目的音量，只修改片段的增益，导出项目时生效
         """
-        if not self.app.current_audio_path:
-            show_error("错误", "请先加载音频文件")
+        volume_db = round(self.volume_var.get(), 1)
+        self.app.edit_project(f"音量 {volume_db:+.1f}dB", Project.adjust_gain, volume_db)
+    
+    def change_speed(self):
+        """
+        改变音频(项目的结果)的速度并保存为新文件
+        """
+        if not self.check_project():
             return
             
+        output_path = save_audio_file()
+        if not output_path:
+            return
+        
+        self.run_on_project(
+            AudioProcessor.change_speed, output_path, self.speed_var.get(),
+            on_done=lambda _: show_info("成功", f"已成功改变音频速度并保存到: {output_path}"),
+            error_prefix="改变音频速度失败",
+            description="改变音频速度"
+        )
+    
+    def preview_speed(self):
+        """
+        预览改变速度的效果，只处理开头一段音频
+        """
+        if not self.check_project():
+            return
+        
+        speed_factor = self.speed_var.get()
+        window_ms = int(get_config_value("preview_window_ms", 15000))
+        
+        def render_and_play(project):
+            source = self.project_source(project, int(window_ms * speed_factor))
+            AudioProcessor.preview_operation(source, AudioProcessor.change_speed, speed_factor)
+        
+        self.run_in_background(
+            render_and_play, self.app.project.copy(),
+            error_prefix="预览改变速度失败",
+            description="预览改变速度"
+        )
+    
+    def apply_fade_in(self):
+        """
+        设置项目开头的淡入，导出项目时生效
+        """
         try:
-            output_path = save_audio_file()
-            if not output_path:
-                return
-                
-            AudioProcessor.fade_in(self.app.current_audio_path, output_path, self.fade_var.get())
-            show_info("成功", f"已成功应用淡入效果并保存到: {output_path}")
-            
+            fade_ms = self.fade_var.get()
         except Exception as e:
             show_error("错误", f"应用淡入效果失败: {str(e)}")
+            return
+        self.app.edit_project(f"淡入 {fade_ms}毫秒", Project.set_fade_in, fade_ms)
     
     def apply_fade_out(self):
         """
-        应用淡出效果
+        设置项目结尾的淡出，导出项目时生效
         """
-        if not self.app.current_audio_path:
-            show_error("错误", "请先加载音频文件")
-            return
-            
         try:
-            output_path = save_audio_file()
-            if not output_path:
-                return
-                
-            AudioProcessor.fade_out(self.app.current_audio_path, output_path, self.fade_var.get())
-            show_info("成功", f"已成功应用淡出效果并保存到: {output_path}")
-            
+            fade_ms = self.fade_var.get()
         except Exception as e:
-            show_error("错误", f"应用淡出效果失败: {str(e)}") 
\ No newline at end of file
+            show_error("错误", f"应用淡出效果失败: {str(e)}")
+            return
+        self.app.edit_project(f"淡出 {fade_ms}毫秒", Project.set_fade_out, fade_ms)
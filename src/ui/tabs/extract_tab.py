@@ -2,20 +2,48 @@ import tkinter as tk
 from tkinter import ttk, StringVar, IntVar, BooleanVar
 import os
 
-from src.utils import (
+from src.utils import show_error, show_info
+from src.ui.dialogs import (
     load_video_file,
+    load_multiple_video_files,
     save_audio_file,
-    show_error,
-    show_info
+    select_output_directory
 )
 from src.core import AudioProcessor
+from src.core.progress import OperationCancelled
+from src.core.batch_extract import (
+    extract_batch,
+    get_extract_worker_count,
+    get_video_audio_info_cached,
+    unique_paths,
+    STATUS_PENDING,
+    STATUS_PROBING,
+    STATUS_EXTRACTING,
+    STATUS_DONE,
+    STATUS_SKIPPED,
+    STATUS_FAILED,
+    STATUS_CANCELLED
+)
 from .base_tab import BaseTab
 
+# 批量提取状态的显示文本
+BATCH_STATUS_TEXT = {
+    STATUS_PENDING: "等待中",
+    STATUS_PROBING: "读取信息",
+    STATUS_EXTRACTING: "提取中",
+    STATUS_DONE: "完成",
+    STATUS_SKIPPED: "已存在，跳过",
+    STATUS_FAILED: "失败",
+    STATUS_CANCELLED: "已取消"
+}
+
 class ExtractTab(BaseTab):
     """
     视频音频提取选项卡
     """
     def __init__(self, parent, app):
+        self.batch_paths = []  # 批量提取队列中的视频文件
+        self.batch_running = False
         self.video_path = None
         self.video_name = StringVar(value="未选择视频文件")
         self.audio_info = None  # 存储视频音频信息
@@ -116,6 +144,9 @@ class ExtractTab(BaseTab):
         extract_button = ttk.Button(button_frame, text="提取音频", command=self.extract_audio)
         extract_button.pack(side=tk.LEFT, padx=5)
         
+        # 批量提取队列
+        self.create_batch_widgets(extract_frame)
+        
         # 提示信息
         info_frame = ttk.Frame(extract_frame)
         info_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -131,6 +162,9 @@ class ExtractTab(BaseTab):
         4. 点击"提取音频"按钮
         5. 选择保存位置
         
+        批量提取: 添加多个视频并选择输出目录，按上面的格式和质量设置同时提取，
+        并行数为同时运行的FFmpeg进程数
+        
         支持的视频格式: MP4, AVI, MOV, MKV, FLV, WMV, WebM
         支持的音频格式: MP3, WAV, AAC, OGG, FLAC, M4A
         
@@ -145,6 +179,191 @@ class ExtractTab(BaseTab):
         status_label = ttk.Label(extract_frame, textvariable=self.status_var)
         status_label.pack(fill=tk.X, pady=5)
     
+    def create_batch_widgets(self, parent_frame):
+        """
+        创建批量提取队列界面
+        
+        参数:
+            parent_frame: 父级容器
+        """
+        batch_frame = ttk.LabelFrame(parent_frame, text="批量提取", padding="5")
+        batch_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        # 队列操作按钮
+        tools_frame = ttk.Frame(batch_frame)
+        tools_frame.pack(fill=tk.X, pady=2)
+        
+        ttk.Button(tools_frame, text="添加视频文件", command=self.add_batch_files).pack(side=tk.LEFT, padx=5)
+        ttk.Button(tools_frame, text="移除所选", command=self.remove_batch_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(tools_frame, text="清空队列", command=self.clear_batch).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(tools_frame, text="并行数:").pack(side=tk.LEFT, padx=(15, 5))
+        self.workers_var = IntVar(value=get_extract_worker_count())
+        ttk.Spinbox(tools_frame, from_=1, to=64, textvariable=self.workers_var, width=4).pack(side=tk.LEFT)
+        
+        self.overwrite_var = BooleanVar(value=False)
+        ttk.Checkbutton(tools_frame, text="覆盖已存在的文件", variable=self.overwrite_var).pack(side=tk.LEFT, padx=10)
+        
+        # 输出目录
+        output_frame = ttk.Frame(batch_frame)
+        output_frame.pack(fill=tk.X, pady=2)
+        
+        ttk.Button(output_frame, text="选择输出目录", command=self.choose_output_dir).pack(side=tk.LEFT, padx=5)
+        self.output_dir_var = StringVar(value="")
+        ttk.Label(output_frame, textvariable=self.output_dir_var).pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        
+        self.batch_button = ttk.Button(output_frame, text="开始批量提取", command=self.start_batch)
+        self.batch_button.pack(side=tk.RIGHT, padx=5)
+        
+        # 队列列表，每个视频一行，显示状态
+        tree_container = ttk.Frame(batch_frame)
+        tree_container.pack(fill=tk.BOTH, expand=True, pady=2)
+        
+        scrollbar = ttk.Scrollbar(tree_container)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.batch_tree = ttk.Treeview(
+            tree_container,
+            columns=("file", "status"),
+            show="headings",
+            height=5,
+            yscrollcommand=scrollbar.set
+        )
+        self.batch_tree.heading("file", text="视频文件")
+        self.batch_tree.heading("status", text="状态")
+        self.batch_tree.column("file", width=400)
+        self.batch_tree.column("status", width=200)
+        self.batch_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.batch_tree.yview)
+    
+    def add_batch_files(self):
+        """
+        添加视频文件到批量提取队列，已在队列中的文件不重复添加
+        """
+        files = load_multiple_video_files()
+        if not files:
+            return
+        
+        new_paths = [path for path in unique_paths(self.batch_paths + list(files)) if path not in self.batch_paths]
+        for path in new_paths:
+            self.batch_paths.append(path)
+            self.batch_tree.insert("", tk.END, iid=path, values=(path, BATCH_STATUS_TEXT[STATUS_PENDING]))
+    
+    def remove_batch_selected(self):
+        """
+        从队列中移除选定的视频
+        """
+        if self.batch_running:
+            return
+        for path in self.batch_tree.selection():
+            self.batch_tree.delete(path)
+            self.batch_paths.remove(path)
+    
+    def clear_batch(self):
+        """
+        清空批量提取队列
+        """
+        if self.batch_running:
+            return
+        self.batch_paths = []
+        self.batch_tree.delete(*self.batch_tree.get_children())
+    
+    def choose_output_dir(self):
+        """
+        选择批量提取的输出目录
+        """
+        output_dir = select_output_directory()
+        if output_dir:
+            self.output_dir_var.set(output_dir)
+    
+    def get_bitrate_option(self):
+        """
+        根据质量选项获取extract_audio_from_video使用的比特率参数
+        """
+        quality_option = self.quality_var.get()
+        if quality_option in ("original", "original_quality"):
+            return quality_option
+        return self.bitrate_var.get()
+    
+    def start_batch(self):
+        """
+        开始批量提取队列中的全部视频
+        """
+        if self.batch_running:
+            return
+        if not self.batch_paths:
+            show_error("错误", "请先添加视频文件")
+            return
+        output_dir = self.output_dir_var.get()
+        if not output_dir:
+            show_error("错误", "请先选择输出目录")
+            return
+        try:
+            workers = max(1, int(self.workers_var.get()))
+        except Exception:
+            show_error("错误", "并行数必须是正整数")
+            return
+        
+        for path in self.batch_paths:
+            self.batch_tree.set(path, "status", BATCH_STATUS_TEXT[STATUS_PENDING])
+        
+        self.batch_running = True
+        self.batch_button.configure(state=tk.DISABLED)
+        self.run_in_background(
+            extract_batch,
+            list(self.batch_paths), output_dir, self.format_var.get(), self.get_bitrate_option(),
+            overwrite=self.overwrite_var.get(),
+            max_workers=workers,
+            on_update=lambda *args: self.app.jobs.post(self.update_batch_item, *args),
+            on_done=self.on_batch_done,
+            on_error=lambda e: self.finish_batch(),
+            error_prefix="批量提取失败",
+            description="批量提取",
+            cancellable=True
+        )
+    
+    def update_batch_item(self, path, status, detail=None):
+        """
+        更新队列中一个视频的状态(在主线程中调用)
+        
+        参数:
+            path: 视频文件路径
+            status: 状态
+            detail: 状态详情
+        """
+        if not self.batch_tree.exists(path):
+            return
+        text = BATCH_STATUS_TEXT.get(status, status)
+        if status == STATUS_EXTRACTING and detail:
+            text = f"{text} {int(detail * 100)}%"
+        elif status == STATUS_FAILED and detail:
+            text = f"{text}: {detail}"
+        self.batch_tree.set(path, "status", text)
+    
+    def on_batch_done(self, results):
+        """
+        批量提取完成后显示汇总信息
+        
+        参数:
+            results: extract_batch的返回值
+        """
+        self.finish_batch()
+        failed = sum(1 for _, error in results.values() if error is not None and not isinstance(error, OperationCancelled))
+        cancelled = sum(1 for _, error in results.values() if isinstance(error, OperationCancelled))
+        succeeded = len(results) - failed - cancelled
+        message = f"批量提取完成: 成功 {succeeded} 个，失败 {failed} 个"
+        if cancelled:
+            message += f"，取消 {cancelled} 个"
+        self.status_var.set(message)
+        show_info("完成", message)
+    
+    def finish_batch(self):
+        """
+        批量提取结束后恢复界面状态
+        """
+        self.batch_running = False
+        self.batch_button.configure(state=tk.NORMAL)
+    
     def check_format_compatibility(self, event=None):
         """
         检查所选格式是否与原始编码器兼容
@@ -183,32 +402,52 @@ class ExtractTab(BaseTab):
         if video_path:
             self.video_path = video_path
             self.video_name.set(os.path.basename(video_path))
-            self.status_var.set("已选择视频文件，准备提取")
+            self.status_var.set("正在读取视频音频信息...")
             
-            # 获取视频音频信息
-            self.audio_info = AudioProcessor.get_video_audio_info(video_path)
-            self.original_codec = self.audio_info['codec_name']
-            
-            # 更新显示
-            info_text = f"音频信息: "
-            if self.audio_info['codec_name'] != 'unknown':
-                info_text += f"编码器: {self.audio_info['codec_name']}, "
-            if self.audio_info['bit_rate'] != 'unknown':
-                bit_rate_kb = int(int(self.audio_info['bit_rate']) / 1000)
-                info_text += f"比特率: {bit_rate_kb}k, "
-            if self.audio_info['sample_rate'] != 'unknown':
-                info_text += f"采样率: {self.audio_info['sample_rate']}Hz, "
-            if self.audio_info['channels'] != 'unknown':
-                info_text += f"声道数: {self.audio_info['channels']}"
-                
-            self.audio_info_var.set(info_text.strip(", "))
-            
-            # 默认选择自定义比特率
-            self.quality_var.set("custom")
-            self.toggle_bitrate_option()
+            # 在后台获取视频音频信息
+            self.run_in_background(
+                get_video_audio_info_cached, video_path,
+                on_done=lambda info: self.on_video_info(video_path, info),
+                error_prefix="读取视频音频信息失败",
+                description="读取视频信息"
+            )
+    
+    def on_video_info(self, video_path, audio_info):
+        """
+        视频音频信息读取完成后更新界面
+        
+        参数:
+            video_path: 视频文件路径
+            audio_info: get_video_audio_info返回的信息字典
+        """
+        # 读取期间又选择了其他视频时忽略旧结果
+        if video_path != self.video_path:
+            return
+        
+        self.status_var.set("已选择视频文件，准备提取")
+        self.audio_info = audio_info
+        self.original_codec = self.audio_info['codec_name']
+        
+        # 更新显示
+        info_text = f"音频信息: "
+        if self.audio_info['codec_name'] != 'unknown':
+            info_text += f"编码器: {self.audio_info['codec_name']}, "
+        if self.audio_info['bit_rate'] != 'unknown':
+            bit_rate_kb = int(int(self.audio_info['bit_rate']) / 1000)
+            info_text += f"比特率: {bit_rate_kb}k, "
+        if self.audio_info['sample_rate'] != 'unknown':
+            info_text += f"采样率: {self.audio_info['sample_rate']}Hz, "
+        if self.audio_info['channels'] != 'unknown':
+            info_text += f"声道数: {self.audio_info['channels']}"
             
-            # 检查格式兼容性
-            self.check_format_compatibility()
+        self.audio_info_var.set(info_text.strip(", "))
+        
+        # 默认选择自定义比特率
+        self.quality_var.set("custom")
+        self.toggle_bitrate_option()
+        
+        # 检查格式兼容性
+        self.check_format_compatibility()
     
     def extract_audio(self):
         """
@@ -223,13 +462,7 @@ class ExtractTab(BaseTab):
             audio_format = self.format_var.get()
             
             # 根据质量选项设置比特率
-            quality_option = self.quality_var.get()
-            if quality_option == "original":
-                audio_bitrate = "original"
-            elif quality_option == "original_quality":
-                audio_bitrate = "original_quality"
-            else:  # custom
-                audio_bitrate = self.bitrate_var.get()
+            audio_bitrate = self.get_bitrate_option()
             
             # 选择保存位置
             default_ext = f".{audio_format}"
@@ -239,29 +472,63 @@ class ExtractTab(BaseTab):
             
             # 更新状态
             self.status_var.set("正在提取音频，请稍候...")
-            self.frame.update()  # 更新UI
             
-            # 提取音频
-            success = AudioProcessor.extract_audio_from_video(
-                self.video_path, 
-                output_path, 
-                audio_format, 
-                audio_bitrate
+            # 在后台提取音频
+            self.run_in_background(
+                self.run_extraction, self.video_path, output_path, audio_format, audio_bitrate,
+                on_done=lambda result: self.on_extract_done(output_path, result),
+                on_error=self.on_extract_error,
+                error_prefix="提取音频时出错",
+                description="提取音频",
+                cancellable=True
             )
-            
-            if success:
-                show_info("成功", f"音频提取成功并保存到:\n{output_path}")
-                self.status_var.set("音频提取成功")
-            else:
-                # 如果FFmpeg失败，尝试使用pydub
-                backup_success = AudioProcessor.extract_audio_with_pydub(self.video_path, output_path)
-                if backup_success:
-                    show_info("成功", f"音频提取成功并保存到:\n{output_path}")
-                    self.status_var.set("音频提取成功（使用备用方法）")
-                else:
-                    show_error("错误", "无法提取音频。请确保已正确安装FFmpeg并添加到系统路径。")
-                    self.status_var.set("音频提取失败")
         
         except Exception as e:
             show_error("错误", f"提取音频时出错: {str(e)}")
-            self.status_var.set("音频提取失败") 
\ No newline at end of file
+            self.status_var.set("音频提取失败")
+    
+    @staticmethod
+    def run_extraction(video_path, output_path, audio_format, audio_bitrate, progress=None, cancel_token=None):
+        """
+        提取音频(在后台线程中执行)，FFmpeg失败时尝试使用pydub
+        
+        返回:
+            "ffmpeg"、"pydub"或None(均失败)
+        """
+        if AudioProcessor.extract_audio_from_video(video_path, output_path, audio_format, audio_bitrate,
+                                                   progress=progress, cancel_token=cancel_token):
+            return "ffmpeg"
+        if AudioProcessor.extract_audio_with_pydub(video_path, output_path,
+                                                   progress=progress, cancel_token=cancel_token):
+            return "pydub"
+        return None
+    
+    def on_extract_error(self, error):
+        """
+        提取失败或被取消时更新状态
+        
+        参数:
+            error: 异常对象
+        """
+        if isinstance(error, OperationCancelled):
+            self.status_var.set("已取消提取")
+        else:
+            self.status_var.set("音频提取失败")
+    
+    def on_extract_done(self, output_path, result):
+        """
+        提取完成后更新界面
+        
+        参数:
+            output_path: 输出文件路径
+            result: run_extraction的返回值
+        """
+        if result == "ffmpeg":
+            show_info("成功", f"音频提取成功并保存到:\n{output_path}")
+            self.status_var.set("音频提取成功")
+        elif result == "pydub":
+            show_info("成功", f"音频提取成功并保存到:\n{output_path}")
+            self.status_var.set("音频提取成功（使用备用方法）")
+        else:
+            show_error("错误", "无法提取音频。请确保已正确安装FFmpeg并添加到系统路径。")
+            self.status_var.set("音频提取失败")
\ No newline at end of file
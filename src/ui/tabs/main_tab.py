@@ -70,6 +70,9 @@ class MainTab(BaseTab):
         preview_part_button = ttk.Button(preview_frame, text="预览片段", command=self.preview_part)
         preview_part_button.pack(side=tk.LEFT, padx=5)
         
+        stop_button = ttk.Button(preview_frame, text="停止", command=AudioProcessor.stop_preview)
+        stop_button.pack(side=tk.LEFT, padx=5)
+        
         # 添加使用说明
         help_frame = ttk.LabelFrame(self.frame, text="使用说明", padding="10")
         help_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -97,8 +100,12 @@ class MainTab(BaseTab):
             show_error("错误", "请先加载音频文件")
             return
             
-        # 直接调用预览功能
-        AudioProcessor.preview_audio(self.app.current_audio_path)
+        # 在后台渲染并播放
+        self.run_in_background(
+            AudioProcessor.preview_audio, self.app.current_audio,
+            error_prefix="预览音频失败",
+            description="预览音频"
+        )
     
     def preview_part(self):
         """
@@ -122,8 +129,12 @@ class MainTab(BaseTab):
             # 计算时长
             duration_ms = end_ms - start_ms
             
-            # 直接调用预览方法
-            AudioProcessor.preview_audio(self.app.current_audio_path, start_ms, duration_ms)
+            # 在后台渲染并播放
+            self.run_in_background(
+                AudioProcessor.preview_audio, self.app.current_audio, start_ms, duration_ms,
+                error_prefix="预览音频片段失败",
+                description="预览片段"
+            )
             
         except Exception as e:
             from src.utils import show_error
@@ -2,17 +2,16 @@ import tkinter as tk
 from tkinter import ttk
 import os
 from PIL import Image, ImageTk
-import math
 
 from src.utils import (
-    load_multiple_audio_files, 
-    save_audio_file, 
     show_error, 
-    show_info,
-    format_time,
-    get_audio_duration
+    show_info
 )
-from src.core import AudioProcessor
+from src.ui.dialogs import load_multiple_audio_files, save_audio_file
+from src.core import AudioProcessor, probe_audio
+from src.core.parallel import parallel_map
+from src.core.project import Project
+from src.ui.timeline_view import TimelineView, CANVAS_HEIGHT
 from .base_tab import BaseTab
 
 class MergeTab(BaseTab):
@@ -22,8 +21,6 @@ class MergeTab(BaseTab):
     def __init__(self, parent, app):
         self.audio_files = []
         self.audio_durations = []  # 存储每个音频文件的时长
-        self.audio_blocks = []     # 存储音频块的引用
-        self.gap_blocks = []       # 存储间隙块的引用
         self.gaps_ms = []          # 存储间隙时间(毫秒)
         self.timeline_scale = 50   # 时间轴比例 (像素/秒)
         super().__init__(parent, app)
@@ -49,6 +46,9 @@ class MergeTab(BaseTab):
         merge_button = ttk.Button(button_frame, text="合并选定文件", command=self.merge_files)
         merge_button.pack(side=tk.LEFT, padx=5)
         
+        project_button = ttk.Button(button_frame, text="作为项目编辑", command=self.edit_as_project)
+        project_button.pack(side=tk.LEFT, padx=5)
+        
         # 音频文件列表框架
         list_frame = ttk.LabelFrame(merge_frame, text="音频文件列表", padding="10")
         list_frame.pack(fill=tk.X, pady=10)
@@ -110,39 +110,24 @@ class MergeTab(BaseTab):
         canvas_container = ttk.Frame(timeline_frame)
         canvas_container.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        # 垂直滚动条
-        v_scrollbar = ttk.Scrollbar(canvas_container)
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
         # 水平滚动条
         h_scrollbar = ttk.Scrollbar(canvas_container, orient=tk.HORIZONTAL)
         h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
         
         # 创建画布
-        self.timeline_canvas = tk.Canvas(canvas_container, 
-                                 height=150, 
-                                 bg="#f0f0f0", 
-                                 yscrollcommand=v_scrollbar.set,
-                                 xscrollcommand=h_scrollbar.set)
+        self.timeline_canvas = tk.Canvas(canvas_container, height=CANVAS_HEIGHT, bg="#f0f0f0")
         self.timeline_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        # 配置滚动条
-        v_scrollbar.config(command=self.timeline_canvas.yview)
-        h_scrollbar.config(command=self.timeline_canvas.xview)
-        
         # 创建时间标尺
         self.ruler_canvas = tk.Canvas(timeline_frame, height=20, bg="#e0e0e0")
         self.ruler_canvas.pack(fill=tk.X, pady=(0, 5))
         
-        # 绑定鼠标事件
-        self.timeline_canvas.bind("<ButtonPress-1>", self.on_timeline_click)
-        self.timeline_canvas.bind("<B1-Motion>", self.on_timeline_drag)
-        self.timeline_canvas.bind("<ButtonRelease-1>", self.on_timeline_release)
-        
-        # 初始选中的项
-        self.selected_item = None
-        self.drag_start_x = 0
-        self.initial_gap_width = 0
+        # 时间轴只绘制可见范围，滚动、拖拽和鼠标事件由TimelineView处理
+        self.timeline_view = TimelineView(
+            self.timeline_canvas, self.ruler_canvas, h_scrollbar,
+            on_clip_click=self.on_timeline_clip_click,
+            on_gap_resize=self.on_timeline_gap_resize
+        )
     
     def zoom_in_timeline(self):
         """放大时间轴"""
@@ -156,112 +141,15 @@ class MergeTab(BaseTab):
             self.timeline_scale -= 10
             self.update_timeline()
     
-    def on_timeline_click(self, event):
-        """时间轴点击事件"""
-        # 获取点击的项
-        item = self.timeline_canvas.find_closest(event.x, event.y)
-        if item:
-            tags = self.timeline_canvas.gettags(item)
-            if "gap" in tags:
-                self.selected_item = item
-                self.drag_start_x = event.x
-                # 获取当前间隙宽度
-                x1, _, x2, _ = self.timeline_canvas.coords(item)
-                self.initial_gap_width = x2 - x1
-                # 高亮显示选中的间隙
-                self.timeline_canvas.itemconfig(item, fill="#a0c4ff")
-            elif "audio" in tags:
-                # 获取音频块的索引
-                for i, block in enumerate(self.audio_blocks):
-                    if block == item[0]:
-                        # 选中对应的列表项
-                        self.files_listbox.selection_clear(0, tk.END)
-                        self.files_listbox.selection_set(i)
-                        self.files_listbox.see(i)
-                        break
-    
-    def on_timeline_drag(self, event):
-        """时间轴拖拽事件"""
-        if self.selected_item:
-            # 计算拖拽距离
-            dx = event.x - self.drag_start_x
-            
-            # 获取对应的间隙索引
-            gap_index = self.gap_blocks.index(self.selected_item)
-            
-            # 计算新的宽度，确保最小宽度
-            new_width = max(10, self.initial_gap_width + dx)
-            
-            # 更新间隙宽度
-            x1, y1, _, y2 = self.timeline_canvas.coords(self.selected_item)
-            self.timeline_canvas.coords(self.selected_item, x1, y1, x1 + new_width, y2)
-            
-            # 更新后续音频块和间隙的位置
-            self.update_blocks_after(gap_index, new_width - self.initial_gap_width)
-            
-            # 更新间隙时间
-            self.gaps_ms[gap_index] = int(new_width / self.timeline_scale * 1000)
-            
-            # 更新时间标签
-            self.update_gap_label(gap_index)
-    
-    def on_timeline_release(self, event):
-        """时间轴释放事件"""
-        if self.selected_item:
-            # 重置选中状态
-            self.timeline_canvas.itemconfig(self.selected_item, fill="#e0e0e0")
-            self.selected_item = None
-    
-    def update_blocks_after(self, gap_index, dx):
-        """更新指定间隙后的所有块位置"""
-        # 获取所有需要更新的块
-        for i in range(gap_index + 1, len(self.audio_blocks)):
-            # 移动音频块
-            self.timeline_canvas.move(self.audio_blocks[i], dx, 0)
-            
-            # 移动对应的标签
-            self.timeline_canvas.move(f"audio_label_{i}", dx, 0)
-            
-            # 如果有间隙，也移动间隙
-            if i < len(self.gap_blocks):
-                self.timeline_canvas.move(self.gap_blocks[i], dx, 0)
-                self.timeline_canvas.move(f"gap_label_{i}", dx, 0)
-        
-        # 更新画布滚动区域
-        self.update_canvas_scroll_region()
-    
-    def update_canvas_scroll_region(self):
-        """更新画布滚动区域"""
-        # 计算所有内容的总宽度
-        if not self.audio_blocks:
-            total_width = 100
-        else:
-            # 获取最后一个音频块的右边界
-            last_audio = self.audio_blocks[-1]
-            x1, _, x2, _ = self.timeline_canvas.coords(last_audio)
-            total_width = x2 + 50  # 添加一些额外空间
-        
-        self.timeline_canvas.config(scrollregion=(0, 0, total_width, 150))
-        self.ruler_canvas.config(scrollregion=(0, 0, total_width, 20))
+    def on_timeline_clip_click(self, index):
+        """点击时间轴上的音频块时选中对应的列表项"""
+        self.files_listbox.selection_clear(0, tk.END)
+        self.files_listbox.selection_set(index)
+        self.files_listbox.see(index)
     
-    def update_gap_label(self, gap_index):
-        """更新间隙时间标签"""
-        # 获取间隙时间并格式化
-        gap_time = self.gaps_ms[gap_index] / 1000.0  # 转换为秒
-        gap_time_str = f"{gap_time:.1f}s"
-        
-        # 更新标签文本
-        label_id = f"gap_label_{gap_index}"
-        self.timeline_canvas.itemconfig(label_id, text=gap_time_str)
-        
-        # 居中放置标签
-        gap_block = self.gap_blocks[gap_index]
-        x1, y1, x2, y2 = self.timeline_canvas.coords(gap_block)
-        cx = (x1 + x2) / 2
-        cy = (y1 + y2) / 2
-        
-        # 获取标签的位置并更新
-        self.timeline_canvas.coords(label_id, cx, cy)
+    def on_timeline_gap_resize(self, gap_index, gap_ms):
+        """拖拽时间轴上的间隙时更新间隙时间"""
+        self.gaps_ms[gap_index] = gap_ms
     
     def add_gap_at_selection(self):
         """在选定的位置添加空白"""
@@ -271,137 +159,40 @@ class MergeTab(BaseTab):
             return
         
         index = selected[0]
+        if index >= len(self.audio_files) - 1:
+            show_error("错误", "请选择最后一个文件之前的文件，空白添加在该文件之后")
+            return
+        
         duration_sec = self.gap_duration_var.get()
         duration_ms = int(duration_sec * 1000)
         
-        # 如果是最后一个文件，添加到文件之后
-        if index == len(self.audio_files) - 1:
-            self.gaps_ms.append(duration_ms)
-        else:
-            # 否则插入到对应位置
-            self.gaps_ms.insert(index, duration_ms)
-        
-        # 更新时间轴
-        self.update_timeline()
+        # 设置选定文件与下一个文件之间的间隙，时间轴只更新这一个间隙
+        self.gaps_ms[index] = duration_ms
+        self.timeline_view.update_gap(index, duration_ms)
     
     def update_timeline(self):
         """更新时间轴可视化"""
-        # 清空画布
-        self.timeline_canvas.delete("all")
-        self.ruler_canvas.delete("all")
-        self.audio_blocks = []
-        self.gap_blocks = []
-        
-        if not self.audio_files:
-            return
-            
-        # 起始x坐标
-        x = 10
+        # 确保每两个相邻音频之间都有间隙
+        while len(self.gaps_ms) < len(self.audio_files) - 1:
+            self.gaps_ms.append(0)
+        self.timeline_view.set_content(self.audio_files, self.audio_durations, self.gaps_ms, self.timeline_scale)
+    
+    def refresh_timeline_items(self, clips=(), gaps=()):
+        """
+        将指定音频和间隙的当前数据同步到时间轴，只更新这些项的布局
         
-        # 绘制每个音频和间隙
-        for i, (file_path, duration) in enumerate(zip(self.audio_files, self.audio_durations)):
-            # 计算音频块宽度
-            width = (duration / 1000.0) * self.timeline_scale  # 毫秒转秒，然后乘以比例
-            
-            # 绘制音频块
-            audio_block = self.timeline_canvas.create_rectangle(
-                x, 20, x + width, 100,
-                fill="#90caf9", outline="#2196f3",
-                tags=("audio", f"audio_{i}")
-            )
-            self.audio_blocks.append(audio_block)
-            
-            # 添加文件名标签
-            filename = os.path.basename(file_path)
-            if len(filename) > 20:
-                filename = filename[:17] + "..."
-            self.timeline_canvas.create_text(
-                x + width/2, 60,
-                text=filename,
-                tags=f"audio_label_{i}"
-            )
-            
-            # 添加时长标签
-            duration_str = format_time(duration)
-            self.timeline_canvas.create_text(
-                x + width/2, 80,
-                text=duration_str,
-                tags=f"audio_duration_{i}"
-            )
-            
-            # 如果有下一个音频，添加间隙
-            if i < len(self.audio_files) - 1:
-                # 确保有足够的间隙
-                if i >= len(self.gaps_ms):
-                    self.gaps_ms.append(0)
-                
-                # 计算间隙宽度
-                gap_width = (self.gaps_ms[i] / 1000.0) * self.timeline_scale  # 毫秒转秒，然后乘以比例
-                gap_width = max(10, gap_width)  # 确保最小宽度
-                
-                # 更新x坐标
-                x += width
-                
-                # 绘制间隙块
-                gap_block = self.timeline_canvas.create_rectangle(
-                    x, 30, x + gap_width, 90,
-                    fill="#e0e0e0", outline="#9e9e9e",
-                    tags=("gap", f"gap_{i}")
-                )
-                self.gap_blocks.append(gap_block)
-                
-                # 添加间隙时间标签
-                gap_time = self.gaps_ms[i] / 1000.0  # 转换为秒
-                gap_label = self.timeline_canvas.create_text(
-                    x + gap_width/2, 60,
-                    text=f"{gap_time:.1f}s",
-                    tags=f"gap_label_{i}"
-                )
-                
-                # 更新x坐标
-                x += gap_width
-            else:
-                # 更新x坐标到下一个位置
-                x += width
-        
-        # 绘制时间标尺
-        self.draw_time_ruler(x)
-        
-        # 设置画布滚动区域
-        self.timeline_canvas.config(scrollregion=(0, 0, x + 50, 150))
-        self.ruler_canvas.config(scrollregion=(0, 0, x + 50, 20))
+        参数:
+            clips: 发生变化的音频序号
+            gaps: 发生变化的间隙序号
+        """
+        for i in clips:
+            self.timeline_view.update_clip(i, self.audio_files[i], self.audio_durations[i])
+        for i in gaps:
+            self.timeline_view.update_gap(i, self.gaps_ms[i])
     
-    def draw_time_ruler(self, total_width):
-        """绘制时间标尺"""
-        # 计算总时长
-        total_duration = sum(self.audio_durations) + sum(self.gaps_ms)
-        total_seconds = math.ceil(total_duration / 1000.0)
-        
-        # 计算刻度间隔
-        if self.timeline_scale <= 30:
-            tick_interval = 10  # 每10秒一个刻度
-        elif self.timeline_scale <= 60:
-            tick_interval = 5   # 每5秒一个刻度
-        elif self.timeline_scale <= 100:
-            tick_interval = 2   # 每2秒一个刻度
-        else:
-            tick_interval = 1   # 每1秒一个刻度
-        
-        # 绘制刻度
-        for sec in range(0, total_seconds + tick_interval, tick_interval):
-            x = 10 + (sec * self.timeline_scale)
-            if x > total_width:
-                break
-                
-            # 绘制刻度线
-            self.ruler_canvas.create_line(x, 0, x, 10, fill="#666")
-            
-            # 添加时间标签
-            time_str = f"{sec}s"
-            self.ruler_canvas.create_text(x, 15, text=time_str, anchor=tk.CENTER)
-            
-            # 在主画布上添加辅助线
-            self.timeline_canvas.create_line(x, 0, x, 150, fill="#ddd", dash=(2, 4))
+    def on_peaks_ready(self, file_path, index):
+        """波形索引生成完成后在时间轴上显示波形"""
+        self.timeline_view.set_peaks(file_path, index)
             
     def add_files(self):
         """
@@ -409,24 +200,47 @@ class MergeTab(BaseTab):
         """
         files = load_multiple_audio_files()
         if files:
+            # 去除已在列表中的文件和重复选择的文件
+            new_files = []
             for file in files:
-                if file not in self.audio_files:
-                    # 获取音频时长
-                    try:
-                        duration = get_audio_duration(file)
-                        
-                        self.audio_files.append(file)
-                        self.audio_durations.append(duration)
-                        self.files_listbox.insert(tk.END, os.path.basename(file))
-                        
-                        # 为每个添加的文件之间设置默认间隙为0
-                        if len(self.audio_files) > 1 and len(self.gaps_ms) < len(self.audio_files) - 1:
-                            self.gaps_ms.append(0)
-                    except Exception as e:
-                        show_error("错误", f"无法加载音频文件: {str(e)}")
-            
-            # 更新时间轴
-            self.update_timeline()
+                if file not in self.audio_files and file not in new_files:
+                    new_files.append(file)
+            
+            # 在后台并行获取音频时长，结果按选择顺序返回
+            self.run_in_background(
+                lambda: list(parallel_map(probe_audio, new_files)),
+                on_done=self.on_files_probed,
+                error_prefix="无法加载音频文件",
+                description="读取音频信息"
+            )
+    
+    def on_files_probed(self, results):
+        """
+        音频文件信息读取完成后添加到列表
+        
+        参数:
+            results: parallel_map产生的(文件, 信息, 异常)元组列表
+        """
+        for file, info, error in results:
+            if error is not None:
+                show_error("错误", f"无法加载音频文件: {str(error)}")
+                continue
+            # 读取期间可能已通过其他操作添加过
+            if file in self.audio_files:
+                continue
+            
+            duration = int(round(info['duration_ms']))
+            self.audio_files.append(file)
+            self.audio_durations.append(duration)
+            self.files_listbox.insert(tk.END, os.path.basename(file))
+            self.app.request_peak_index(file, self.on_peaks_ready)
+            
+            # 为每个添加的文件之间设置默认间隙为0
+            if len(self.audio_files) > 1 and len(self.gaps_ms) < len(self.audio_files) - 1:
+                self.gaps_ms.append(0)
+        
+        # 更新时间轴
+        self.update_timeline()
     
     def update_gaps_ui(self):
         """
@@ -461,6 +275,7 @@ class MergeTab(BaseTab):
             def create_callback(index, var):
                 def callback(*args):
                     self.gaps_ms[index] = int(var.get() * 1000)  # 转换为毫秒
+                    self.timeline_view.update_gap(index, self.gaps_ms[index])
                 return callback
                 
             gap_var.trace_add("write", create_callback(i, gap_var))
@@ -521,9 +336,11 @@ class MergeTab(BaseTab):
         self.audio_durations[idx], self.audio_durations[idx-1] = self.audio_durations[idx-1], self.audio_durations[idx]
         
         # 更新文件之间的间隙
+        changed_gaps = []
         if idx > 1 and idx - 2 < len(self.gaps_ms):
             # 如果移动的不是第二个文件，需要交换两个间隙
             self.gaps_ms[idx-2], self.gaps_ms[idx-1] = self.gaps_ms[idx-1], self.gaps_ms[idx-2]
+            changed_gaps = [idx-2, idx-1]
         
         # 更新列表显示
         file_name = self.files_listbox.get(idx)
@@ -532,8 +349,8 @@ class MergeTab(BaseTab):
         self.files_listbox.selection_clear(0, tk.END)
         self.files_listbox.selection_set(idx-1)
         
-        # 更新时间轴
-        self.update_timeline()
+        # 时间轴只更新交换的两个音频和间隙
+        self.refresh_timeline_items(clips=(idx-1, idx), gaps=changed_gaps)
     
     def move_down(self):
         """
@@ -549,9 +366,11 @@ class MergeTab(BaseTab):
         self.audio_durations[idx], self.audio_durations[idx+1] = self.audio_durations[idx+1], self.audio_durations[idx]
         
         # 更新文件之间的间隙
+        changed_gaps = []
         if idx < len(self.gaps_ms) and idx + 1 < len(self.gaps_ms):
             # 交换两个间隙
             self.gaps_ms[idx], self.gaps_ms[idx+1] = self.gaps_ms[idx+1], self.gaps_ms[idx]
+            changed_gaps = [idx, idx+1]
         
         # 更新列表显示
         file_name = self.files_listbox.get(idx)
@@ -560,8 +379,8 @@ class MergeTab(BaseTab):
         self.files_listbox.selection_clear(0, tk.END)
         self.files_listbox.selection_set(idx+1)
         
-        # 更新时间轴
-        self.update_timeline()
+        # 时间轴只更新交换的两个音频和间隙
+        self.refresh_timeline_items(clips=(idx, idx+1), gaps=changed_gaps)
     
     def preview_merge(self):
         """
@@ -571,15 +390,28 @@ class MergeTab(BaseTab):
             show_error("错误", "请先添加音频文件")
             return
             
-        try:
-            # 直接使用统一的预览接口
-            AudioProcessor.preview_operation(
-                self.audio_files,
-                AudioProcessor.merge_audios_with_gaps,
-                self.gaps_ms
-            )
-        except Exception as e:
-            show_error("错误", f"预览音频失败: {str(e)}")
+        # 合并结果以项目(编辑决策列表)表示，只渲染从选定文件开始的一段预览，
+        # 不需要解码全部输入
+        project = Project.from_sequence(list(self.audio_files), list(self.gaps_ms), list(self.audio_durations))
+        selected = self.files_listbox.curselection()
+        start_ms = project.clip_offsets()[selected[0]] if selected else 0
+        
+        self.run_in_background(
+            project.preview, start_ms,
+            error_prefix="预览音频失败",
+            description="预览合并"
+        )
+    
+    def edit_as_project(self):
+        """
+        将合并结果作为当前项目，在"剪切/删除"和"音频效果"选项卡中继续编辑，不写中间文件
+        """
+        if not self.audio_files:
+            show_error("错误", "请先添加音频文件")
+            return
+        project = Project.from_sequence(list(self.audio_files), list(self.gaps_ms), list(self.audio_durations))
+        self.app.set_project(project)
+        self.app.status_var.set(f"已将{len(self.audio_files)}个文件作为项目打开，编辑完成后导出项目")
     
     def merge_files(self):
         """
@@ -589,14 +421,20 @@ class MergeTab(BaseTab):
             show_error("错误", "请先添加音频文件")
             return
             
-        try:
-            output_path = save_audio_file()
-            if not output_path:
-                return
-            
-            # 使用带间隙的合并方法
-            AudioProcessor.merge_audios_with_gaps(self.audio_files, output_path, self.gaps_ms)
-            show_info("成功", f"已成功合并音频并保存到: {output_path}")
-            
-        except Exception as e:
-            show_error("错误", f"合并音频失败: {str(e)}") 
\ No newline at end of file
+        output_path = save_audio_file()
+        if not output_path:
+            return
+        
+        def on_done(stream_copied):
+            mode_str = "（无损流复制）" if stream_copied else ""
+            show_info("成功", f"已成功合并音频并保存到: {output_path}{mode_str}")
+        
+        # 使用带间隙的合并方法，在后台执行
+        self.run_in_background(
+            AudioProcessor.merge_audios_with_gaps,
+            list(self.audio_files), output_path, list(self.gaps_ms),
+            on_done=on_done,
+            error_prefix="合并音频失败",
+            description="合并音频",
+            cancellable=True
+        ) 
\ No newline at end of file
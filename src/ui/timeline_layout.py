@@ -0,0 +1,133 @@
+class TimelineLayout:
+    """
+    时间轴布局模型: 音频块和间隙交替排列(音频0, 间隙0, 音频1, ..., 音频n-1)
+
+    各元素的宽度保存在树状数组(Fenwick树)中，修改一个元素的宽度、
+    查询任意元素的起始位置以及按坐标查找元素都是O(log n)，
+    拖拽间隙或交换相邻音频时不需要重新计算全部位置
+    """
+
+    def __init__(self, clip_widths=(), gap_widths=()):
+        """
+        参数:
+            clip_widths: 每个音频块的宽度
+            gap_widths: 相邻音频块之间的间隙宽度，数量为音频块数量减1
+        """
+        clip_widths = list(clip_widths)
+        gap_widths = list(gap_widths)
+        if clip_widths and len(gap_widths) != len(clip_widths) - 1:
+            raise ValueError("间隙数量必须比音频块数量少1")
+
+        widths = []
+        for i, width in enumerate(clip_widths):
+            widths.append(float(width))
+            if i < len(gap_widths):
+                widths.append(float(gap_widths[i]))
+        self._widths = widths
+
+        # 线性时间建树: 每个节点把自己的和加到父节点上
+        tree = [0.0] + widths
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    @property
+    def clip_count(self):
+        """
+        音频块数量
+        """
+        return (len(self._widths) + 1) // 2
+
+    @property
+    def total_width(self):
+        """
+        全部音频块和间隙的总宽度
+        """
+        return self._prefix(len(self._widths))
+
+    def _prefix(self, count):
+        """
+        前count个元素的宽度之和
+        """
+        total = 0.0
+        while count > 0:
+            total += self._tree[count]
+            count -= count & -count
+        return total
+
+    def _set_width(self, position, width):
+        """
+        修改第position个元素的宽度
+        """
+        delta = float(width) - self._widths[position]
+        if delta == 0:
+            return
+        self._widths[position] = float(width)
+        position += 1
+        while position < len(self._tree):
+            self._tree[position] += delta
+            position += position & -position
+
+    def clip_start(self, index):
+        """
+        音频块的起始位置
+        """
+        return self._prefix(2 * index)
+
+    def clip_width(self, index):
+        """
+        音频块的宽度
+        """
+        return self._widths[2 * index]
+
+    def gap_width(self, index):
+        """
+        第index个间隙(音频index与index+1之间)的宽度
+        """
+        return self._widths[2 * index + 1]
+
+    def set_clip_width(self, index, width):
+        """
+        修改音频块的宽度，之后所有元素的位置随之改变
+        """
+        self._set_width(2 * index, width)
+
+    def set_gap_width(self, index, width):
+        """
+        修改间隙的宽度，之后所有元素的位置随之改变
+        """
+        self._set_width(2 * index + 1, width)
+
+    def element_at(self, x):
+        """
+        查找坐标x所在的元素
+
+        返回:
+            元素序号(偶数为音频块，奇数为间隙)，x超出总宽度时返回元素数量
+        """
+        position = 0
+        remaining = x
+        step = 1
+        while step * 2 < len(self._tree):
+            step *= 2
+        # 从最高位开始逐位确定前缀和不超过x的最长前缀
+        while step:
+            candidate = position + step
+            if candidate < len(self._tree) and self._tree[candidate] <= remaining:
+                position = candidate
+                remaining -= self._tree[candidate]
+            step //= 2
+        return position
+
+    def first_clip_at(self, x):
+        """
+        查找结束位置在x之后的第一个音频块
+
+        返回:
+            音频块序号，没有时返回音频块数量
+        """
+        element = self.element_at(x)
+        # x落在间隙中时，下一个音频块是第一个结束位置在x之后的音频块
+        return min(self.clip_count, (element + 1) // 2)
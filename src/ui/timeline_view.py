@@ -0,0 +1,515 @@
+import math
+import os
+
+import numpy as np
+
+from src.utils import format_time
+from .timeline_layout import TimelineLayout
+
+# 时间轴左侧留白(像素)
+LEFT_MARGIN = 10
+
+# 内容右侧留白(像素)
+RIGHT_MARGIN = 50
+
+# 间隙的最小显示宽度(像素)，便于拖拽时长为0的间隙
+MIN_GAP_WIDTH = 10
+
+# 显示文件名和时长标签所需的最小音频块宽度(像素)
+MIN_LABEL_WIDTH = 40
+
+# 音频块和间隙块的纵向位置
+CLIP_TOP, CLIP_BOTTOM = 20, 100
+GAP_TOP, GAP_BOTTOM = 30, 90
+WAVE_CENTER, WAVE_HALF_HEIGHT = 60, 36
+
+CANVAS_HEIGHT = 150
+
+# 各类画布项的颜色
+CLIP_FILL, CLIP_OUTLINE = "#90caf9", "#2196f3"
+GAP_FILL, GAP_OUTLINE, GAP_ACTIVE_FILL = "#e0e0e0", "#9e9e9e", "#a0c4ff"
+WAVE_FILL = "#1e6fc0"
+
+
+def get_tick_interval(timeline_scale):
+    """
+    根据缩放比例(像素/秒)选择标尺刻度间隔(秒)
+    """
+    if timeline_scale <= 30:
+        return 10
+    if timeline_scale <= 60:
+        return 5
+    if timeline_scale <= 100:
+        return 2
+    return 1
+
+
+class _ItemPool:
+    """
+    同一类画布项的复用池
+
+    每次重绘按顺序取用已有的画布项，不足时创建，多余的隐藏，
+    画布项的数量只与可见范围内的内容有关。每个画布项记录上次设置的坐标和属性，
+    只有发生变化的部分才会调用Tk
+    """
+
+    def __init__(self, canvas, kind, create):
+        """
+        参数:
+            canvas: Canvas对象
+            kind: 画布项的类别标签
+            create: 创建一个新画布项的函数，参数为类别标签，返回画布项ID
+        """
+        self.canvas = canvas
+        self.kind = kind
+        self.create = create
+        self.items = []
+        self.used = 0      # 本次重绘已取用的数量
+        self.visible = 0   # 上次重绘后处于显示状态的数量
+        self.created = False  # 本次重绘是否创建了新的画布项
+        self._coords = {}  # 画布项 -> 上次设置的坐标
+        self._options = {} # 画布项 -> 上次设置的属性
+
+    def reset(self):
+        """
+        开始一次重绘
+        """
+        self.used = 0
+        self.created = False
+
+    def take(self):
+        """
+        取用下一个画布项
+        """
+        if self.used == len(self.items):
+            self.items.append(self.create(self.kind))
+            self.created = True
+        item = self.items[self.used]
+        if self.used >= self.visible:
+            self.canvas.itemconfigure(item, state="normal")
+        self.used += 1
+        return item
+
+    def update(self, item, coords, **options):
+        """
+        设置画布项的坐标和属性，与上次设置的值相同时不调用Tk
+
+        参数:
+            item: 画布项ID
+            coords: 坐标元组
+            **options: 画布项属性
+        """
+        if self._coords.get(item) != coords:
+            self.canvas.coords(item, *coords)
+            self._coords[item] = coords
+        if options:
+            previous = self._options.setdefault(item, {})
+            changed = {key: value for key, value in options.items() if previous.get(key) != value}
+            if changed:
+                self.canvas.itemconfigure(item, **changed)
+                previous.update(changed)
+
+    def finish(self):
+        """
+        结束一次重绘，隐藏本次没有用到的画布项
+        """
+        for item in self.items[self.used:self.visible]:
+            self.canvas.itemconfigure(item, state="hidden")
+        self.visible = self.used
+
+
+class TimelineView:
+    """
+    虚拟化的合并时间轴: 只绘制可见范围内的音频块、间隙、波形和标尺刻度
+
+    画布项按类别复用，滚动、缩放和拖拽时只修改可见画布项的坐标和属性，
+    画布项数量和重绘耗时与工程总长度无关。画布使用窗口坐标，
+    水平滚动由滚动条和视图偏移量实现，不使用画布的scrollregion
+    """
+
+    def __init__(self, canvas, ruler_canvas, scrollbar, on_clip_click=None, on_gap_resize=None):
+        """
+        参数:
+            canvas: 时间轴Canvas
+            ruler_canvas: 时间标尺Canvas
+            scrollbar: 水平滚动条
+            on_clip_click: 点击音频块时的回调，参数为音频序号
+            on_gap_resize: 拖拽间隙时的回调，参数为(间隙序号, 新的间隙时长(毫秒))
+        """
+        self.canvas = canvas
+        self.ruler_canvas = ruler_canvas
+        self.scrollbar = scrollbar
+        self.on_clip_click = on_clip_click
+        self.on_gap_resize = on_gap_resize
+
+        self.files = []
+        self.durations = []
+        self.gaps_ms = []
+        self.scale = 50            # 像素/秒
+        self.view_x = 0.0          # 视图左边缘对应的内容坐标(像素)
+        self.peaks = {}            # 文件路径 -> PeakIndex
+
+        # 布局: 音频块和间隙在内容坐标中的宽度和位置
+        self.layout = TimelineLayout()
+
+        # 当前可见画布项 -> ("clip"或"gap", 序号)
+        self._item_targets = {}
+        self._redraw_id = None
+        self._wave_keys = {}       # 波形画布项 -> 上次绘制的波形范围
+        self._drag = None
+        self.active_gap = None
+
+        def create_rect(kind):
+            return canvas.create_rectangle(0, 0, 0, 0, tags=(kind,))
+
+        def create_text(kind):
+            return canvas.create_text(0, 0, tags=(kind,))
+
+        def create_wave(kind):
+            return canvas.create_polygon(0, 0, 0, 0, 0, 0, fill=WAVE_FILL, outline="", tags=(kind,))
+
+        def create_grid(kind):
+            return canvas.create_line(0, 0, 0, CANVAS_HEIGHT, fill="#ddd", dash=(2, 4), tags=(kind,))
+
+        self._pools = {
+            "grid": _ItemPool(canvas, "grid", create_grid),
+            "clip": _ItemPool(canvas, "clip", create_rect),
+            "wave": _ItemPool(canvas, "wave", create_wave),
+            "gap": _ItemPool(canvas, "gap", create_rect),
+            "label": _ItemPool(canvas, "label", create_text),
+            "tick": _ItemPool(ruler_canvas, "tick",
+                              lambda kind: ruler_canvas.create_line(0, 0, 0, 10, fill="#666", tags=(kind,))),
+            "tick_label": _ItemPool(ruler_canvas, "tick_label",
+                                    lambda kind: ruler_canvas.create_text(0, 15, anchor="center", tags=(kind,)))
+        }
+
+        scrollbar.config(command=self.xview)
+        canvas.bind("<Configure>", lambda event: self.schedule_redraw())
+        canvas.bind("<ButtonPress-1>", self._on_press)
+        canvas.bind("<B1-Motion>", self._on_drag)
+        canvas.bind("<ButtonRelease-1>", self._on_release)
+        canvas.bind("<Shift-MouseWheel>", self._on_wheel)
+
+    def set_content(self, files, durations, gaps_ms, scale):
+        """
+        设置时间轴内容并重新布局
+
+        参数:
+            files: 音频文件路径列表
+            durations: 每个音频的时长(毫秒)
+            gaps_ms: 相邻音频之间的间隙(毫秒)
+            scale: 缩放比例(像素/秒)
+        """
+        if scale != self.scale and self.scale:
+            # 缩放时保持视图左边缘对应的时间位置不变
+            self.view_x *= scale / float(self.scale)
+        self.files = list(files)
+        self.durations = list(durations)
+        self.gaps_ms = list(gaps_ms)
+        self.scale = scale
+        self._layout()
+        self.schedule_redraw()
+
+    def set_peaks(self, file_path, index):
+        """
+        设置文件的波形峰值索引，该文件可见时重绘
+
+        参数:
+            file_path: 音频文件路径
+            index: PeakIndex对象
+        """
+        self.peaks[file_path] = index
+        if file_path in self.files:
+            self.schedule_redraw()
+
+    def update_clip(self, index, file_path, duration):
+        """
+        修改一个音频块(例如交换顺序后)，只更新该音频块的布局
+
+        参数:
+            index: 音频序号
+            file_path: 音频文件路径
+            duration: 音频时长(毫秒)
+        """
+        self.files[index] = file_path
+        self.durations[index] = duration
+        self.layout.set_clip_width(index, self._clip_width(duration))
+        self.schedule_redraw()
+
+    def update_gap(self, index, gap_ms):
+        """
+        修改一个间隙的时长，只更新该间隙的布局
+
+        参数:
+            index: 间隙序号
+            gap_ms: 间隙时长(毫秒)
+        """
+        self.gaps_ms[index] = gap_ms
+        self.layout.set_gap_width(index, self._gap_width(gap_ms))
+        self.schedule_redraw()
+
+    def _clip_width(self, duration):
+        """
+        音频块的显示宽度(像素)
+        """
+        return duration / 1000.0 * self.scale
+
+    def _gap_width(self, gap_ms):
+        """
+        间隙的显示宽度(像素)
+        """
+        return max(MIN_GAP_WIDTH, gap_ms / 1000.0 * self.scale)
+
+    def _layout(self):
+        """
+        根据全部音频和间隙重新建立布局
+        """
+        gaps = [self.gaps_ms[i] if i < len(self.gaps_ms) else 0 for i in range(max(0, len(self.durations) - 1))]
+        self.layout = TimelineLayout(
+            [self._clip_width(duration) for duration in self.durations],
+            [self._gap_width(gap_ms) for gap_ms in gaps]
+        )
+
+    @property
+    def total_width(self):
+        """
+        内容总宽度(像素)，包括两侧留白
+        """
+        return LEFT_MARGIN + self.layout.total_width + RIGHT_MARGIN
+
+    def _view_width(self):
+        """
+        画布的可见宽度(像素)
+        """
+        width = self.canvas.winfo_width()
+        return width if width > 1 else int(self.canvas.cget("width"))
+
+    def _clamp_view(self):
+        """
+        将视图偏移量限制在内容范围内
+        """
+        max_x = max(0.0, self.total_width - self._view_width())
+        self.view_x = min(max(0.0, self.view_x), max_x)
+
+    def xview(self, *args):
+        """
+        水平滚动条的回调，参数格式与Canvas.xview相同
+        """
+        view_width = self._view_width()
+        if args[0] == "moveto":
+            self.view_x = float(args[1]) * self.total_width
+        elif args[0] == "scroll":
+            step = view_width * 0.9 if args[2] == "pages" else 20
+            self.view_x += int(args[1]) * step
+        self.schedule_redraw()
+
+    def _on_wheel(self, event):
+        """
+        Shift+鼠标滚轮水平滚动
+        """
+        self.xview("scroll", -1 if event.delta > 0 else 1, "units")
+
+    def schedule_redraw(self):
+        """
+        请求重绘，同一轮事件循环中的多次请求合并为一次
+        """
+        if self._redraw_id is None:
+            self._redraw_id = self.canvas.after_idle(self.redraw)
+
+    def redraw(self):
+        """
+        重绘可见范围
+        """
+        self._redraw_id = None
+        self._clamp_view()
+        view_width = self._view_width()
+        left = self.view_x - LEFT_MARGIN
+        right = left + view_width
+
+        for pool in self._pools.values():
+            pool.reset()
+        self._item_targets = {}
+
+        self._draw_ruler(view_width)
+        count = self.layout.clip_count
+        if count:
+            # 在布局中查找第一个右边界在视图左边缘之后的音频块，之后按宽度依次累加位置
+            first = self.layout.first_clip_at(left)
+            start = self.layout.clip_start(first) if first < count else right
+            if 0 < first < count:
+                # 前一个间隙可能部分可见
+                gap_width = self.layout.gap_width(first - 1)
+                self._draw_gap(first - 1, start - gap_width, left, right)
+            for i in range(first, count):
+                if start >= right:
+                    break
+                end = start + self.layout.clip_width(i)
+                self._draw_clip(i, start, end, left, right)
+                if i < count - 1:
+                    self._draw_gap(i, end, left, right)
+                    end += self.layout.gap_width(i)
+                start = end
+
+        created = False
+        for pool in self._pools.values():
+            pool.finish()
+            created = created or pool.created
+        if created:
+            # 有新建的画布项时恢复绘制顺序: 辅助线在最下层，波形在音频块之上，标签在最上层
+            self.canvas.tag_lower("grid")
+            self.canvas.tag_raise("wave")
+            self.canvas.tag_raise("gap")
+            self.canvas.tag_raise("label")
+
+        total = self.total_width
+        self.scrollbar.set(self.view_x / total, min(1.0, (self.view_x + view_width) / total))
+
+    def _to_window(self, content_x):
+        """
+        将内容坐标转换为窗口坐标
+        """
+        return content_x + LEFT_MARGIN - self.view_x
+
+    def _draw_clip(self, index, start, end, left, right):
+        """
+        绘制一个音频块及其波形和标签
+        """
+        x1, x2 = self._to_window(start), self._to_window(end)
+
+        pool = self._pools["clip"]
+        rect = pool.take()
+        pool.update(rect, (x1, CLIP_TOP, x2, CLIP_BOTTOM), fill=CLIP_FILL, outline=CLIP_OUTLINE)
+        self._item_targets[rect] = ("clip", index)
+
+        peak_index = self.peaks.get(self.files[index])
+        if peak_index is not None:
+            self._draw_wave(index, peak_index, start, max(start, left), min(end, right))
+
+        if x2 - x1 >= MIN_LABEL_WIDTH:
+            # 标签放在音频块的可见部分中间，滚动时始终可见
+            cx = (max(x1, 0) + min(x2, right - left)) / 2
+            filename = os.path.basename(self.files[index])
+            if len(filename) > 20:
+                filename = filename[:17] + "..."
+            pool = self._pools["label"]
+            for text, y in ((filename, 60), (format_time(self.durations[index]), 80)):
+                label = pool.take()
+                pool.update(label, (cx, y), text=text)
+                self._item_targets[label] = ("clip", index)
+
+    def _draw_wave(self, index, peak_index, clip_start, visible_start, visible_end):
+        """
+        在音频块的可见部分绘制波形，每个像素一列
+        """
+        columns = int(math.ceil(visible_end - visible_start))
+        if columns <= 0:
+            return
+        pool = self._pools["wave"]
+        wave = pool.take()
+        self._item_targets[wave] = ("clip", index)
+        x0 = self._to_window(visible_start)
+        key = (id(peak_index), visible_start - clip_start, columns, x0, self.scale)
+        if self._wave_keys.get(wave) == key:
+            # 同一画布项上次绘制的就是这一段波形
+            return
+        self._wave_keys[wave] = key
+
+        start_ms = (visible_start - clip_start) / self.scale * 1000.0
+        end_ms = start_ms + columns / float(self.scale) * 1000.0
+        mins, maxs = peak_index.peaks(start_ms, end_ms, columns)
+
+        xs = x0 + np.arange(columns, dtype=np.float64)
+        top = np.column_stack((xs, WAVE_CENTER - maxs * WAVE_HALF_HEIGHT))
+        bottom = np.column_stack((xs[::-1], WAVE_CENTER - mins[::-1] * WAVE_HALF_HEIGHT))
+        # 最大值和最小值相同时也至少显示1像素高
+        bottom[:, 1] = np.maximum(bottom[:, 1], top[::-1, 1] + 1)
+
+        pool.update(wave, tuple(np.concatenate((top, bottom)).ravel().tolist()))
+
+    def _draw_gap(self, index, start, left, right):
+        """
+        绘制一个间隙块及其时长标签
+        """
+        end = start + self.layout.gap_width(index)
+        if end <= left or start >= right:
+            return
+        x1, x2 = self._to_window(start), self._to_window(end)
+
+        pool = self._pools["gap"]
+        rect = pool.take()
+        fill = GAP_ACTIVE_FILL if index == self.active_gap else GAP_FILL
+        pool.update(rect, (x1, GAP_TOP, x2, GAP_BOTTOM), fill=fill, outline=GAP_OUTLINE)
+        self._item_targets[rect] = ("gap", index)
+
+        pool = self._pools["label"]
+        label = pool.take()
+        pool.update(label, ((x1 + x2) / 2, 60), text=f"{self.gaps_ms[index] / 1000.0:.1f}s")
+        self._item_targets[label] = ("gap", index)
+
+    def _draw_ruler(self, view_width):
+        """
+        绘制可见范围内的标尺刻度和辅助线
+        """
+        interval = get_tick_interval(self.scale)
+        total_seconds = self.layout.total_width / self.scale
+        first = max(0, int((self.view_x - LEFT_MARGIN) / self.scale // interval) * interval)
+        sec = first
+        while sec <= total_seconds + interval:
+            x = self._to_window(sec * self.scale)
+            if x > view_width:
+                break
+            for kind, coords, options in (
+                ("tick", (x, 0, x, 10), {}),
+                ("tick_label", (x, 15), {"text": f"{sec}s"}),
+                ("grid", (x, 0, x, CANVAS_HEIGHT), {})
+            ):
+                pool = self._pools[kind]
+                pool.update(pool.take(), coords, **options)
+            sec += interval
+
+    def _target_at(self, x, y):
+        """
+        获取窗口坐标处的音频块或间隙
+        """
+        for item in reversed(self.canvas.find_overlapping(x, y, x, y)):
+            target = self._item_targets.get(item)
+            if target is not None:
+                return target
+        return None
+
+    def _on_press(self, event):
+        """
+        点击间隙开始拖拽，点击音频块时通知选中
+        """
+        target = self._target_at(event.x, event.y)
+        if target is None:
+            return
+        kind, index = target
+        if kind == "gap":
+            self.active_gap = index
+            self._drag = (event.x, self.layout.gap_width(index))
+            self.schedule_redraw()
+        elif self.on_clip_click is not None:
+            self.on_clip_click(index)
+
+    def _on_drag(self, event):
+        """
+        拖拽改变间隙时长，后续内容随之移动
+        """
+        if self._drag is None:
+            return
+        start_x, initial_width = self._drag
+        new_width = max(MIN_GAP_WIDTH, initial_width + event.x - start_x)
+        gap_ms = int(new_width / self.scale * 1000)
+        self.update_gap(self.active_gap, gap_ms)
+        if self.on_gap_resize is not None:
+            self.on_gap_resize(self.active_gap, gap_ms)
+
+    def _on_release(self, event):
+        """
+        结束拖拽
+        """
+        if self._drag is not None:
+            self._drag = None
+            self.active_gap = None
+            self.schedule_redraw()
@@ -1,18 +1,28 @@
-from .file_utils import (
-    format_time, 
-    parse_time, 
-    load_audio_file,
-    load_video_file,
-    load_multiple_audio_files, 
-    save_audio_file, 
-    get_audio_duration,
-    get_file_extension,
-    is_video_file,
-    is_audio_file
-)
+# 按需导入子模块，导入src.utils时不会加载tkinter或pydub
+# (文件选择对话框位于src.ui.dialogs，只由界面使用)
+_EXPORTS = {
+    "format_time": ".time_formatter",
+    "parse_time": ".time_formatter",
+    "parse_time_strict": ".time_formatter",
+    "get_audio_duration": ".file_utils",
+    "get_file_extension": ".file_utils",
+    "is_video_file": ".file_utils",
+    "is_audio_file": ".file_utils",
+    "show_error": ".message_utils",
+    "show_info": ".message_utils",
+    "show_warning": ".message_utils"
+}
 
-from .message_utils import (
-    show_error,
-    show_info,
-    show_warning
-) 
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """
+    首次访问导出名称时再导入对应的子模块
+    """
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
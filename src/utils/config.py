@@ -14,13 +14,30 @@ from pathlib import Path
 CONFIG_DIR = os.path.join(str(Path.home()), ".audio_editor")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
 
+# 解码缓存目录
+CACHE_DIR = os.path.join(CONFIG_DIR, "cache")
+
 # 默认配置
 DEFAULT_CONFIG = {
     "language": "zh_CN",  # 默认语言为中文
     "recent_files": [],  # 最近打开的文件
     "theme": "default",  # 界面主题
     "default_output_dir": "",  # 默认输出目录
-    "default_audio_format": "mp3"  # 默认音频格式
+    "default_audio_format": "mp3",  # 默认音频格式
+    "decode_cache_enabled": True,  # 是否启用解码缓存
+    "decode_cache_size_mb": 2048,  # 解码缓存容量上限(MB)
+    "session_cache_size_mb": 1024,  # 已加载音频常驻内存上限(MB)
+    "streaming_threshold_mb": 512,  # 解码后超过此大小的文件使用流式处理(MB)
+    "decode_workers": 0,  # 并行解码的工作线程数，0表示使用CPU核心数
+    "decode_max_inflight_mb": 1024,  # 同时解码中(尚未合并)的数据量上限(MB)
+    "job_workers": 2,  # 界面后台任务的工作线程数
+    "extract_workers": 0,  # 批量提取时同时运行的ffmpeg进程数，0表示使用CPU核心数
+    "preview_window_ms": 15000,  # 项目预览时每次渲染和播放的时长(毫秒)
+    "resample_mode": "quality",  # 合并时统一采样率的方式: quality(高质量)或fast(快速)
+    "playback_sink": "auto",  # 预览播放输出: auto、sounddevice(声卡直出)、pipe(aplay/ffplay)或null(不出声)
+    "scratch_dir": "",  # 临时文件目录，为空时使用系统临时目录
+    "scratch_quota_mb": 4096,  # 临时文件占用上限(MB)
+    "preview_cache_mb": 256  # 预览渲染缓存容量上限(MB)
 }
 
 
@@ -1,5 +1,3 @@
-from tkinter import messagebox
-
 def show_error(title, message):
     """
     显示错误消息对话框
@@ -8,6 +6,7 @@ def show_error(title, message):
         title: 对话框标题
         message: 错误消息
     """
+    from tkinter import messagebox
     messagebox.showerror(title, message)
 
 def show_info(title, message):
@@ -18,6 +17,7 @@ def show_info(title, message):
         title: 对话框标题
         message: 信息消息
     """
+    from tkinter import messagebox
     messagebox.showinfo(title, message)
 
 def show_warning(title, message):
@@ -28,4 +28,5 @@ def show_warning(title, message):
         title: 对话框标题
         message: 警告消息
     """
+    from tkinter import messagebox
     messagebox.showwarning(title, message) 
\ No newline at end of file
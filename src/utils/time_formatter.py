@@ -0,0 +1,55 @@
+import math
+
+def format_time(milliseconds):
+    """
+    将毫秒转换为易读的时间格式 (分:秒.毫秒)
+    
+    参数:
+        milliseconds: 毫秒数
+        
+    返回:
+        格式化的时间字符串
+    """
+    seconds = milliseconds / 1000
+    minutes = int(seconds // 60)
+    seconds = seconds % 60
+    return f"{minutes:02d}:{seconds:05.2f}"
+
+def parse_time_strict(time_str):
+    """
+    将时间字符串转换为毫秒，格式错误时抛出异常而不弹出对话框(用于随输入实时响应的场合)
+    
+    参数:
+        time_str: 时间字符串，格式为 "分:秒.毫秒" 或 "秒.毫秒"
+        
+    返回:
+        毫秒数
+        
+    异常:
+        ValueError: 时间格式错误
+    """
+    if ":" in time_str:
+        minutes, seconds = time_str.split(":")
+        milliseconds = (int(minutes) * 60 + float(seconds)) * 1000
+    else:
+        milliseconds = float(time_str) * 1000
+    if not math.isfinite(milliseconds):
+        raise ValueError(f"无效的时间: {time_str}")
+    return milliseconds
+
+def parse_time(time_str):
+    """
+    将时间字符串转换为毫秒
+    
+    参数:
+        time_str: 时间字符串，格式为 "分:秒.毫秒" 或 "秒.毫秒"
+        
+    返回:
+        毫秒数
+    """
+    try:
+        return parse_time_strict(time_str)
+    except ValueError:
+        from .message_utils import show_error
+        show_error("格式错误", "时间格式错误，请使用分:秒.毫秒 或 秒.毫秒 格式")
+        return 0